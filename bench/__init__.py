@@ -0,0 +1 @@
+'''Benchmarks do corretor. Execute a partir da raiz do repositório, por exemplo: `python -m bench.forkserver`.'''
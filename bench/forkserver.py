@@ -0,0 +1,40 @@
+'''Compara o custo por correção dos modos "subprocesso" e "fork".
+
+Uso:
+    python -m bench.forkserver [-n REPETICOES]
+'''
+
+import argparse, os, tempfile, time
+
+from src.corretor.modelo import Correcao
+
+
+def medir(modo: str, diretorio: str, n: int) -> float:
+    '''Retorna o tempo médio, em ms, de `n` correções de um script trivial no `modo` dado.'''
+    correcao = Correcao('python', diretorio, 'eco.py', 'Erro.',
+                        verificacoes=[{'func_expect': 'testar_regex', 'args_expect': 'oi'}],
+                        entrada='oi\n', modo=modo)
+    correcao.corrigir()  # Aquecimento (inicia o servidor de fork)
+    inicio = time.perf_counter()
+    for _ in range(n):
+        passou, *_ = correcao.corrigir()
+        assert passou
+    return (time.perf_counter() - inicio) / n * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as diretorio:
+        with open(os.path.join(diretorio, 'eco.py'), 'w') as arq:
+            arq.write('print(input())\n')
+        tempos = {modo: medir(modo, diretorio, args.repeticoes)
+                  for modo in ('subprocesso', 'fork')}
+    for modo, ms in tempos.items():
+        print(f'{modo:12} {ms:8.2f} ms/correção')
+    print(f'{"ganho":12} {tempos["subprocesso"] / tempos["fork"]:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+'''Suíte de benchmarks do corretor: leitura da configuração, execução, verificações e montagem da interface.
+
+Gera uma atividade sintética (questões × correções, com scripts triviais e pesados e entradas grandes)
+e mede separadamente:
+- `ler_config`: `Atividade.ler_arquivo_config`;
+- `corrigir`: `Correcao.corrigir` de todas as correções, em sequência e no `Executor`;
+- `verificar`: o custo de cada tipo de verificação sobre uma saída grande;
+- `interface`: a montagem do `Corretor` (com os `QuestaoWidget`), num display virtual (Xvfb) se não houver um.
+
+Os resultados são gravados em JSON, com o commit e o ambiente, para comparar entre commits.
+
+Uso:
+    python -m bench.suite [-o bench.json] [-q QUESTOES] [-c CORRECOES] [-n REPETICOES] [--entrada BYTES]
+                          [--so ler_config corrigir verificar interface] [--comparar ANTERIOR.json]
+'''
+
+import argparse, contextlib, json, os, platform, shutil, statistics, subprocess, sys, tempfile, \
+    time
+
+from typing import Callable, Iterator
+
+from src.corretor.modelo import Atividade
+from src.corretor.execucao import Executor
+from src.corretor.processo import Execucao
+
+# Constantes
+BENCHMARKS = ('ler_config', 'corrigir', 'verificar', 'interface')
+FORMATO = 1  # Versão do formato do JSON de resultados
+
+# Scripts das respostas sintéticas
+SCRIPTS = {
+    'trivial.py': 'def responder(texto: str) -> str:\n'
+                  '    return texto\n'
+                  'print(responder(input()))\n',
+    'pesado.py': 'def somar(n: int) -> int:\n'
+                 '    return sum(i * i for i in range(n))\n'
+                 'print(somar(int(input())))\n',
+    'eco.py': 'import sys\n'
+              'def contar(texto: str) -> int:\n'
+              '    return len(texto.splitlines())\n'
+              'print(contar(sys.stdin.read()))\n',
+}
+
+
+class Indisponivel(Exception):
+    '''O benchmark não pode ser executado neste ambiente.'''
+
+
+# ATIVIDADE SINTÉTICA
+
+def gerar_atividade(diretorio: str, questoes: int, correcoes: int, tamanho_entrada: int) -> str:
+    '''Gera em `diretorio` os scripts e o arquivo de configuração de uma atividade sintética.
+
+    As questões se alternam entre um script trivial, um pesado (CPU) e um que lê uma entrada grande.
+
+    Parâmetros:
+    - `questoes` é o número de questões.
+    - `correcoes` é o número de correções de cada questão.
+    - `tamanho_entrada` é o tamanho aproximado, em bytes, da entrada das questões de entrada grande.
+
+    Retorno:
+    O caminho do arquivo de configuração.
+    '''
+    for nome, codigo in SCRIPTS.items():
+        with open(os.path.join(diretorio, nome), 'w', encoding='utf-8') as arq:
+            arq.write(codigo)
+    linhas = max(1, tamanho_entrada // 10)
+    config_questoes = []
+    for i in range(questoes):
+        tipo = i % 3
+        config_correcoes = []
+        for j in range(correcoes):
+            if tipo == 0:
+                script, entrada, esperado, funcao = 'trivial.py', f'resposta {j}\n', f'resposta {j}', 'responder'
+            elif tipo == 1:
+                n = 20_000 * (j + 1)
+                script, entrada, esperado, funcao = 'pesado.py', f'{n}\n', str(sum(k * k for k in range(n))), 'somar'
+            else:
+                script, entrada, esperado, funcao = 'eco.py', 'linha 123\n' * linhas, str(linhas), 'contar'
+            config_correcoes += [{
+                'script': script,
+                'entrada': entrada,
+                'verificacoes': [
+                    {'func_expect': 'testar_regex', 'args_expect': f'^{esperado}$'},
+                    {'func_expect': 'testar_nao_regex', 'args_expect': 'Traceback'},
+                    {'func_expect': 'testar_funcao_definida',
+                     'args_expect': {'script': script, 'funcoes': [funcao]}},
+                    {'func_expect': 'testar_param_sem_tipo', 'args_expect': script},
+                ],
+            }]
+        config_questoes += [{'descricao': f'Questão {i + 1}', 'pontos': 1, 'correcoes': config_correcoes}]
+    config = {
+        'titulo': f'Atividade sintética ({questoes}×{correcoes})',
+        'comando': sys.executable,
+        'msg_erro': 'Resposta incorreta.',
+        'questoes': config_questoes,
+    }
+    caminho = os.path.join(diretorio, 'config.json')
+    with open(caminho, 'w', encoding='utf-8') as arq:
+        json.dump(config, arq, ensure_ascii=False)
+    return caminho
+
+
+# MEDIÇÃO
+
+def medir(funcao: Callable[[], object], repeticoes: int, aquecimento: int = 1) -> dict:
+    '''Executa `funcao` `repeticoes` vezes (depois de `aquecimento` execuções descartadas) e resume os tempos.
+
+    Retorno:
+    Um dicionário com a mediana, o mínimo, o máximo e o desvio padrão, em segundos, e o número de repetições.
+    '''
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos += [time.perf_counter() - inicio]
+    return {
+        'mediana': statistics.median(tempos),
+        'min': min(tempos),
+        'max': max(tempos),
+        'desvio': statistics.stdev(tempos) if len(tempos) > 1 else 0.0,
+        'n': len(tempos),
+    }
+
+
+def bench_ler_config(caminho_config: str, repeticoes: int) -> dict:
+    '''Mede a leitura do arquivo de configuração.'''
+    return {'ler_config': medir(lambda: Atividade.ler_arquivo_config(caminho_config), repeticoes)}
+
+
+def bench_corrigir(caminho_config: str, repeticoes: int) -> dict:
+    '''Mede a correção de todas as correções da atividade, em sequência e no `Executor`, sem cache.'''
+    correcoes = [c for q in Atividade.ler_arquivo_config(caminho_config).questoes for c in q.correcoes]
+
+    def sequencial():
+        for correcao in correcoes:
+            passou, *_ = correcao.corrigir()
+            assert passou, correcao.comando_completo_str
+
+    executor = Executor()
+    def concorrente():
+        for correcao in correcoes:
+            executor.submeter(correcao)
+        for _ in correcoes:
+            _, (passou, *_) = executor.resultados.get()
+            assert passou
+
+    try:
+        resultados = {'corrigir_sequencial': medir(sequencial, repeticoes),
+                      'corrigir_executor': medir(concorrente, repeticoes)}
+    finally:
+        executor.encerrar()
+    for resultado in resultados.values():
+        resultado['correcoes'] = len(correcoes)
+        resultado['correcoes_por_s'] = len(correcoes) / resultado['mediana']
+    resultados['corrigir_executor']['workers'] = executor.workers
+    return resultados
+
+
+def bench_verificar(caminho_config: str, repeticoes: int, tamanho_saida: int = 1024 * 1024) -> dict:
+    '''Mede o custo de cada tipo de verificação sobre uma saída de `tamanho_saida` bytes.'''
+    atividade = Atividade.ler_arquivo_config(caminho_config)
+    correcao = atividade.questoes[0].correcoes[0]
+    saida = ('x' * 99 + '\n') * (tamanho_saida // 100) + 'resposta 0\n'
+    resultados = {}
+    for verificacao in correcao._verificacoes:
+        nome = f'verificar_{verificacao.verificador.nome}'
+        # Muitas verificações por amostra, para que o tempo medido não seja dominado pelo relógio
+        vezes = 20
+        amostra = medir(lambda: [verificacao(saida) for _ in range(vezes)], repeticoes)
+        resultados[nome] = {chave: valor / vezes if chave != 'n' else valor
+                            for chave, valor in amostra.items()}
+        resultados[nome]['bytes'] = len(saida)
+    execucao = Execucao(0, saida, '')
+    resultados['verificar_correcao'] = medir(lambda: correcao.verificar(execucao), repeticoes)
+    return resultados
+
+
+@contextlib.contextmanager
+def display_virtual() -> Iterator[None]:
+    '''Garante um display X para o Tk, iniciando um Xvfb se não houver um.
+    Lança `Indisponivel` se não houver display nem Xvfb.'''
+    if sys.platform in ('win32', 'darwin') or os.environ.get('DISPLAY'):
+        yield
+        return
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        raise Indisponivel('não há display nem Xvfb')
+    # -displayfd: o Xvfb escolhe um display livre e escreve seu número no pipe quando estiver pronto
+    leitura, escrita = os.pipe()
+    processo = subprocess.Popen([xvfb, '-displayfd', str(escrita), '-screen', '0', '1920x1080x24'],
+                                pass_fds=[escrita], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(escrita)
+    try:
+        with os.fdopen(leitura) as pipe:
+            numero = pipe.readline().strip()
+        if not numero:
+            raise Indisponivel('o Xvfb não iniciou')
+        os.environ['DISPLAY'] = f':{numero}'
+        yield
+    finally:
+        os.environ.pop('DISPLAY', None)
+        processo.terminate()
+        processo.wait()
+
+
+def bench_interface(caminho_config: str, repeticoes: int) -> dict:
+    '''Mede a montagem da janela do corretor, até ela ser desenhada.'''
+    from src.corretor.corretor import Corretor  # O Tk só é necessário aqui
+
+    def montar():
+        app = Corretor(caminho_config, workers=1)
+        app.janela.update()
+        app.executor.encerrar()
+        app.janela.destroy()
+
+    with display_virtual():
+        return {'interface': medir(montar, repeticoes)}
+
+
+# RESULTADOS
+
+def ambiente() -> dict:
+    '''Retorna o commit e as informações do ambiente em que os benchmarks foram executados.'''
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit,
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processadores': os.cpu_count(),
+    }
+
+
+def exibir(resultados: dict, anteriores: dict | None = None):
+    '''Exibe uma tabela com as medianas e, se houver `anteriores`, a razão entre as medianas (atual / anterior).'''
+    print(f'{"benchmark":34} {"mediana":>12} {"min":>12}' + (f' {"razão":>8}' if anteriores else ''))
+    for nome, r in resultados.items():
+        if 'erro' in r:
+            print(f'{nome:34} {r["erro"]}')
+            continue
+        linha = f'{nome:34} {r["mediana"] * 1000:9.3f} ms {r["min"] * 1000:9.3f} ms'
+        if anteriores and 'mediana' in anteriores.get(nome, {}):
+            linha += f' {r["mediana"] / anteriores[nome]["mediana"]:7.2f}x'
+        print(linha)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--saida', default='bench.json', help='arquivo JSON dos resultados (padrão: bench.json)')
+    parser.add_argument('-q', '--questoes', type=int, default=30)
+    parser.add_argument('-c', '--correcoes', type=int, default=4, help='correções por questão')
+    parser.add_argument('-n', '--repeticoes', type=int, default=5)
+    parser.add_argument('--entrada', type=int, default=256 * 1024,
+                        help='tamanho, em bytes, das entradas grandes (padrão: 256 KiB)')
+    parser.add_argument('--so', nargs='+', choices=BENCHMARKS, default=BENCHMARKS,
+                        help='executa só estes benchmarks')
+    parser.add_argument('--comparar', help='arquivo JSON de uma execução anterior, para comparar')
+    args = parser.parse_args(argv)
+
+    benchmarks = {'ler_config': bench_ler_config, 'corrigir': bench_corrigir,
+                  'verificar': bench_verificar, 'interface': bench_interface}
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_config = gerar_atividade(diretorio, args.questoes, args.correcoes, args.entrada)
+        for nome in args.so:
+            try:
+                resultados.update(benchmarks[nome](caminho_config, args.repeticoes))
+            except Indisponivel as e:
+                resultados[nome] = {'erro': f'indisponível: {e}'}
+    dados = {
+        'formato': FORMATO,
+        'ambiente': ambiente(),
+        'parametros': {'questoes': args.questoes, 'correcoes': args.correcoes,
+                       'repeticoes': args.repeticoes, 'entrada': args.entrada},
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as arq:
+        json.dump(dados, arq, indent=2, ensure_ascii=False)
+    anteriores = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arq:
+            anteriores = json.load(arq)['resultados']
+    exibir(resultados, anteriores)
+
+
+if __name__ == '__main__':
+    main()
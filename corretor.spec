@@ -0,0 +1,51 @@
+# -*- mode: python ; coding: utf-8 -*-
+'''Especificação do PyInstaller para o executável do corretor (veja `doc/criando_executavel.md`).
+
+Uso:
+    pyinstaller corretor.spec
+
+No executável de um arquivo só, quase todo o tempo de inicialização é gasto extraindo as bibliotecas e os dados
+para um diretório temporário. Por isso o executável deixa de fora os módulos que o corretor não usa e os dados do
+Tcl/Tk que a interface não usa (traduções, imagens e demonstrações), e remove os símbolos das bibliotecas.
+'''
+
+import os, sys
+
+# Constantes
+# Módulos da biblioteca padrão que nem a interface nem o modelo usam (e as extensões que eles trazem,
+# como a libssl). O `urllib` não pode sair: o PyInstaller o usa ao iniciar.
+EXCLUIDOS = ['ssl', '_ssl', 'decimal', '_decimal', '_pydecimal', 'xml', 'pyexpat', 'email', 'http', 'unittest',
+             'pydoc', 'pdb', 'doctest', 'multiprocessing', 'sqlite3', '_sqlite3', 'pickle', '_pickle',
+             'unicodedata', '_multibytecodec', '_codecs_jp', '_codecs_cn', '_codecs_kr', '_codecs_hk',
+             '_codecs_tw', '_codecs_iso2022']
+# Dados do Tcl/Tk que a interface não usa (sem as traduções, os diálogos ficam em inglês)
+DADOS_EXCLUIDOS = ('_tcl_data/msgs', '_tcl_data/tzdata', '_tcl_data/http', '_tcl_data/opt',
+                   '_tk_data/msgs', '_tk_data/images', '_tk_data/demos')
+
+# Módulos executados como scripts pelo interpretador de cada correção (o servidor de fork e o chamador das
+# correções de função): no executável, os módulos não ficam em arquivos, então estes são incluídos como dados
+SCRIPTS = [('src/corretor/forkserver.py', 'src/corretor'), ('src/corretor/chamador.py', 'src/corretor')]
+
+a = Analysis(
+    [os.path.join(SPECPATH, 'main.py')],
+    pathex=[SPECPATH],
+    datas=[(os.path.join(SPECPATH, origem), destino) for origem, destino in SCRIPTS],
+    excludes=EXCLUIDOS,
+    optimize=1,
+)
+a.datas = [dado for dado in a.datas if not dado[0].replace(os.sep, '/').startswith(DADOS_EXCLUIDOS)]
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+    name='corretor',
+    # Remover os símbolos não é recomendado no Windows, onde as DLLs já vêm sem eles
+    strip=sys.platform != 'win32',
+    # Bibliotecas comprimidas com o UPX precisam ser descomprimidas a cada inicialização
+    upx=False,
+    console=False,
+)
@@ -0,0 +1,6 @@
+'''Ponto de entrada do corretor. Também é o script usado para criar o executável.'''
+
+from src.corretor.corretor import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+'''Análise estática dos scripts das respostas.
+
+Cada script é lido e analisado uma única vez enquanto não mudar: a árvore sintática é percorrida numa só passada
+(iterativa, sem recursão) e o resultado fica em cache, com chave no caminho, na data de modificação e no tamanho do arquivo.
+Todas as verificações estáticas de um mesmo script compartilham essa análise.
+
+Também faz a verificação prévia dos scripts (veja `diagnosticar`), que evita executar scripts que certamente vão falhar.
+'''
+
+import ast, os, threading
+
+from collections import OrderedDict
+
+# Constantes
+TAMANHO_CACHE = 256  # Número de scripts analisados mantidos em memória
+
+# Tipos
+Funcao = ast.FunctionDef | ast.AsyncFunctionDef
+
+
+# Classes
+
+class Analise:
+    '''As informações de um script usadas pelas verificações estáticas.'''
+
+    def __init__(self, arvore: ast.AST):
+        '''Construtor. Percorre `arvore` uma única vez.
+
+        Parâmetros:
+        - `arvore` é a árvore sintática do script.
+        '''
+        self.arvore: ast.AST = arvore
+        # Funções e métodos, na ordem em que aparecem no script
+        self.funcoes: list[Funcao] = []
+        # Módulos importados, com o nome completo (ex.: "os.path")
+        self.imports: set[str] = set()
+        pilha = [arvore]
+        while pilha:
+            no = pilha.pop()
+            if isinstance(no, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.funcoes += [no]
+            elif isinstance(no, ast.Import):
+                self.imports.update(alias.name for alias in no.names)
+            elif isinstance(no, ast.ImportFrom) and no.module and no.level == 0:
+                self.imports.add(no.module)
+            pilha.extend(ast.iter_child_nodes(no))
+        self.funcoes.sort(key=lambda f: (f.lineno, f.col_offset))
+
+    @property
+    def nomes_funcoes(self) -> set[str]:
+        '''Os nomes das funções e métodos definidos no script.'''
+        return {f.name for f in self.funcoes}
+
+    def importa(self, modulo: str) -> bool:
+        '''Retorna se o script importa `modulo` ou algum submódulo dele.'''
+        return any(i == modulo or i.startswith(modulo + '.') for i in self.imports)
+
+
+# Cache
+
+_cache: OrderedDict[str, tuple[tuple[int, int], Analise | SyntaxError]] = OrderedDict()
+_trava = threading.Lock()
+
+
+def analisar(caminho: str) -> Analise:
+    '''Retorna a análise do script em `caminho`, reaproveitando a anterior se o arquivo não mudou.
+
+    Lança `OSError` se o arquivo não puder ser lido e `SyntaxError` se ele tiver erro de sintaxe.
+    '''
+    caminho = os.path.abspath(caminho)
+    st = os.stat(caminho)
+    versao = (st.st_mtime_ns, st.st_size)
+    with _trava:
+        guardado = _cache.get(caminho)
+        if guardado is not None and guardado[0] == versao:
+            _cache.move_to_end(caminho)
+            resultado = guardado[1]
+        else:
+            resultado = None
+    if resultado is None:
+        with open(caminho, 'rb') as arq:
+            fonte = arq.read()
+        try:
+            resultado = Analise(ast.parse(fonte, caminho))
+        except SyntaxError as e:
+            resultado = e
+        except (ValueError, RecursionError) as e:  # Bytes nulos, aninhamento profundo demais
+            resultado = SyntaxError(str(e))
+        with _trava:
+            _cache[caminho] = (versao, resultado)
+            _cache.move_to_end(caminho)
+            while len(_cache) > TAMANHO_CACHE:
+                _cache.popitem(last=False)
+    if isinstance(resultado, SyntaxError):
+        raise resultado
+    return resultado
+
+
+_diagnosticos: OrderedDict[str, tuple[tuple[int, int], tuple[int, str] | None]] = OrderedDict()
+
+
+def diagnosticar(caminho: str, nome: str, compilar: bool) -> tuple[int, str] | None:
+    '''Verificação prévia do script em `caminho`, sem executá-lo: o arquivo deve existir e, se `compilar`,
+    ser compilado sem erros. O resultado da compilação é reaproveitado enquanto o arquivo não mudar.
+
+    Parâmetros:
+    - `caminho` é o caminho do script.
+    - `nome` é o nome do script exibido na mensagem de arquivo inexistente (como o da configuração).
+    - `compilar` indica se o script deve ser compilado (só para scripts Python executados por este mesmo interpretador).
+
+    Retorno:
+    None, se o script pode ser executado, ou o código de saída e a mensagem de erro: a do interpretador,
+    para erros de compilação, ou uma mensagem do corretor (com o código 2), para arquivos inexistentes.
+    '''
+    caminho = os.path.abspath(caminho)
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return 2, f'Arquivo "{nome}" não encontrado.\n'
+    if not compilar:
+        return None
+    versao = (st.st_mtime_ns, st.st_size)
+    with _trava:
+        guardado = _diagnosticos.get(caminho)
+        if guardado is not None and guardado[0] == versao:
+            _diagnosticos.move_to_end(caminho)
+            return guardado[1]
+    try:
+        with open(caminho, 'rb') as arq:
+            compile(arq.read(), caminho, 'exec', dont_inherit=True)
+        resultado = None
+    except OSError:
+        resultado = None  # O interpretador informa o erro ao executar
+    except SyntaxError as e:
+        import traceback  # Só é necessário para scripts com erro
+        resultado = 1, ''.join(traceback.format_exception_only(e))
+    except (ValueError, RecursionError) as e:  # Bytes nulos, aninhamento profundo demais
+        resultado = 1, f'SyntaxError: {e}\n'
+    with _trava:
+        _diagnosticos[caminho] = (versao, resultado)
+        _diagnosticos.move_to_end(caminho)
+        while len(_diagnosticos) > TAMANHO_CACHE:
+            _diagnosticos.popitem(last=False)
+    return resultado
+
+
+def limpar_cache():
+    '''Descarta todas as análises e diagnósticos guardados.'''
+    with _trava:
+        _cache.clear()
+        _diagnosticos.clear()
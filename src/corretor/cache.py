@@ -0,0 +1,182 @@
+'''Cache em disco dos resultados das execuções.
+
+A chave de cada resultado é um hash do conteúdo e do caminho do script, do comando, dos argumentos, da entrada
+(de arquivos de entrada, o conteúdo; veja `entradas`), dos limites de recursos e da versão do interpretador.
+Assim, corrigir de novo um script que não mudou reaproveita a execução anterior e só refaz as verificações.
+'''
+
+import hashlib, json, os, subprocess, sys, threading
+
+from typing import TYPE_CHECKING
+
+from . import rastreio
+from .processo import Execucao
+
+if TYPE_CHECKING:
+    from .modelo import Correcao
+
+# Constantes
+TAMANHO_MAX = 64 * 1024 * 1024  # bytes
+VERSAO_FORMATO = 3  # Mude para invalidar os caches antigos
+
+
+# Funções
+
+def diretorio_padrao() -> str:
+    '''Retorna o diretório padrão do cache: `$CORRETOR_CACHE` ou o diretório de cache do usuário.'''
+    if 'CORRETOR_CACHE' in os.environ:
+        return os.environ['CORRETOR_CACHE']
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.path.join(base, 'corretor')
+
+
+_versoes: dict[str, str] = {}
+_trava_versoes = threading.Lock()
+
+
+def versao_interpretador(comando: str) -> str:
+    '''Retorna o caminho e a versão do interpretador `comando`. O resultado é memorizado por comando.'''
+    with _trava_versoes:
+        if comando not in _versoes:
+            from shutil import which  # Importa o shutil só quando necessário (veja `modelo`)
+            caminho = which(comando) or comando
+            try:
+                processo = subprocess.run([comando, '--version'], capture_output=True,
+                                          text=True, errors='ignore', timeout=5)
+                versao = (processo.stdout + processo.stderr).strip()
+            except (OSError, subprocess.TimeoutExpired):
+                versao = ''
+            _versoes[comando] = f'{caminho}\n{versao}'
+        return _versoes[comando]
+
+
+def _subdiretorio_resultados(nome: str) -> bool:
+    '''Retorna se `nome` é o de um subdiretório de resultados (veja `CacheResultados._caminho`).'''
+    return len(nome) == 2 and all(c in '0123456789abcdef' for c in nome)
+
+
+# Classes
+
+class CacheResultados:
+    '''Cache LRU em disco, limitado por tamanho, dos resultados de `Correcao.executar`.
+
+    Cada resultado fica num arquivo JSON, num subdiretório com os dois primeiros dígitos da chave. O horário de
+    modificação do arquivo marca o último uso, e os arquivos usados há mais tempo são apagados quando o tamanho total
+    passa de `tamanho_max`. Os outros subdiretórios (como os planos de `plano.carregar` e as assinaturas de
+    `similaridade.assinatura`) não contam para o tamanho e nunca são apagados.
+    Pode ser usado por várias threads e por vários processos ao mesmo tempo.
+    '''
+
+    def __init__(self, diretorio: str | None = None, tamanho_max: int = TAMANHO_MAX):
+        '''Construtor.
+
+        Parâmetros:
+        - `diretorio` é onde os resultados são guardados. O padrão é `diretorio_padrao()`.
+        - `tamanho_max` é o tamanho máximo do cache, em bytes.
+        '''
+        self.diretorio: str = diretorio or diretorio_padrao()
+        self.tamanho_max: int = tamanho_max
+        self.acertos: int = 0
+        self.falhas: int = 0
+        self._tamanho: int | None = None  # Calculado na primeira escrita
+        self._trava = threading.Lock()
+
+    @rastreio.medido('cache.chave', 'cache')
+    def chave(self, correcao: 'Correcao') -> str:
+        '''Retorna a chave do resultado de `correcao`.'''
+        h = hashlib.sha256()
+        try:
+            with open(f'{correcao.diretorio}/{correcao.script}', 'rb') as arq:
+                h.update(hashlib.sha256(arq.read()).digest())
+        except OSError:
+            h.update(b'ausente')
+        partes = [VERSAO_FORMATO, correcao.comando, correcao.diretorio, correcao.script, correcao.args, correcao.modo,
+                  correcao.fonte_entrada.chave(), versao_interpretador(correcao.comando),
+                  [correcao.timeout, correcao.limite_saida, correcao.limite_cpu, correcao.limite_memoria]]
+        h.update(json.dumps(partes).encode('utf-8'))
+        return h.hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave[:2], f'{chave}.json')
+
+    @rastreio.medido('cache.obter', 'cache')
+    def obter(self, chave: str) -> Execucao | None:
+        '''Retorna a execução guardada em `chave`, com as medidas de tempo e memória originais, ou None se não houver.'''
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding='utf-8') as arq:
+                dados = json.load(arq)
+            os.utime(caminho)  # Marca como usado recentemente
+        except (OSError, ValueError):
+            with self._trava:
+                self.falhas += 1
+            return None
+        with self._trava:
+            self.acertos += 1
+        return Execucao(dados['codigo'], dados['saida'], dados['erro'], truncada=dados['truncada'],
+                        vereditos=dados.get('vereditos'), resumida=dados.get('resumida', False), **dados['medidas'])
+
+    @rastreio.medido('cache.guardar', 'cache')
+    def guardar(self, chave: str, execucao: Execucao):
+        '''Guarda uma execução em `chave` e, se necessário, apaga os resultados menos usados.'''
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        dados = {'codigo': execucao.codigo, 'saida': execucao.saida, 'erro': execucao.erro,
+                 'truncada': execucao.truncada, 'medidas': execucao.medidas}
+        if execucao.vereditos:  # Só das verificações decididas durante a execução
+            dados.update(vereditos=execucao.vereditos, resumida=execucao.resumida)
+        with open(temporario, 'w', encoding='utf-8') as arq:
+            json.dump(dados, arq)
+        os.replace(temporario, caminho)
+        with self._trava:
+            if self._tamanho is None:
+                self._tamanho = sum(t for _, t, _ in self._arquivos())
+            else:
+                self._tamanho += os.path.getsize(caminho)
+            if self._tamanho > self.tamanho_max:
+                self._despejar()
+
+    def _arquivos(self) -> list[tuple[float, int, str]]:
+        '''Retorna `(mtime, tamanho, caminho)` de cada resultado no cache.'''
+        arquivos = []
+        if not os.path.isdir(self.diretorio):
+            return arquivos
+        for subdiretorio in os.scandir(self.diretorio):
+            if not _subdiretorio_resultados(subdiretorio.name) or not subdiretorio.is_dir():
+                continue
+            for entrada in os.scandir(subdiretorio.path):
+                if entrada.name.endswith('.json'):
+                    try:
+                        st = entrada.stat()
+                    except OSError:
+                        continue  # Apagado por outro processo
+                    arquivos += [(st.st_mtime, st.st_size, entrada.path)]
+        return arquivos
+
+    def _despejar(self):
+        '''Apaga os resultados menos usados até o cache ocupar no máximo 3/4 de `tamanho_max`.'''
+        arquivos = sorted(self._arquivos())
+        self._tamanho = sum(t for _, t, _ in arquivos)
+        alvo = self.tamanho_max * 3 // 4
+        for _, tamanho, caminho in arquivos:
+            if self._tamanho <= alvo:
+                break
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+            self._tamanho -= tamanho
+
+    def limpar(self):
+        '''Apaga todos os resultados do cache.'''
+        with self._trava:
+            for _, _, caminho in self._arquivos():
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+            self._tamanho = 0
@@ -0,0 +1,129 @@
+'''Executa os casos de teste de uma correção de função (veja `modelo.CorrecaoFuncao`) num único processo.
+
+Este arquivo é executado pelo interpretador da correção no lugar do script da resposta (também pelo servidor de fork),
+por isso só usa a biblioteca padrão.
+O script da resposta é importado uma vez como módulo e a função é chamada com os argumentos de cada caso.
+
+Uso:
+    python chamador.py SCRIPT FUNCAO < especificacao.json
+
+A especificação, lida da entrada, é `{"casos": [{"args": [...], "esperado": ...}, ...], "tolerancia": ..., "timeout_caso": ...}`.
+Para cada caso, uma linha `PREFIXO + JSON` é escrita na saída assim que o caso termina, com as chaves
+`passou`, `retorno` (repr do valor retornado), `erro` (exceção ou timeout) e `saida` (o que a função imprimiu).
+O que a resposta imprime não vai para a saída. Erros ao importar o script são escritos na saída de erro, com código 1.
+'''
+
+import sys
+
+# Módulos que o interpretador carrega ao iniciar, antes dos imports do chamador (veja `_esquecer_modulos`)
+MODULOS_INICIAIS = frozenset(sys.modules)
+
+import importlib.util, io, json, math, os, signal, sys, traceback
+
+# Constantes
+PREFIXO = '\x1ecaso '  # Marca as linhas de resultado na saída
+TAMANHO_REPR = 300  # Caracteres do repr do retorno e da saída de cada caso, no máximo
+
+
+class TempoEsgotado(BaseException):
+    '''Lançada quando um caso excede `timeout_caso` (não é capturada por `except Exception` da resposta).'''
+
+
+def _normalizar(valor):
+    '''Converte tuplas em listas, recursivamente, para comparar com os valores esperados lidos do JSON.'''
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _normalizar(v) for k, v in valor.items()}
+    return valor
+
+
+def comparar(retorno, esperado, tolerancia: float = 0) -> bool:
+    '''Compara o retorno com o esperado. Números são iguais se a diferença for no máximo `tolerancia`.'''
+    if isinstance(esperado, (int, float)) and not isinstance(esperado, bool) \
+            and isinstance(retorno, (int, float)) and not isinstance(retorno, bool):
+        return retorno == esperado or math.isclose(retorno, esperado, rel_tol=0, abs_tol=tolerancia)
+    if isinstance(esperado, list) and isinstance(retorno, list):
+        return len(retorno) == len(esperado) and \
+            all(comparar(r, e, tolerancia) for r, e in zip(retorno, esperado))
+    if isinstance(esperado, dict) and isinstance(retorno, dict):
+        return retorno.keys() == esperado.keys() and \
+            all(comparar(retorno[k], e, tolerancia) for k, e in esperado.items())
+    return retorno == esperado
+
+
+def _cortar(texto: str) -> str:
+    return texto if len(texto) <= TAMANHO_REPR else texto[:TAMANHO_REPR] + '...'
+
+
+def _esquecer_modulos():
+    '''Remove de `sys.modules` os módulos importados pelo chamador, menos os embutidos no interpretador.
+
+    Assim, a resposta importa seus próprios módulos (um `random.py`, por exemplo) como se fosse executada diretamente,
+    aqui e no servidor de fork (que faz o mesmo com os seus).
+    '''
+    for nome in list(sys.modules):
+        if nome not in MODULOS_INICIAIS and nome not in sys.builtin_module_names:
+            del sys.modules[nome]
+
+
+def _alarme(*_):
+    raise TempoEsgotado()
+
+
+def main():
+    script, nome_funcao = sys.argv[1], sys.argv[2]
+    especificacao = json.load(sys.stdin)
+    saida = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    # A resposta não lê a especificação nem escreve na saída real
+    sys.stdin = io.StringIO('')
+    sys.stdout = capturada = io.StringIO()
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    sys.argv = [script]
+    _esquecer_modulos()
+
+    nome_modulo = os.path.splitext(os.path.basename(script))[0]
+    spec = importlib.util.spec_from_file_location(nome_modulo, script)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nome_modulo] = modulo
+    try:
+        spec.loader.exec_module(modulo)
+    except BaseException:
+        traceback.print_exc()
+        sys.exit(1)
+    funcao = getattr(modulo, nome_funcao, None)
+    if not callable(funcao):
+        print(f'A função "{nome_funcao}" não foi definida em "{os.path.basename(script)}".', file=sys.stderr)
+        sys.exit(1)
+
+    tolerancia = especificacao.get('tolerancia') or 0
+    timeout_caso = especificacao.get('timeout_caso')
+    try:
+        signal.signal(signal.SIGALRM, _alarme)
+    except (AttributeError, ValueError):  # Sem SIGALRM (Windows): vale só o timeout da correção
+        timeout_caso = None
+    for caso in especificacao['casos']:
+        capturada.seek(0)
+        capturada.truncate()
+        resultado = {'passou': False, 'retorno': None, 'erro': None}
+        try:
+            if timeout_caso:
+                signal.setitimer(signal.ITIMER_REAL, timeout_caso)
+            try:
+                retorno = funcao(*caso.get('args', []))
+            finally:
+                if timeout_caso:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            resultado['retorno'] = _cortar(repr(retorno))
+            resultado['passou'] = comparar(_normalizar(retorno), caso['esperado'], tolerancia)
+        except TempoEsgotado:
+            resultado['erro'] = f'Tempo esgotado ({timeout_caso:g}s).'
+        except Exception as e:
+            resultado['erro'] = _cortar(''.join(traceback.format_exception_only(e)).strip())
+        resultado['saida'] = _cortar(capturada.getvalue())
+        saida.write(PREFIXO + json.dumps(resultado, ensure_ascii=False) + '\n')
+        saida.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+'''Comparação incremental da saída de um script com um arquivo de referência.
+
+A saída é recebida em trechos, à medida que é produzida, e comparada linha a linha com o arquivo,
+que é mapeado em memória (`mmap`) e lido uma linha por vez: nem a saída nem a referência precisam estar inteiras na memória.
+A comparação para na primeira divergência, que é informada com a linha e a coluna.
+
+Espaços no fim das linhas e linhas em branco no fim da saída e do arquivo são ignorados.
+Com tolerância, as linhas são comparadas palavra a palavra, e palavras numéricas podem diferir até a tolerância.
+'''
+
+import math, mmap, os
+
+# Constantes
+TAMANHO_TRECHO = 64 * 1024  # Caracteres comparados por vez ao comparar uma saída já capturada
+TAMANHO_EXIBIDO = 40  # Caracteres exibidos de cada lado na mensagem de divergência
+
+
+# Classes
+
+class Divergencia:
+    '''A primeira diferença entre a saída e a referência.'''
+
+    def __init__(self, linha: int, coluna: int, esperado: str | None, obtido: str | None):
+        '''Construtor.
+
+        Parâmetros:
+        - `linha` e `coluna` são a posição da diferença na saída, a partir de 1.
+        - `esperado` é o trecho da referência a partir da diferença, ou None se a referência acabou antes.
+        - `obtido` é o trecho da saída a partir da diferença, ou None se a saída acabou antes.
+        '''
+        self.linha: int = linha
+        self.coluna: int = coluna
+        self.esperado: str | None = esperado
+        self.obtido: str | None = obtido
+
+    def __str__(self) -> str:
+        if self.esperado is None:
+            return f'Linha {self.linha}: a saída tem linhas a mais que o esperado ({_cortar(self.obtido)!r}).'
+        if self.obtido is None:
+            return f'Linha {self.linha}: a saída terminou antes do esperado (faltou {_cortar(self.esperado)!r}).'
+        return (f'Linha {self.linha}, coluna {self.coluna}: esperado {_cortar(self.esperado)!r}, '
+                f'obtido {_cortar(self.obtido)!r}.')
+
+
+class ComparadorArquivo:
+    '''Compara uma saída, recebida em trechos, com um arquivo de referência.
+
+    Uso: `alimentar` com cada trecho e, no fim da saída, `concluir`. Depois da primeira divergência,
+    os trechos seguintes são ignorados.
+    '''
+
+    def __init__(self, caminho: str, tolerancia: float | None = None):
+        '''Construtor.
+
+        Parâmetros:
+        - `caminho` é o arquivo de referência, em UTF-8.
+        - `tolerancia` é a diferença máxima entre números. Se None, as linhas devem ser iguais.
+
+        Lança `OSError` se o arquivo não puder ser aberto.
+        '''
+        self.tolerancia: float | None = tolerancia
+        self.divergencia: Divergencia | None = None
+        self._linha = 0  # Linhas da saída já comparadas
+        self._resto = ''  # Linha da saída ainda incompleta
+        self._posicao = 0
+        with open(caminho, 'rb') as arq:
+            tamanho = os.fstat(arq.fileno()).st_size
+            self._referencia = mmap.mmap(arq.fileno(), 0, access=mmap.ACCESS_READ) if tamanho else b''
+
+    def fechar(self):
+        '''Libera o mapeamento do arquivo.'''
+        if isinstance(self._referencia, mmap.mmap):
+            self._referencia.close()
+        self._referencia = b''
+
+    def alimentar(self, trecho: str) -> bool:
+        '''Compara mais um trecho da saída. Retorna True se já há uma divergência.'''
+        if self.divergencia is not None:
+            return True
+        inicio = 0
+        pular = True
+        while True:
+            if pular and not self._resto:
+                inicio = self._pular_iguais(trecho, inicio)
+                pular = False
+            if (fim := trecho.find('\n', inicio)) == -1:
+                break
+            self._comparar_linha(self._resto + trecho[inicio:fim])
+            self._resto = ''
+            inicio = fim + 1
+            if self.divergencia is not None:
+                self.fechar()
+                return True
+        self._resto += trecho[inicio:]
+        return False
+
+    def _pular_iguais(self, trecho: str, inicio: int) -> int:
+        '''Se as linhas completas de `trecho`, a partir de `inicio`, são idênticas, byte a byte, às próximas linhas
+        da referência, avança sobre elas de uma vez, sem compará-las uma a uma.
+
+        Retorno:
+        Onde a comparação linha a linha deve continuar.
+        '''
+        fim = trecho.rfind('\n', inicio) + 1
+        if fim <= inicio:
+            return inicio
+        bloco = trecho[inicio:fim].encode('utf-8')
+        if self._referencia[self._posicao:self._posicao + len(bloco)] != bloco:
+            return inicio
+        self._posicao += len(bloco)
+        self._linha += bloco.count(b'\n')
+        return fim
+
+    def concluir(self) -> Divergencia | None:
+        '''Indica o fim da saída e retorna a primeira divergência, ou None se a saída é igual à referência.'''
+        if self.divergencia is None and self._resto:
+            self._comparar_linha(self._resto)
+            self._resto = ''
+        if self.divergencia is None:
+            # O que sobrou da referência só pode ter linhas em branco
+            while (esperada := self._proxima_referencia()) is not None:
+                if esperada.strip():
+                    self.divergencia = Divergencia(self._linha + 1, 1, esperada, None)
+                    break
+        self.fechar()
+        return self.divergencia
+
+    def _proxima_referencia(self) -> str | None:
+        '''Retorna a próxima linha da referência, sem a quebra de linha, ou None se ela acabou.'''
+        if self._posicao >= len(self._referencia):
+            return None
+        fim = self._referencia.find(b'\n', self._posicao)
+        if fim == -1:
+            fim = len(self._referencia)
+        linha = self._referencia[self._posicao:fim].decode('utf-8', errors='replace')
+        self._posicao = fim + 1
+        return linha
+
+    def _comparar_linha(self, obtida: str):
+        self._linha += 1
+        obtida = obtida.rstrip()
+        esperada = self._proxima_referencia()
+        if esperada is None:
+            if obtida:  # Linhas em branco a mais no fim são aceitas
+                self.divergencia = Divergencia(self._linha, 1, None, obtida)
+            return
+        diferenca = self._diferenca(esperada.rstrip(), obtida)
+        if diferenca is not None:
+            col_esperada, col_obtida = diferenca
+            self.divergencia = Divergencia(self._linha, col_obtida + 1, esperada.rstrip()[col_esperada:],
+                                           obtida[col_obtida:])
+
+    def _diferenca(self, esperada: str, obtida: str) -> tuple[int, int] | None:
+        '''Retorna os índices, na linha esperada e na obtida, da primeira diferença, ou None se as linhas são iguais.'''
+        if esperada == obtida:
+            return None
+        if self.tolerancia is None:
+            coluna = 0
+            for e, o in zip(esperada, obtida):
+                if e != o:
+                    break
+                coluna += 1
+            return coluna, coluna
+        col_esperada = col_obtida = 0
+        palavras_esperadas = esperada.split()
+        palavras_obtidas = obtida.split()
+        for i in range(max(len(palavras_esperadas), len(palavras_obtidas))):
+            if i >= len(palavras_esperadas):
+                return len(esperada), obtida.index(palavras_obtidas[i], col_obtida)
+            col_esperada = esperada.index(palavras_esperadas[i], col_esperada)
+            if i >= len(palavras_obtidas):
+                return col_esperada, len(obtida)
+            col_obtida = obtida.index(palavras_obtidas[i], col_obtida)
+            if not _palavras_iguais(palavras_esperadas[i], palavras_obtidas[i], self.tolerancia):
+                return col_esperada, col_obtida
+            col_esperada += len(palavras_esperadas[i])
+            col_obtida += len(palavras_obtidas[i])
+        return None
+
+
+# Funções
+
+def _palavras_iguais(esperada: str, obtida: str, tolerancia: float) -> bool:
+    if esperada == obtida:
+        return True
+    try:
+        x, y = float(esperada), float(obtida)
+    except ValueError:
+        return False
+    return math.isclose(x, y, rel_tol=0, abs_tol=tolerancia)
+
+
+def _cortar(texto: str) -> str:
+    return texto if len(texto) <= TAMANHO_EXIBIDO else texto[:TAMANHO_EXIBIDO] + '...'
+
+
+def comparar(saida: str, caminho: str, tolerancia: float | None = None, completa: bool = True) -> Divergencia | None:
+    '''Compara uma saída já capturada com o arquivo de referência, em trechos, e retorna a primeira divergência.
+
+    Parâmetros:
+    - `saida` é a saída do script.
+    - `caminho` e `tolerancia` são os de `ComparadorArquivo`.
+    - `completa` indica se a saída terminou. Se False (por exemplo, um script interrompido), só divergências
+      no conteúdo são informadas, e não a falta de linhas.
+
+    Lança `OSError` se o arquivo não puder ser aberto.
+    '''
+    comparador = ComparadorArquivo(caminho, tolerancia)
+    for inicio in range(0, len(saida), TAMANHO_TRECHO):
+        if comparador.alimentar(saida[inicio:inicio + TAMANHO_TRECHO]):
+            break
+    if not completa:
+        comparador.fechar()
+        return comparador.divergencia
+    return comparador.concluir()
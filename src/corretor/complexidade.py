@@ -0,0 +1,108 @@
+'''Estimativa empírica da complexidade de tempo de um script a partir de medidas de tempo de CPU.
+
+Do tempo medido em cada tamanho `n` é descontado o tempo de iniciar o script (a `base`, medida com uma entrada
+mínima), e o que sobra cresce como `c·f(n)`. O expoente desse crescimento é a inclinação da reta ajustada
+aos pontos `(log n, log tempo)`. Cada modelo de crescimento (veja `MODELOS`) tem o seu expoente nos mesmos tamanhos
+(0 para `1`, 1 para `n`, um pouco mais para `n log n`, 2 para `n^2`...), e o modelo escolhido é o de expoente mais
+próximo do medido: o limite entre dois modelos fica no meio dos seus expoentes, sem favorecer nenhum lado.
+O erro da inclinação diminui à medida que os tamanhos se afastam, então tamanhos mais afastados dão estimativas
+mais confiáveis (distinguir `n` de `n log n`, cujos expoentes são próximos, exige tamanhos bem afastados).
+
+Na reta, cada ponto pesa conforme a fração do seu tempo que sobra depois de descontar a base: nos tamanhos pequenos,
+a base domina e o ruído das medidas pesa mais. Tempos que sobram abaixo de `MINIMO` são só ruído e ficam fora
+da reta; se a variação entre as medidas for menor que `RESOLUCAO`, o modelo escolhido é o constante.
+'''
+
+import math
+
+from collections.abc import Callable
+
+# Constantes
+# Modelos de crescimento, da menor ordem para a maior
+MODELOS: dict[str, Callable[[int], float]] = {
+    '1': lambda n: 1.0,
+    'log n': lambda n: math.log2(max(n, 2)),
+    'n': lambda n: float(n),
+    'n log n': lambda n: n * math.log2(max(n, 2)),
+    'n^2': lambda n: float(n) ** 2,
+    'n^3': lambda n: float(n) ** 3,
+}
+ORDEM = {modelo: i for i, modelo in enumerate(MODELOS)}
+RESOLUCAO = 0.02  # segundos: variações menores entre as medidas são consideradas ruído
+MINIMO = 0.005  # segundos: tempos, já sem a base, abaixo dos quais a medida é só ruído
+LARGURA_GRAFICO = 40  # Caracteres da maior barra do gráfico
+
+
+# Classes
+
+class Ajuste:
+    '''O ajuste de um modelo de crescimento às medidas.'''
+
+    def __init__(self, modelo: str, constante: float, coeficiente: float, expoente: float | None = None):
+        '''Construtor.
+
+        Parâmetros:
+        - `modelo` é a chave do modelo em `MODELOS`.
+        - `constante` e `coeficiente` são `a` e `c` em `tempo = a + c·f(n)`.
+        - `expoente` é o expoente medido do crescimento do tempo, ou None se o tempo não cresceu.
+        '''
+        self.modelo: str = modelo
+        self.constante: float = constante
+        self.coeficiente: float = coeficiente
+        self.expoente: float | None = expoente
+
+    def prever(self, n: int) -> float:
+        '''Retorna o tempo previsto para o tamanho `n`.'''
+        return self.constante + self.coeficiente * MODELOS[self.modelo](n)
+
+
+# Funções
+
+def _inclinacao(xs: list[float], ys: list[float], pesos: list[float]) -> float:
+    '''Retorna a inclinação da reta ajustada aos pontos `(x, y)` por mínimos quadrados ponderados.'''
+    total = sum(pesos)
+    media_x = sum(p * x for p, x in zip(pesos, xs)) / total
+    media_y = sum(p * y for p, y in zip(pesos, ys)) / total
+    variancia = sum(p * (x - media_x) ** 2 for p, x in zip(pesos, xs))
+    return sum(p * (x - media_x) * (y - media_y) for p, x, y in zip(pesos, xs, ys)) / variancia
+
+
+def ajustar(medidas: list[tuple[int, float]], base: float = 0.0) -> Ajuste:
+    '''Retorna o ajuste do modelo de crescimento escolhido para as medidas `(n, tempo)` (veja a descrição do módulo).
+
+    Parâmetros:
+    - `medidas` são os tempos de CPU de cada tamanho `n`, com pelo menos dois tamanhos diferentes.
+    - `base` é o tempo de iniciar o script, descontado de cada medida.
+    '''
+    liquidas = [(n, t - base, t) for n, t in medidas]
+    validas = [(n, liquido, t) for n, liquido, t in liquidas if liquido >= MINIMO]
+    sobras = [liquido for _, liquido, _ in liquidas]
+    if max(sobras) - min(sobras) < RESOLUCAO or len({n for n, _, _ in validas}) < 2:
+        return Ajuste('1', base + max(0.0, sum(sobras) / len(sobras)), 0.0)
+    logs_n = [math.log(n) for n, _, _ in validas]
+    pesos = [(liquido / t) ** 2 for _, liquido, t in validas]
+    expoente = _inclinacao(logs_n, [math.log(liquido) for _, liquido, _ in validas], pesos)
+    esperados = {modelo: _inclinacao(logs_n, [math.log(f(n)) for n, _, _ in validas], pesos)
+                 for modelo, f in MODELOS.items() if modelo != '1'}
+    esperados['1'] = 0.0
+    modelo = min(MODELOS, key=lambda m: abs(esperados[m] - expoente))
+    # c é a média geométrica ponderada de tempo / f(n)
+    f = MODELOS[modelo]
+    log_c = sum(p * (math.log(liquido) - math.log(f(n))) for p, (n, liquido, _) in zip(pesos, validas)) / sum(pesos)
+    return Ajuste(modelo, base, math.exp(log_c), expoente)
+
+
+def dentro_do_limite(ajuste: Ajuste, limite: str) -> bool:
+    '''Retorna se o modelo do ajuste não cresce mais rápido que o modelo `limite`.'''
+    return ORDEM[ajuste.modelo] <= ORDEM[limite]
+
+
+def grafico(medidas: list[tuple[int, float]], ajuste: Ajuste) -> str:
+    '''Retorna uma tabela com as medidas, o tempo previsto pelo ajuste e uma barra proporcional a cada tempo.'''
+    maximo = max(t for _, t in medidas) or 1
+    largura_n = max(len(str(n)) for n, _ in medidas)
+    linhas = [f'{"n".rjust(largura_n)}   tempo de CPU   O({ajuste.modelo})']
+    for n, t in medidas:
+        barra = '█' * max(1, round(LARGURA_GRAFICO * t / maximo))
+        linhas += [f'{str(n).rjust(largura_n)}   {t:11.4f}s   {ajuste.prever(n):9.4f}s   {barra}']
+    return '\n'.join(linhas) + '\n'
@@ -1,248 +1,96 @@
-import ast, json, os, platform, subprocess, tkinter as tk
+'''A interface gráfica do corretor, sobre o modelo (veja `modelo`).
+
+Os nomes do modelo continuam disponíveis aqui, mas quem não precisa da interface deve importá-los de `modelo`,
+que não importa o Tk.
+'''
+
+import argparse, os, platform, tkinter as tk
 
 from tkinter import ttk
+from tkinter.filedialog import asksaveasfilename
 from tkinter.messagebox import showerror
 
-# MODELO
+from . import rastreio
+from .cache import CacheResultados
+from .erros import ErroConfiguracao
+from .execucao import Executor
+from .modelo import (MODOS, TIMEOUT, TIMEOUT_CASO, TIPOS_CORRECAO, Atividade, Correcao, CorrecaoComplexidade,
+                     CorrecaoFuncao, GrupoExecucao, Placar, Questao, agrupar_execucoes, criar_correcao)
+from .vigia import Vigia
 
 # Constantes
-TIMEOUT = 5
 SISTEMA = platform.system().lower()
 TEMA = 'clam'
+PREVIA_INICIO = 40  # Linhas do início de um resultado exibidas na prévia
+PREVIA_FIM = 10  # Linhas do fim de um resultado exibidas na prévia
+LINHAS_PAGINA = 200  # Linhas carregadas de cada vez ao pedir mais do resultado
+LIMITE_CARACTERES_PAGINA = 20_000  # Caracteres de cada parte, no máximo, para linhas muito longas
+
 
 # Classes
 
-class Questao:
-    '''Uma questão para corrigir.'''
+class Paginador:
+    '''Divide um texto possivelmente enorme (a saída de um script) para exibição aos poucos:
+    uma prévia com as primeiras e as últimas linhas, e páginas do meio carregadas sob demanda.
+    Só as partes pedidas são copiadas; o texto nunca é dividido inteiro em linhas.'''
 
-    def __init__(self, descricao: str, pontos: int, correcoes: list['Correcao']):
+    def __init__(self, texto: str, linhas_inicio: int = PREVIA_INICIO, linhas_fim: int = PREVIA_FIM,
+                 limite_caracteres: int = LIMITE_CARACTERES_PAGINA):
         '''Construtor.
 
         Parâmetros:
-        - `descricao` é uma descrição da questão.
-        - `pontos` são os pontos (nota) da questão.
-        - `correcoes` são os argumentos e verificações da saída do script para corrigir a questão.
-        '''
-        self.descricao = descricao
-        self.correcoes = correcoes
-        self.pontos = pontos
-    
-    @classmethod
-    def ler_config(cls, config: dict) -> 'Questao':
-        '''Cria uma instância a partir do dict obtido da leitura do arquivo de configuração.
-        
-        Parâmetros:
-        - `config`  são as configurações de uma questão (um elemento da lista "questoes").
-        '''
-        # Chaves obrigatórias, que devem estar definidas na questão
-        desc = config['descricao']
-        pontos = config['pontos']
-        # Lista de correções
-        correcoes: list[Correcao] = []
-        for config_correcao in config['correcoes']:
-            # Adiciona valores padrão à correção que vieram da questão
-            aux = config_correcao
-            config_correcao = config.copy()
-            # Valores definidos na questão prevalecem
-            config_correcao.update(aux)
-            c = Correcao.ler_config(config_correcao)
-            correcoes += [c]
-        q = cls(desc, pontos, correcoes)
-        return q
-
-
-class Correcao:
-    '''Uma correção de uma questão.'''
-
-    def __init__(self, comando: str, diretorio: str, script: str, 
-                 msg_erro: str,
-                 verificacoes: list = [],
-                 entrada: str = '', args: str = '', **_):
-        '''Construtor.
-        
-        Parâmetros:
-        - `comando` é o comando do terminal para executar o script da resposta.
-        - `diretorio` é o diretório base, onde fica o arquivo de configuração. O caminho para o `script` é relativo a ele.
-        - `script` é o script da resposta.
-        - `msg_erro` mensagem de erro amigável ao usuário.
-        - `verificacoes` é uma lista de dicionários {"func_expect" : ..., "args_expect" : ...}, onde:
-            - `func_expect` é a função que verifica a saída do script.
-            - `args_expect` são os argumentos da função que verifica a saída do script.
-        - `entrada` é a entrada do teclado.
-        - `args` são os argumentos da linha de comando.
-        '''
-        self.comando: str = comando
-        self.diretorio: str = diretorio
-        self.script: str = script
-        self.msg_erro: str = msg_erro
-        self.verificacoes: list[dict] = verificacoes
-        self.entrada: str = entrada
-        self.args: str = args
-
-    @classmethod
-    def ler_config(cls, config: dict) -> 'Correcao':
-        '''Cria uma instância a partir do dict obtido da leitura do arquivo config.json.
-        
-        Parâmetros:
-        - `config` são as configurações de uma correção (um elemento da lista "correcoes").
-          A chave `"verificacoes"` é uma lista de dicionários `{"func_expect" : ..., "args_expect" : ...}`.
-          Além dela, há a chave `"mais_verificacoes"`, de mesmo tipo.
-          É obrigatório definir `"verificacoes"` na definição da correção ou em algum ancestral (para definir verificações comuns a várias correções).
-          Porém, caso se queira adicionar verificações a uma correção que herda correções comuns definidas em algum ancestral, pode-se usar a chave `"mais_verificacoes"` na definição dela.
-          As chaves `"func_expect"` e `"args_expect"` podem ser definidas para preencher valores faltando em `"verificacoes"` e `"mais_verificacoes"`.
-
-        Retorno:
-        O objeto `Correcao`.
+        - `texto` é o texto completo.
+        - `linhas_inicio` e `linhas_fim` são o número de linhas do início e do fim exibidas na prévia.
+        - `limite_caracteres` é o tamanho máximo de cada parte, para textos com linhas muito longas.
         '''
-        # Cria ou acessa as verificações
-        verificacoes = config['verificacoes']
-        # Adiciona mais verificações
-        verificacoes += config.get('mais_verificacoes', [])
-        # Preenche valores faltando
-        for chave in ['func_expect', 'args_expect']:
-            for v in verificacoes:
-                valor = config.get(chave, None)
-                if valor:
-                    v.setdefault(chave, valor)
-            # Retira do config pra não passar para a Correcao
-            config.pop(chave, None)
-        correcao = cls(**config)
-        return correcao
+        self.texto: str = texto
+        self.limite_caracteres: int = limite_caracteres
+        # O trecho ainda não exibido é texto[_meio:_fim]
+        self._meio: int = self._avancar(0, linhas_inicio, len(texto))
+        self._fim: int = max(self._recuar(len(texto), linhas_fim), self._meio)
+        self.inicio: str = texto[:self._meio]
+        self.fim: str = texto[self._fim:]
 
     @property
-    def comando_completo_str(self) -> str:
-        '''Retorna uma str concatenando o `comando_completo_list`.'''
-        comando_list = self.comando_completo_list
-        return ' '.join(comando_list)
+    def caracteres_omitidos(self) -> int:
+        '''O número de caracteres ainda não exibidos.'''
+        return self._fim - self._meio
 
     @property
-    def comando_completo_list(self) -> list:
-        '''Retorna como list o comando para executar o script, incluindo o comando do terminal, script e argumentos.'''
-        c = [self.comando, f'{self.diretorio}/{self.script}']
-        if self.args:
-            c += [self.args]
-        return c
-
-    def corrigir(self) -> tuple[bool, int, str, str]:
-        '''Executa a correção.
-
-        Retorno:
-        - um booleano indicando se passou no teste ou não.
-        - o código de saída da execução do script.
-        - a saída do script.
-        - o erro, se houver, seja do script (arquivo não existe, erro de sintaxe, etc.) ou da resposta (saída diferente da esperada).
-        '''
-        codigo = -1
-        resposta = 'Não executado\n'
-        erro = 'Não executado\n'
-        try:
-            processo = subprocess.run(
-                self.comando_completo_list,
-                capture_output=True,
-                input=self.entrada,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                timeout=TIMEOUT)
-            codigo = processo.returncode
-            resposta = processo.stdout
-            erro = processo.stderr
-        except subprocess.TimeoutExpired as e:
-            codigo = 1
-            resposta = e.stdout if e.stdout else '\n'
-            erro = f'Timeout de {TIMEOUT}s expirado.'
-        # Verificação do resultado
-        if codigo != 0:  # Veio com código de erro
-            return False, codigo, resposta, erro
-        # Código de sucesso, corrige a resposta
-        for v in self.verificacoes:
-            func_expect = v['func_expect']
-            args_expect = v['args_expect']
-            passou = eval(func_expect)(resposta, args_expect)
-            if not passou:
-                return False, codigo, resposta, self.msg_erro
-        # Passou na correção
-        return True, codigo, resposta, erro
-
-
-class Atividade:
-    '''Uma atividade, com questões para corrigir.'''
-
-    def __init__(self, titulo: str, questoes: list[Questao]):
-        self.titulo: str = titulo
-        self.questoes: list[Questao] = questoes
-    
-    @classmethod
-    def ler_config(cls, config: dict) -> 'Atividade':
-        '''Lê um dicionário de configuração recursivamente.
+    def linhas_omitidas(self) -> int:
+        '''O número de linhas (quebras de linha) ainda não exibidas.'''
+        return self.texto.count('\n', self._meio, self._fim)
+
+    def proxima_pagina(self, linhas: int = LINHAS_PAGINA) -> str:
+        '''Retorna as próximas `linhas` linhas não exibidas, logo após as já exibidas do início.'''
+        fim = self._avancar(self._meio, linhas, self._fim)
+        pagina = self.texto[self._meio:fim]
+        self._meio = fim
+        return pagina
+
+    def _avancar(self, posicao: int, linhas: int, limite: int) -> int:
+        '''Retorna a posição após `linhas` quebras de linha a partir de `posicao`, sem passar de `limite`
+        nem de `limite_caracteres` caracteres.'''
+        limite = min(limite, posicao + self.limite_caracteres)
+        for _ in range(linhas):
+            quebra = self.texto.find('\n', posicao, limite)
+            if quebra < 0:
+                return limite
+            posicao = quebra + 1
+        return posicao
+
+    def _recuar(self, posicao: int, linhas: int) -> int:
+        '''Retorna o início das últimas `linhas` linhas antes de `posicao`, sem recuar mais de `limite_caracteres`.'''
+        limite = max(posicao - self.limite_caracteres, 0)
+        if posicao > 0 and self.texto[posicao - 1] == '\n':  # A quebra final não inicia uma linha
+            posicao -= 1
+        for _ in range(linhas):
+            quebra = self.texto.rfind('\n', limite, posicao)
+            if quebra < 0:
+                return limite
+            posicao = quebra
+        return posicao + 1
 
-        Parâmetros:
-        - `config` é o dicionário lido do arquivo de configuração.
-        '''
-        titulo = config['titulo']
-        questoes: list[Questao] = []
-        for config_questao in config['questoes']:
-            # Adiciona valores padrão à questão que vieram da atividade
-            aux = config_questao
-            config_questao = config.copy()
-            # Valores definidos na questão prevalecem
-            config_questao.update(aux)
-            questoes += [Questao.ler_config(config_questao)]
-        return cls(titulo, questoes)
-
-    @classmethod 
-    def ler_arquivo_config(cls, caminho: str):
-        '''Lê um arquivo de configuração recursivamente.
-        Atualiza todos os nomes de scripts para caminhos absolutos tendo como base o diretório do arquivo de configuração.
-
-        Parâmetros:
-        - `caminho` é o caminho para o arquivo de configuração.
-        '''
-        # Lê o arquivo de configuração
-        arq_config = open(caminho, encoding='utf-8')
-        config = json.load(arq_config)
-        arq_config.close()
-        # Adiciona o diretório do arquivo de configuração ao config
-        diretorio = os.path.dirname(os.path.abspath(caminho))
-        config['diretorio'] = diretorio
-        return cls.ler_config(config)
-
-
-# Funções de correcao
-
-def testar_regex(resultado: str, regex: str) -> bool:
-    '''Verifica se `regex` casa em `resultado`.'''
-    import re
-    resultado = resultado.strip("\n\r\t ")
-    padrao = re.compile(regex)
-    if padrao.search(resultado) is None:
-        return False
-    return True
-
-def testar_nao_regex(resultado: str, regex: str) -> bool:
-    '''Verifica se `regex` não casa em `resultado`.'''
-    return not testar_regex(resultado, regex)
-
-def testar_param_sem_tipo(_, caminho_script: str) -> bool:
-    '''Verifica se o script tem alguma função com parâmetros não tipados`.
-    '''
-    f = open(caminho_script)
-    arvore = ast.parse(f.read())
-    f.close()
-    funcoes = _buscar_funcoes(arvore)
-    for func in funcoes:
-        for arg in func.args.args:
-            if arg.annotation is None:
-                return False
-    return True
-
-def _buscar_funcoes(arvore: ast.AST) -> list[ast.AST]:
-    funcs = []
-    if type(arvore).__name__ == 'FunctionDef':
-        funcs += [arvore]
-    for subarvore in ast.iter_child_nodes(arvore):
-        funcs += _buscar_funcoes(subarvore)
-    return funcs
 
 # INTERFACE GRÁFICA
 
@@ -251,6 +99,10 @@ PADDING = 5
 LARGURA_WIDGET_QUESTAO = 694
 LARGURA_TEXT_WIDGET = 80
 DIMENSOES_JANELA = "1024x600"
+INTERVALO_RESULTADOS = 50  # ms entre as leituras da fila de resultados do executor
+INTERVALO_VIGIA = 100  # ms entre as leituras da fila de mudanças do vigia, no modo ao vivo
+INTERVALO_REDIMENSIONAR = 30  # ms sem mudanças de tamanho antes de recalcular a área de rolagem
+LOTE_CORRECOES = 10  # Widgets de correções montados de cada vez ao expandir uma questão
 
 # Classes
 
@@ -264,23 +116,29 @@ class ScrolledText(tk.Text):
 
         kw.update({'yscrollcommand': self.vbar.set})
         tk.Text.__init__(self, self.frame, **kw)
-        self.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tk.Pack.pack(self, side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.vbar['command'] = self.yview
 
-        # Copy geometry methods of self.frame without overriding Text
-        # methods -- hack!
-        text_meths = vars(tk.Text).keys()
-        methods = vars(tk.Pack).keys() | vars(tk.Grid).keys() | vars(tk.Place).keys()
-        methods = methods.difference(text_meths)
-
-        for m in methods:
-            if m[0] != '_' and m != 'config' and m != 'configure':
-                setattr(self, m, getattr(self.frame, m))
-
     def __str__(self):
         return str(self.frame)
 
 
+def _delegar_ao_frame(nome: str):
+    '''Cria um método de `ScrolledText` que chama o método `nome` do frame que o contém.'''
+    def metodo(self, *args, **kwargs):
+        return getattr(self.frame, nome)(*args, **kwargs)
+    metodo.__name__ = nome
+    return metodo
+
+
+# Os métodos de geometria (pack, grid, place) se aplicam ao frame, sem sobrescrever os métodos do Text.
+# Definidos uma única vez na classe, em vez de copiados para cada instância.
+for _nome in (vars(tk.Pack).keys() | vars(tk.Grid).keys() | vars(tk.Place).keys()) - vars(tk.Text).keys():
+    if _nome[0] != '_' and _nome not in ('config', 'configure'):
+        setattr(ScrolledText, _nome, _delegar_ao_frame(_nome))
+del _nome
+
+
 class ScrolledFrame(ttk.Frame):
     '''Frame com scrollbar.
     *ATENÇÃO:* para colocar widgets dentro deste, passe o `.conteudo` deste como `parent` do widget filho.'''
@@ -311,6 +169,7 @@ class ScrolledFrame(ttk.Frame):
         self.canvas = canvas
         self.conteudo = conteudo
         self.parent = parent
+        self._redimensionamento: str | None = None  # Recalculo agendado
 
     
     def _on_mousewheel_windows(self, event):
@@ -328,9 +187,15 @@ class ScrolledFrame(ttk.Frame):
         self.canvas.yview_scroll(1, "units")
     
     def _on_resize(self, event):
-        '''Redimensiona o `canvas`.'''
-        # Atualiza os widgets para pegar o tamanho atual
-        self.conteudo.update()
+        '''Agenda o redimensionamento do `canvas`.
+        Várias mudanças de tamanho seguidas (ao montar ou atualizar muitos widgets) causam um único recálculo.'''
+        if self._redimensionamento is not None:
+            self.after_cancel(self._redimensionamento)
+        self._redimensionamento = self.after(INTERVALO_REDIMENSIONAR, self._redimensionar)
+
+    def _redimensionar(self):
+        '''Redimensiona o `canvas` para o tamanho atual do conteúdo.'''
+        self._redimensionamento = None
         # bbox é uma tupla (x, y, largura, altura) que engloba todo o conteúdo do canvas
         bbox = self.canvas.bbox('all')
         # Existe algum problema que ela pega além do tamanho do que é visível,
@@ -346,9 +211,14 @@ class ScrolledFrame(ttk.Frame):
 class Corretor():
     '''Janela principal do corretor.'''
 
-    def __init__(self, caminho_config: str):
+    def __init__(self, caminho_config: str, workers: int | None = None,
+                 cache: CacheResultados | None = None, vigiar: bool = False):
         '''Construtor.
-        `caminho_config` é o caminho para o arquivo json de configuração da correção.'''
+        Parâmetros:
+        - `caminho_config` é o caminho para o arquivo json de configuração da correção.
+        - `workers` é o número de correções executadas ao mesmo tempo. O padrão é o número de processadores.
+        - `cache` é o cache de resultados. Se omitido, os scripts são sempre executados.
+        - `vigiar` inicia no modo ao vivo: as correções são refeitas quando os scripts são salvos.'''
         super().__init__()
         # Tk lança erros em vez de exibir no terminal
         tk.Tk.report_callback_exception = \
@@ -360,6 +230,20 @@ class Corretor():
             janela.state('zoomed')
 
         self.janela = janela
+        janela.protocol('WM_DELETE_WINDOW', self._fechar)
+
+        # Execução das correções em segundo plano
+        self.executor = Executor(workers, cache)
+        self.em_execucao: set[Correcao] = set()
+        self._lendo_resultados = False
+        # Widgets de questões com a contagem desatualizada, redesenhados juntos quando o Tk estiver ocioso
+        self._desatualizados: set[QuestaoWidget] = set()
+        self._atualizacao_agendada = False
+        # Processos poupados por correções que executam o script da mesma forma
+        self.execucoes_evitadas = 0
+        # Modo ao vivo: vigia dos scripts e correções a refazer quando a execução atual terminar
+        self.vigia: Vigia | None = None
+        self._reexecutar: set[Correcao] = set()
 
         # Tema e estilos
         style = ttk.Style()
@@ -382,7 +266,15 @@ class Corretor():
             showerror("Erro", 'Arquivo de configuração' + \
                       f' "{caminho_config}" não encontrado.')
             exit()
-        self.atividade = Atividade.ler_arquivo_config(caminho_config)
+        try:
+            self.atividade = Atividade.ler_arquivo_config(
+                caminho_config, diretorio_cache=cache.diretorio if cache else None)
+            self.placar = Placar(self.atividade)
+        except ErroConfiguracao as e:
+            janela.title(f"Corretor Automático")
+            janela.geometry(DIMENSOES_JANELA)
+            showerror("Erro", f'Erro no arquivo de configuração "{caminho_config}":\n{e}')
+            exit()
 
         # Configura a janela
         janela.title(f"Corretor Automático - {self.atividade.titulo}")
@@ -401,6 +293,9 @@ class Corretor():
             style='Fundo.TFrame')
         self.frame_questoes.pack(fill=tk.BOTH)
         self._montar_questoes()
+        if vigiar:
+            self.ao_vivo.set(True)
+            self._alternar_vigia()
 
     def _montar_frame_topo(self):
         '''Monta o frame do topo da tela.'''
@@ -410,32 +305,148 @@ class Corretor():
             command=self._corrigir_todas, padding=PADDING*3)
         self.botao_corrigir_todas.pack(padx=PADDING*4, pady=(PADDING*4, 0))
         self.label_corretas = ttk.Label(frame_topo)
-        self.label_corretas.pack(pady = (0, PADDING*4))
+        self.label_corretas.pack(pady = (0, PADDING*2))
+        self.ao_vivo = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_topo, text='Corrigir ao salvar', variable=self.ao_vivo,
+            command=self._alternar_vigia).pack(pady = (0, PADDING*2))
 
     def _montar_questoes(self):
-        '''Monta os widgets das questões.'''
+        '''Monta os widgets das questões (recolhidas, sem os widgets das correções).'''
         self.widgets_questoes: list[QuestaoWidget] = []
+        # Widget da questão de cada correção, para exibir os resultados
+        self._widget_questao: dict[Correcao, QuestaoWidget] = {}
         for questao in self.atividade.questoes:
             qw = QuestaoWidget(self.frame_questoes.conteudo, self, questao)
             qw.pack(pady=PADDING*2)
             self.widgets_questoes += [qw]
+            for correcao in questao.correcoes:
+                self._widget_questao[correcao] = qw
 
     def _corrigir_todas(self):
-        '''Testa todas as questões.'''
-        for qw in self.widgets_questoes:
-            qw._corrigir_questao()
-
+        '''Testa todas as questões ou, se já há correções executando, cancela-as.'''
+        if self.em_execucao:
+            self._cancelar()
+            return
+        correcoes = []
+        for questao in self.atividade.questoes:
+            correcoes += questao.correcoes
+        self.executar(correcoes)
+
+    def executar(self, correcoes: list[Correcao]):
+        '''Agenda a execução de `correcoes` no executor.
+        Correções que executam o script da mesma forma o executam uma só vez (veja `agrupar_execucoes`).
+        Os resultados são guardados nas correções e exibidos à medida que ficam prontos.'''
+        novas = [c for c in dict.fromkeys(correcoes) if c not in self.em_execucao]
+        grupos = agrupar_execucoes(novas)
+        for correcao in novas:
+            self.em_execucao.add(correcao)
+            self._widget_questao[correcao].marcar_executando(correcao)
+        for grupo in grupos:
+            self.executor.submeter_grupo(grupo)
+        if len(novas) > len(grupos):
+            self.execucoes_evitadas += len(novas) - len(grupos)
+            self.agendar_atualizacao(None)
+        if self.em_execucao:
+            self.botao_corrigir_todas.configure(text='Cancelar')
+        if not self._lendo_resultados:
+            self._lendo_resultados = True
+            self.janela.after(INTERVALO_RESULTADOS, self._ler_resultados)
+
+    def _ler_resultados(self):
+        '''Exibe os resultados prontos e reagenda a leitura enquanto houver correções em execução.'''
+        fila = self.executor.resultados
+        while not fila.empty():
+            correcao, resultado = fila.get()
+            if correcao not in self.em_execucao:
+                continue  # Cancelada
+            self.em_execucao.discard(correcao)
+            if correcao in self._reexecutar:
+                # O script mudou durante a execução: o resultado está velho
+                self._reexecutar.discard(correcao)
+                self.executar([correcao])
+                continue
+            self.placar.registrar(correcao, resultado)
+            qw = self._widget_questao[correcao]
+            qw.exibir_resultado(correcao)
+            self.agendar_atualizacao(qw)
+        if self.em_execucao:
+            self.janela.after(INTERVALO_RESULTADOS, self._ler_resultados)
+        else:
+            self._lendo_resultados = False
+            self.botao_corrigir_todas.configure(text='Corrigir Todas')
+
+    def _cancelar(self):
+        '''Cancela as correções em execução.'''
+        self.executor.cancelar()
+        for correcao in self.em_execucao:
+            self._widget_questao[correcao].marcar_cancelada(correcao)
+        self.em_execucao.clear()
+        self._reexecutar.clear()
+        self.botao_corrigir_todas.configure(text='Corrigir Todas')
+
+    def _alternar_vigia(self):
+        '''Liga ou desliga o modo ao vivo, conforme a caixa "Corrigir ao salvar".'''
+        if self.ao_vivo.get() and self.vigia is None:
+            # Correções de cada script vigiado
+            self._correcoes_script: dict[str, list[Correcao]] = {}
+            for questao in self.atividade.questoes:
+                for correcao in questao.correcoes:
+                    caminho = os.path.abspath(os.path.join(correcao.diretorio, correcao.script))
+                    self._correcoes_script.setdefault(caminho, []).append(correcao)
+            self.vigia = Vigia(self._correcoes_script)
+            self.vigia.iniciar()
+            self._leitura_mudancas = self.janela.after(INTERVALO_VIGIA, self._ler_mudancas)
+        elif not self.ao_vivo.get() and self.vigia is not None:
+            self.janela.after_cancel(self._leitura_mudancas)
+            self.vigia.parar()
+            self.vigia = None
+
+    def _ler_mudancas(self):
+        '''Refaz as correções dos scripts que mudaram e reagenda a leitura enquanto o modo ao vivo estiver ligado.'''
+        correcoes = []
+        while not self.vigia.mudancas.empty():
+            for caminho in self.vigia.mudancas.get():
+                correcoes += self._correcoes_script[caminho]
+        if correcoes:
+            # Não acumula processos: as correções em execução são refeitas quando a execução atual terminar
+            self._reexecutar.update(c for c in correcoes if c in self.em_execucao)
+            self.executar(correcoes)
+        self._leitura_mudancas = self.janela.after(INTERVALO_VIGIA, self._ler_mudancas)
+
+    def _fechar(self):
+        '''Encerra o executor e o vigia e fecha a janela.'''
+        if self.vigia is not None:
+            self.vigia.parar()
+        self.executor.encerrar()
+        self.janela.destroy()
+
+    def agendar_atualizacao(self, widget_questao: 'QuestaoWidget | None'):
+        '''Marca a contagem de `widget_questao` (ou só a do placar geral, se None) como desatualizada e agenda
+        uma única atualização para quando o Tk estiver ocioso, junto com as de outros resultados que chegarem até lá.'''
+        if widget_questao is not None:
+            self._desatualizados.add(widget_questao)
+        if not self._atualizacao_agendada:
+            self._atualizacao_agendada = True
+            self.janela.after_idle(self._atualizar_desatualizados)
+
+    def _atualizar_desatualizados(self):
+        '''Atualiza os widgets das questões desatualizadas e o placar geral.'''
+        self._atualizacao_agendada = False
+        desatualizados, self._desatualizados = self._desatualizados, set()
+        for qw in desatualizados:
+            qw.atualizar()
+        self.atualizar()
+
+    @rastreio.medido('Corretor.atualizar', 'interface')
     def atualizar(self):
-        '''Atualiza este widget.'''
-        contador_corretas = 0
-        nota = 0
-        for qw in self.widgets_questoes:
-            if qw.correta:
-                contador_corretas += 1
-                nota += qw.questao.pontos
-        total = len(self.widgets_questoes)
+        '''Atualiza este widget com a contagem do placar.'''
+        contador_corretas = self.placar.questoes_corretas
+        nota = self.placar.nota
+        total = len(self.atividade.questoes)
         texto_resultado = f'Corretas: {contador_corretas} de {total}' + \
-            f' ({nota} pts)'
+            f' ({nota:g} pts)'
+        if self.execucoes_evitadas:
+            texto_resultado += f'\nExecuções repetidas evitadas: {self.execucoes_evitadas}'
         self.label_corretas.configure(text=texto_resultado)
         if contador_corretas == total:
             self.botao_corrigir_todas.configure(style='Verde.TButton')
@@ -443,13 +454,12 @@ class Corretor():
             self.botao_corrigir_todas.configure(style='Vermelho.TButton')
         else:
             self.botao_corrigir_todas.configure(style='Amarelo.TButton')
-        # Redesenha a interface
-        self.janela.update()
-        self.janela.update_idletasks()
 
 
 class QuestaoWidget(ttk.Frame):
-    '''Widget de Questões.'''
+    '''Widget de Questões.
+    Começa recolhido: os widgets das correções só são montados quando a questão é expandida pela primeira vez.
+    Os resultados obtidos enquanto isso ficam guardados nas correções (`Correcao.resultado`) e são exibidos ao expandir.'''
     contador_corretas: int = 0
 
     def __init__(self, parent, janela_corretor: Corretor, questao: Questao):
@@ -462,23 +472,29 @@ class QuestaoWidget(ttk.Frame):
         self.janela_corretor = janela_corretor
         self.frame_questoes: ScrolledFrame = parent
         self.questao: Questao = questao
-        self.widgets_correcoes: list[CorrecaoWidget] = []
+        # Widgets das correções já montadas
+        self.widgets_correcoes: dict[Correcao, CorrecaoWidget] = {}
+        self.expandida = False
         # Personalização
         self.configure(borderwidth=2, relief=tk.GROOVE)
         # Montagem
         self._montar_primeira_linha()
-        self._montar_correcoes()
-    
+        self.frame_correcoes = ttk.Frame(self)
+        self._montadas = 0  # Número de correções com widget montado
+
     def _montar_primeira_linha(self):
         '''Monta a primeira linha deste widget, que contém a descrição da questão, o botão para corrigir e o label do resultado.'''
         frame1 = ttk.Frame(self)
         frame1.grid(columnspan=2, sticky='news')
+        self.botao_expandir = ttk.Button(frame1, text='▸', width=2, command=self._alternar)
+        self.botao_expandir.pack(side=tk.LEFT, anchor='n', padx=(PADDING*3, 0), pady=(PADDING*3, 0))
         desc = self.questao.descricao
         if self.questao.pontos >= 0:
             desc += f' ({self.questao.pontos} pts)'
-        self.label_decricao = ttk.Label(frame1, text=desc, style='H1.TLabel')
+        self.label_decricao = ttk.Label(frame1, text=desc, style='H1.TLabel', cursor='hand2')
         self.label_decricao.pack(side=tk.LEFT, fill='x', expand=True, anchor='n',
-            padx=(PADDING*3, 0), pady=(PADDING*3, 0))
+            padx=(PADDING*2, 0), pady=(PADDING*3, 0))
+        self.label_decricao.bind('<Button-1>', lambda _: self._alternar())
         
         frame2 = ttk.Frame(frame1)
         frame2.pack(side=tk.RIGHT)
@@ -490,89 +506,193 @@ class QuestaoWidget(ttk.Frame):
         self.label_resultado.pack(side=tk.BOTTOM, anchor='e',
             padx=(0, PADDING*3), pady=(0, PADDING))
 
+    def _alternar(self):
+        '''Expande ou recolhe a lista de correções, montando os widgets na primeira vez.'''
+        self.expandida = not self.expandida
+        if self.expandida:
+            self.frame_correcoes.grid(row=1, columnspan=2, sticky='news')
+            self.botao_expandir.configure(text='▾')
+            if self._montadas == 0:
+                self._montar_correcoes()
+        else:
+            self.frame_correcoes.grid_remove()
+            self.botao_expandir.configure(text='▸')
+
     def _montar_correcoes(self):
-        '''Monta o widget de cada correção.'''
-        for i, p in enumerate(self.questao.correcoes):
-            tw = CorrecaoWidget(self, p)
-            tw.grid(padx=PADDING*3, pady=(0, PADDING*3), row=i+1)
-            self.widgets_correcoes += [tw]
-    
+        '''Monta os widgets de um lote de correções e agenda o próximo lote,
+        para que a interface continue respondendo enquanto uma questão com muitas correções é montada.'''
+        correcoes = self.questao.correcoes
+        fim = min(self._montadas + LOTE_CORRECOES, len(correcoes))
+        for i in range(self._montadas, fim):
+            correcao = correcoes[i]
+            cw = CorrecaoWidget(self.frame_correcoes, self, correcao)
+            cw.grid(padx=PADDING*3, pady=(0, PADDING*3), row=i)
+            self.widgets_correcoes[correcao] = cw
+            if correcao in self.janela_corretor.em_execucao:
+                cw._marcar_executando()
+            elif correcao.resultado is not None:
+                cw.exibir()
+        self._montadas = fim
+        if fim < len(correcoes):
+            self.after(1, self._montar_correcoes)
+
+    def marcar_executando(self, correcao: Correcao):
+        '''Indica que `correcao` está em execução, se o seu widget já foi montado.'''
+        cw = self.widgets_correcoes.get(correcao)
+        if cw is not None:
+            cw._marcar_executando()
+
+    def marcar_cancelada(self, correcao: Correcao):
+        '''Restaura o widget de `correcao`, se já montado, após o cancelamento.'''
+        cw = self.widgets_correcoes.get(correcao)
+        if cw is not None:
+            cw._marcar_cancelada()
+
+    def exibir_resultado(self, correcao: Correcao):
+        '''Exibe o resultado guardado em `correcao` no widget dela, se já montado.
+        A contagem é atualizada depois (veja `Corretor.agendar_atualizacao`).'''
+        cw = self.widgets_correcoes.get(correcao)
+        if cw is not None:
+            cw.exibir()
+
     def _corrigir_questao(self):
         '''Executa todas as correcoes da questão.'''
-        for tw in self.widgets_correcoes:
-            tw._corrigir()
+        self.janela_corretor.executar(self.questao.correcoes)
     
+    @rastreio.medido('QuestaoWidget.atualizar', 'interface')
     def atualizar(self):
-        '''Atualiza este widget.'''
-        self.contador_corretas = 0
-        for c in self.widgets_correcoes:
-            if c.resultado == 'Correta':
-                self.contador_corretas += 1
-        texto_corretas = f'Corretas: {self.contador_corretas} de {len(self.widgets_correcoes)}'
-        if self.contador_corretas == len(self.widgets_correcoes):
+        '''Atualiza este widget com a contagem do placar.'''
+        self.contador_corretas = self.janela_corretor.placar.corretas(self.questao)
+        total = len(self.questao.correcoes)
+        texto_corretas = f'Corretas: {self.contador_corretas} de {total}'
+        if self.contador_corretas == total:
             texto_corretas += f' (+{self.questao.pontos} pts)'
         self.label_resultado.configure(text=f'{texto_corretas}')
         estilo = 'TButton'
-        if self.contador_corretas == len(self.widgets_correcoes):
+        if self.contador_corretas == total:
             estilo = 'Verde.' + estilo
         elif self.contador_corretas == 0:
             estilo = 'Vermelho.' + estilo
         else:
             estilo = 'Amarelo.' + estilo
         self.botao_corrigir.configure(style=estilo)
-        self.janela_corretor.atualizar()
     
     @property
     def correta(self) -> bool:
         '''Retorna True se todas as correções estão corretas e False, caso contrário.'''
-        return self.contador_corretas == len(self.widgets_correcoes)
+        return self.contador_corretas == len(self.questao.correcoes)
 
 
 class CorrecaoWidget(ttk.Frame):
     '''Widget da Correcao.'''
-    resultado = 'Não executada'
 
-    def __init__(self, parent, correcao: Correcao):
+    def __init__(self, parent, widget_questao: QuestaoWidget, correcao: Correcao):
         '''Construtor.
         Parâmetros:
         - `parent` é o widget pai que conterá este.
+        - `widget_questao` é o widget da questão desta correção.
         - `correcao` é a correcao correspondente.'''
         super().__init__(parent)
-        self.widget_questao: QuestaoWidget = parent
+        self.widget_questao: QuestaoWidget = widget_questao
         self.correcao: Correcao = correcao
+        # O resultado exibido: o widget de texto guarda só a prévia e as páginas pedidas
+        self.paginador: Paginador | None = None
         
         # Montagem
         self._montar_primeira_linha()
         self._montar_entrada()
         self._montar_resultado()
 
+    @property
+    def resultado(self) -> str:
+        '''O resultado da correção, como exibido: "Correta", "Incorreta" ou "Não executada".'''
+        if self.correcao.resultado is None:
+            return 'Não executada'
+        return 'Correta' if self.correcao.resultado[0] else 'Incorreta'
+
     def _corrigir(self):
-        '''Executa a correcao e atualiza a interface com o resultado.'''
-        correta, codigo, saida, erro = self.correcao.corrigir()
+        '''Agenda a execução da correcao. O resultado é exibido quando ficar pronto.'''
+        self.widget_questao.janela_corretor.executar([self.correcao])
+
+    def _marcar_executando(self):
+        '''Indica na interface que a correção está em execução.'''
+        self.label_resultado.configure(text='Executando...')
+
+    def _marcar_cancelada(self):
+        '''Restaura a interface após o cancelamento da correção.'''
+        self.label_resultado.configure(text=self._texto_resultado())
+
+    def _texto_resultado(self) -> str:
+        '''Retorna o texto do label do resultado, com o tempo e a memória da execução, se medidos.'''
+        texto = self.resultado
+        execucao = self.correcao.ultima_execucao
+        if self.correcao.resultado is not None and execucao is not None and execucao.tempo is not None:
+            texto += f' ({execucao.tempo:.2f}s'
+            if execucao.memoria:
+                texto += f', {execucao.memoria / (1024 * 1024):.0f} MB'
+            texto += ')'
+        return texto
+
+    @rastreio.medido('CorrecaoWidget.exibir', 'interface')
+    def exibir(self):
+        '''Exibe o resultado guardado na correção (`Correcao.resultado`).'''
+        correta, codigo, saida, erro = self.correcao.resultado
         # Atualiza a interface
         text = self.text_resultado
         res = ''  # Guarda todo o do resultado da correção
         if saida:
-            saida = saida  # Remove a linha extra que sempre vem
             res += f'Saída:\n{saida}'
         if erro:
             # Adiciona quebra de linha antes do erro
             if len(res) > 0 and not res.endswith('\n'):
                 res += '\n'
             res += f'Erro ({codigo}):\n{erro}'
+        # Só a prévia (início e fim) é inserida; o meio é carregado sob demanda
+        self.paginador = paginador = Paginador(res)
         text.configure(state=tk.NORMAL)  # Habilita a caixa de texto para edição
         text.delete(0.0, 'end')  # Limpa o texto
-        text.insert('end', res)  # Insere o resultado
-        altura = min(self._calcular_altura(res), 20)  # Ajusta a altura
+        text.insert('end', paginador.inicio)
+        if paginador.caracteres_omitidos:
+            # As páginas são inseridas antes do aviso de omissão (o texto com a tag "omissao")
+            text.insert('end', self._texto_omissao(), 'omissao')
+            self.frame_paginas.grid()
+        else:
+            self.frame_paginas.grid_remove()
+        text.insert('end', paginador.fim)
+        altura = min(self._calcular_altura(paginador.inicio + paginador.fim), 20)  # Ajusta a altura
         text.configure(height=altura,
                        state=tk.DISABLED)  # Desabilita a edição
-        if correta:
-            self.resultado = 'Correta'
+        self.label_resultado.configure(text=self._texto_resultado())
+
+    def _texto_omissao(self) -> str:
+        '''Retorna o aviso do trecho do resultado ainda não exibido.'''
+        p = self.paginador
+        return f'\n[... {p.linhas_omitidas} linhas ({p.caracteres_omitidos} caracteres) omitidas ...]\n\n'
+
+    def _mostrar_mais(self):
+        '''Insere a próxima página do resultado antes do aviso de omissão.'''
+        text = self.text_resultado
+        text.configure(state=tk.NORMAL)
+        text.insert('omissao.first', self.paginador.proxima_pagina())
+        indice = text.index('omissao.first')
+        text.delete('omissao.first', 'omissao.last')
+        if self.paginador.caracteres_omitidos:
+            text.insert(indice, self._texto_omissao(), 'omissao')
         else:
-            self.resultado = 'Incorreta'
-        self.label_resultado.configure(text=self.resultado)
-        # Atualiza o widget da questão
-        self.widget_questao.atualizar()
+            self.frame_paginas.grid_remove()
+        text.configure(state=tk.DISABLED)
+
+    def _salvar(self):
+        '''Grava o resultado completo num arquivo escolhido pelo usuário.'''
+        caminho = asksaveasfilename(parent=self, title='Salvar resultado', defaultextension='.txt',
+                                    initialfile=f'{os.path.splitext(self.correcao.script)[0]}.txt')
+        if not caminho:
+            return
+        try:
+            with open(caminho, 'w', encoding='utf-8') as arq:
+                arq.write(self.paginador.texto)
+        except OSError as e:
+            showerror('Erro', f'Não foi possível salvar "{caminho}":\n{e}')
     
     def _montar_primeira_linha(self):
         label = ttk.Label(self, text=f'Comando', style='H2.TLabel')
@@ -591,8 +711,8 @@ class CorrecaoWidget(ttk.Frame):
         text_entrada.grid(column=0, row=row, sticky='w', columnspan=2,
             pady=(0, PADDING))
         text_entrada.delete(0.0, 'end')  # Limpa o texto
-        if self.correcao.entrada:
-            entrada: str = self.correcao.entrada
+        entrada: str = self.correcao.descricao_entrada
+        if entrada:
             text_entrada.insert('end', entrada)  # Insere a entrada
             # Ajusta a altura
             altura = self._calcular_altura(entrada)
@@ -620,10 +740,39 @@ class CorrecaoWidget(ttk.Frame):
                                     width=LARGURA_TEXT_WIDGET, height=1, state=tk.DISABLED)
         self.text_resultado.grid(column=0, row=row, sticky='w', columnspan=2,
             pady=(0, PADDING))
+        self.text_resultado.tag_configure('omissao', foreground='#777')
+        # Botões exibidos só quando o resultado não cabe na prévia
+        row += 1
+        self.frame_paginas = ttk.Frame(self)
+        self.frame_paginas.grid(column=0, row=row, sticky='w', columnspan=2, pady=(0, PADDING))
+        ttk.Button(self.frame_paginas, text='Mostrar mais', command=self._mostrar_mais).pack(side=tk.LEFT)
+        ttk.Button(self.frame_paginas, text='Salvar resultado completo...',
+                   command=self._salvar).pack(side=tk.LEFT, padx=PADDING)
+        self.frame_paginas.grid_remove()
 
 
 # PROGRAMA PRINCIPAL
 
-if __name__ == '__main__':
-    app = Corretor('config.json')
+def main(argv: list[str] | None = None):
+    '''Abre a janela do corretor.'''
+    parser = argparse.ArgumentParser(description='Corretor automático de questões de programação.')
+    parser.add_argument('config', nargs='?', default='config.json',
+                        help='arquivo de configuração da atividade (padrão: config.json)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='número de correções executadas ao mesmo tempo (padrão: número de processadores)')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='sempre executa os scripts, sem reaproveitar resultados anteriores')
+    parser.add_argument('--vigiar', action='store_true',
+                        help='modo ao vivo: refaz as correções de um script sempre que ele é salvo')
+    parser.add_argument('--rastreio', metavar='ARQUIVO', default=None,
+                        help='grava a duração de cada fase da correção em ARQUIVO (formato Chrome Trace) '
+                             f'e exibe um resumo ao sair (o mesmo que ${rastreio.VARIAVEL_AMBIENTE})')
+    args = parser.parse_args(argv)
+    rastreio.configurar(args.rastreio)
+    cache = None if args.sem_cache else CacheResultados()
+    app = Corretor(args.config, workers=args.workers, cache=cache, vigiar=args.vigiar)
     app.janela.mainloop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,575 @@
+'''Correção distribuída entre várias máquinas.
+
+Um coordenador envia grupos de correções (veja `modelo.GrupoExecucao`) a trabalhadores por TCP e recebe os resultados.
+Os trabalhadores corrigem com o mesmo caminho de execução da correção local (`GrupoExecucao.corrigir`, com cache).
+Os scripts vão junto com as correções, então os trabalhadores não precisam ter acesso aos arquivos
+(junto com cada script vão os módulos locais que ele importa, os arquivos de dados do seu diretório
+e o arquivo citado nos seus argumentos);
+cada arquivo é enviado a cada trabalhador uma única vez, identificado pelo hash do seu conteúdo.
+Cada trabalhador recebe até `capacidade` grupos ao mesmo tempo, e um grupo que estava com um trabalhador que caiu
+é reenviado a outro (até `TENTATIVAS` vezes).
+
+Coordenador e trabalhadores compartilham um segredo (`--segredo` ou `$CORRETOR_SEGREDO`): um trabalhador só
+aceita grupos de um coordenador que prove conhecê-lo, e só executa os scripts com os interpretadores permitidos
+(`--interpretador`; padrão: `python` e `python3`). Mesmo assim, quem conhece o segredo pode executar qualquer código
+nos trabalhadores: por padrão eles só atendem na própria máquina (use `--host` para atender na rede).
+
+Protocolo: mensagens JSON, cada uma precedida do seu tamanho em 4 bytes (big-endian).
+- trabalhador → coordenador, ao conectar: `{"tipo": "ola", "desafio": texto aleatório}`
+- coordenador → trabalhador: `{"tipo": "autenticacao", "prova": HMAC-SHA256 do desafio com o segredo}`
+- trabalhador → coordenador: `{"tipo": "aceito", "capacidade": n}`, ou fecha a conexão se a prova estiver errada
+- coordenador → trabalhador: `{"tipo": "grupo", "id": n, "correcoes": [...], "arquivos": {nome: hash},
+  "conteudos": {hash: base64}}`, com em `conteudos` só os arquivos ainda não enviados a esse trabalhador
+- trabalhador → coordenador: `{"tipo": "resultado", "id": n, "resultados": [[passou, codigo, saida, erro, medidas], ...]}`
+  ou `{"tipo": "erro", "id": n, "erro": mensagem}`
+
+Uso (em cada máquina trabalhadora):
+    python -m src.corretor.distribuido [--host HOST] [--porta PORTA] [-j WORKERS] [--sem-cache] [--diretorio DIR]
+        [--segredo SEGREDO] [--interpretador COMANDO ...]
+Para corrigir uma turma com os trabalhadores, use a opção `--trabalhadores` de `lote`.
+'''
+
+import argparse, base64, hashlib, hmac, json, os, queue, secrets, shutil, socket, struct, tempfile, threading
+
+from collections.abc import Iterable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from . import analise, plano
+from .cache import CacheResultados
+from .modelo import Correcao, GrupoExecucao, TIPOS_CORRECAO
+from .erros import ErroDistribuido
+from .execucao import WORKERS
+from .processo import Execucao
+
+# Constantes
+PORTA = 7571
+TENTATIVAS = 3  # Envios de um grupo antes de desistir, quando os trabalhadores que o recebem caem
+TIMEOUT_CONEXAO = 10  # segundos para conectar a um trabalhador e receber a saudação
+INTERVALO = 0.05  # segundos entre as verificações de novos grupos e do encerramento
+TAMANHO_MAX_MENSAGEM = 1 << 30
+_TAMANHO = struct.Struct('>I')
+VARIAVEL_SEGREDO = 'CORRETOR_SEGREDO'
+TAMANHO_MAX_DADOS = 1 << 20  # Bytes de um arquivo de dados do diretório do script enviado junto com ele, no máximo
+INTERPRETADORES = ('python', 'python3')  # Comandos que os trabalhadores executam, se outros não forem permitidos
+# Campos de uma correção enviados aos trabalhadores (o diretório é o dos arquivos enviados)
+CAMPOS = tuple(c for c in plano.CAMPOS_CORRECAO if c != 'diretorio')
+
+
+# Funções
+
+def ler_endereco(texto: str) -> tuple[str, int]:
+    '''Converte `"host:porta"` (ou só `"host"`, com a porta padrão) numa tupla `(host, porta)`.'''
+    host, _, porta = texto.rpartition(':')
+    if not host:
+        return porta, PORTA
+    return host, int(porta)
+
+
+def obter_segredo(segredo: str | None = None) -> str:
+    '''Retorna o segredo compartilhado entre o coordenador e os trabalhadores: `segredo` ou, se omitido,
+    o valor de `$CORRETOR_SEGREDO`.
+
+    Lança `ErroDistribuido` se nenhum dos dois estiver definido.
+    '''
+    segredo = segredo or os.environ.get(VARIAVEL_SEGREDO)
+    if not segredo:
+        raise ErroDistribuido(f'Defina o segredo compartilhado com os trabalhadores (--segredo ou ${VARIAVEL_SEGREDO}).')
+    return segredo
+
+
+def _prova(segredo: str, desafio: str) -> str:
+    '''Retorna a prova de que se conhece `segredo`, para o `desafio` enviado pelo trabalhador.'''
+    return hmac.new(segredo.encode('utf-8'), desafio.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def _arquivos(correcao: Correcao) -> dict[str, str]:
+    '''Retorna os arquivos usados por `correcao`, por nome relativo ao diretório da correção: o script, o arquivo
+    de entrada, o arquivo citado nos argumentos do script, os arquivos citados nos argumentos das verificações
+    (como os scripts das verificações estáticas), os módulos locais importados por esses scripts e os arquivos de dados
+    (os que não são scripts, até `TAMANHO_MAX_DADOS` bytes) do diretório do script.'''
+    nomes = {correcao.script}
+    if correcao.entrada_arquivo:
+        nomes.add(correcao.entrada_arquivo)
+    if correcao.args:
+        nomes.add(correcao.args)
+    pilha: list[Any] = [v['args_expect'] for v in correcao.verificacoes]
+    while pilha:
+        valor = pilha.pop()
+        if isinstance(valor, str):
+            nomes.add(valor)
+        elif isinstance(valor, Mapping):
+            pilha.extend(valor.values())
+        elif isinstance(valor, (list, tuple)):
+            pilha.extend(valor)
+    arquivos = {nome: caminho for nome in nomes
+                if _nome_seguro(nome) and os.path.isfile(caminho := os.path.join(correcao.diretorio, nome))}
+    # Os imports são procurados no diretório do script, como faz o interpretador
+    base = os.path.join(correcao.diretorio, os.path.dirname(correcao.script))
+    try:
+        for entrada in os.scandir(base):
+            if not entrada.name.endswith('.py') and not entrada.name.startswith('.') \
+                    and entrada.is_file() and entrada.stat().st_size <= TAMANHO_MAX_DADOS:
+                arquivos.setdefault(os.path.relpath(entrada.path, correcao.diretorio), entrada.path)
+    except OSError:
+        pass
+    scripts = [nome for nome in arquivos if nome.endswith('.py')]
+    while scripts:
+        try:
+            imports = analise.analisar(arquivos[scripts.pop()]).imports
+        except (OSError, SyntaxError):
+            continue
+        for modulo in imports:
+            for caminho in _modulos_locais(base, modulo):
+                nome = os.path.relpath(caminho, correcao.diretorio)
+                if nome not in arquivos and _nome_seguro(nome):
+                    arquivos[nome] = caminho
+                    scripts += [nome]
+    return arquivos
+
+
+def _modulos_locais(base: str, modulo: str) -> list[str]:
+    '''Retorna os caminhos dos arquivos em `base` que o import de `modulo` (ex.: `"pacote.modulo"`) carrega.
+    Um pacote importado vai inteiro, já que `from pacote import modulo` não cita o submódulo no nome importado.'''
+    caminhos = []
+    diretorio = base
+    partes = modulo.split('.')
+    for i, parte in enumerate(partes):
+        arquivo = os.path.join(diretorio, parte + '.py')
+        if os.path.isfile(arquivo):
+            return caminhos + [arquivo]
+        diretorio = os.path.join(diretorio, parte)
+        if not os.path.isdir(diretorio):
+            return caminhos
+        if i < len(partes) - 1:
+            if os.path.isfile(inicial := os.path.join(diretorio, '__init__.py')):
+                caminhos += [inicial]
+    for raiz, _, nomes in os.walk(diretorio):
+        caminhos += [os.path.join(raiz, n) for n in sorted(nomes) if n.endswith('.py')]
+    return caminhos
+
+
+def _nome_seguro(nome: str) -> bool:
+    '''Retorna se `nome` é um caminho relativo que não sai do diretório da correção.'''
+    normalizado = os.path.normpath(nome)
+    return not os.path.isabs(normalizado) and normalizado.split(os.sep)[0] != '..' and '\n' not in nome
+
+
+# Classes
+
+class _Conexao:
+    '''Envia e recebe as mensagens do protocolo por um socket.'''
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._buffer = bytearray()
+        self._trava_envio = threading.Lock()
+
+    def enviar(self, mensagem: dict):
+        '''Envia `mensagem`. Pode ser chamado por várias threads.'''
+        dados = json.dumps(mensagem, ensure_ascii=False).encode('utf-8')
+        with self._trava_envio:
+            self.sock.sendall(_TAMANHO.pack(len(dados)) + dados)
+
+    def receber(self, timeout: float | None = None) -> dict | None:
+        '''Recebe a próxima mensagem, ou None se ela não chegar inteira em `timeout` segundos
+        (a parte recebida fica guardada para a próxima chamada).
+
+        Lança `ConnectionError` se a conexão for fechada.
+        '''
+        self.sock.settimeout(timeout)
+        while True:
+            if len(self._buffer) >= _TAMANHO.size:
+                tamanho, = _TAMANHO.unpack_from(self._buffer)
+                if tamanho > TAMANHO_MAX_MENSAGEM:
+                    raise ConnectionError(f'Mensagem grande demais ({tamanho} bytes).')
+                fim = _TAMANHO.size + tamanho
+                if len(self._buffer) >= fim:
+                    dados = bytes(self._buffer[_TAMANHO.size:fim])
+                    del self._buffer[:fim]
+                    return json.loads(dados)
+            try:
+                parte = self.sock.recv(1 << 16)
+            except socket.timeout:
+                return None
+            if not parte:
+                raise ConnectionError('Conexão fechada.')
+            self._buffer += parte
+
+    def fechar(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class _Tarefa:
+    '''Um grupo de correções submetido ao coordenador.'''
+
+    def __init__(self, grupo: GrupoExecucao):
+        self.id: int = -1  # Definido pelo coordenador
+        self.grupo: GrupoExecucao = grupo
+        self.futuro: Future = Future()
+        self.tentativas: int = 0
+        self.correcoes: list[dict] = [
+            {**{c: getattr(correcao, c) for c in CAMPOS if hasattr(correcao, c)},
+             'verificacoes': [plano._descongelar(v) for v in correcao.verificacoes]}
+            for correcao in grupo.correcoes]
+        # Arquivos, por nome, e seus conteúdos, por hash
+        self.arquivos: dict[str, str] = {}
+        self.conteudos: dict[str, bytes] = {}
+        for correcao in grupo.correcoes:
+            for nome, caminho in _arquivos(correcao).items():
+                with open(caminho, 'rb') as arq:
+                    conteudo = arq.read()
+                digest = hashlib.sha256(conteudo).hexdigest()
+                self.arquivos[nome] = digest
+                self.conteudos[digest] = conteudo
+
+    def mensagem(self, enviados: set[str]) -> dict:
+        '''Retorna a mensagem do grupo para um trabalhador que já recebeu os arquivos com hash em `enviados`.'''
+        return {'tipo': 'grupo', 'id': self.id, 'correcoes': self.correcoes, 'arquivos': self.arquivos,
+                'conteudos': {d: base64.b64encode(c).decode('ascii')
+                              for d, c in self.conteudos.items() if d not in enviados}}
+
+    def concluir(self, resposta: dict):
+        '''Conclui o futuro com a resposta do trabalhador, guardando as execuções nas correções.'''
+        if self.futuro.done():
+            return
+        if resposta['tipo'] == 'erro':
+            self.futuro.set_exception(ErroDistribuido(resposta['erro']))
+            return
+        resultados = []
+        for correcao, (passou, codigo, saida, erro, medidas) in zip(self.grupo.correcoes,
+                                                                     resposta['resultados']):
+            correcao.ultima_execucao = Execucao(codigo, saida, erro, **medidas)
+            resultados += [(passou, codigo, saida, erro)]
+        self.futuro.set_result(resultados)
+
+
+class Coordenador:
+    '''Distribui grupos de correções entre trabalhadores (veja `Trabalhador`) e reúne os resultados.
+
+    Como o `Executor`, recebe trabalho com `submeter` e devolve futuros; o resultado de cada futuro é o mesmo de
+    `GrupoExecucao.corrigir`, e as execuções ficam em `Correcao.ultima_execucao`.
+    '''
+
+    def __init__(self, enderecos: list[tuple[str, int]], tentativas: int = TENTATIVAS, segredo: str | None = None):
+        '''Construtor. Conecta-se aos trabalhadores.
+
+        Parâmetros:
+        - `enderecos` são os endereços `(host, porta)` dos trabalhadores.
+        - `tentativas` é o número de vezes que um grupo é enviado, se os trabalhadores que o recebem caírem.
+        - `segredo` é o segredo compartilhado com os trabalhadores. O padrão é o valor de `$CORRETOR_SEGREDO`.
+
+        Lança `ErroDistribuido` se o segredo não estiver definido ou se não conseguir se conectar a nenhum trabalhador.
+        '''
+        segredo = obter_segredo(segredo)
+        self.tentativas: int = tentativas
+        self._fila: queue.SimpleQueue[_Tarefa] = queue.SimpleQueue()
+        self._trava = threading.Lock()
+        self._proximo_id = 0
+        self._encerrado = False
+        conexoes = []
+        falhas = []
+        for endereco in enderecos:
+            try:
+                conexao = _Conexao(socket.create_connection(endereco, timeout=TIMEOUT_CONEXAO))
+                ola = conexao.receber(TIMEOUT_CONEXAO)
+                if ola is None or ola.get('tipo') != 'ola':
+                    raise ConnectionError('o trabalhador não respondeu')
+                conexao.enviar({'tipo': 'autenticacao', 'prova': _prova(segredo, str(ola['desafio']))})
+                try:
+                    aceito = conexao.receber(TIMEOUT_CONEXAO)
+                except ConnectionError:
+                    aceito = None
+                if aceito is None or aceito.get('tipo') != 'aceito':
+                    raise ConnectionError('o trabalhador recusou a conexão (o segredo está errado?)')
+                conexoes += [(conexao, int(aceito['capacidade']))]
+            except (OSError, ConnectionError, ValueError, KeyError) as e:
+                falhas += [f'{endereco[0]}:{endereco[1]}: {e}']
+        if not conexoes:
+            raise ErroDistribuido('Nenhum trabalhador disponível.\n' + '\n'.join(falhas))
+        self.capacidade: int = sum(c for _, c in conexoes)
+        self._vivos = len(conexoes)
+        self._threads = [threading.Thread(target=self._atender, args=c, name='coordenador', daemon=True)
+                         for c in conexoes]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def trabalhadores(self) -> int:
+        '''O número de trabalhadores conectados.'''
+        with self._trava:
+            return self._vivos
+
+    def submeter(self, grupo: GrupoExecucao) -> Future:
+        '''Agenda a correção de `grupo` num trabalhador. O futuro falha com `ErroDistribuido` se não houver
+        trabalhadores ou se o trabalhador relatar um erro interno.'''
+        tarefa = _Tarefa(grupo)
+        with self._trava:
+            tarefa.id = self._proximo_id
+            self._proximo_id += 1
+            if self._vivos == 0:
+                tarefa.futuro.set_exception(ErroDistribuido('Nenhum trabalhador disponível.'))
+                return tarefa.futuro
+            self._fila.put(tarefa)
+        return tarefa.futuro
+
+    def encerrar(self):
+        '''Desconecta dos trabalhadores. Os grupos pendentes são cancelados.'''
+        self._encerrado = True
+        for thread in self._threads:
+            thread.join()
+        self._falhar_pendentes(None)
+
+    def _atender(self, conexao: _Conexao, capacidade: int):
+        '''Envia grupos a um trabalhador, mantendo até `capacidade` com ele, e recebe os resultados.'''
+        enviados: set[str] = set()
+        em_andamento: dict[int, _Tarefa] = {}
+        try:
+            while not self._encerrado:
+                while len(em_andamento) < capacidade:
+                    try:
+                        # Sem grupos em andamento, espera por um novo; senão, só pega os que já estão na fila
+                        tarefa = self._fila.get(timeout=INTERVALO) if not em_andamento else self._fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    if tarefa.futuro.done():  # Cancelado
+                        continue
+                    tarefa.tentativas += 1
+                    em_andamento[tarefa.id] = tarefa
+                    conexao.enviar(tarefa.mensagem(enviados))
+                    enviados.update(tarefa.conteudos)
+                if not em_andamento:
+                    continue
+                resposta = conexao.receber(INTERVALO)
+                if resposta is not None:
+                    em_andamento.pop(resposta['id']).concluir(resposta)
+        except (OSError, ConnectionError, ValueError, KeyError):
+            pass  # O trabalhador caiu ou respondeu algo inválido: seus grupos vão para outro
+        finally:
+            conexao.fechar()
+            with self._trava:
+                self._vivos -= 1
+                vivos = self._vivos
+            for tarefa in em_andamento.values():
+                if tarefa.futuro.done():
+                    continue
+                if self._encerrado:
+                    tarefa.futuro.cancel()
+                elif tarefa.tentativas >= self.tentativas:
+                    tarefa.futuro.set_exception(ErroDistribuido(
+                        f'O grupo foi enviado {tarefa.tentativas} vezes, e os trabalhadores caíram em todas.'))
+                else:
+                    self._fila.put(tarefa)
+            if vivos == 0 and not self._encerrado:
+                self._falhar_pendentes(ErroDistribuido('Todos os trabalhadores caíram.'))
+
+    def _falhar_pendentes(self, erro: Exception | None):
+        '''Conclui os grupos ainda na fila com `erro` ou, se None, cancela-os.'''
+        while True:
+            try:
+                tarefa = self._fila.get_nowait()
+            except queue.Empty:
+                return
+            if erro is None:
+                tarefa.futuro.cancel()
+            elif not tarefa.futuro.done():
+                tarefa.futuro.set_exception(erro)
+
+
+class Trabalhador:
+    '''Servidor que corrige os grupos de correções recebidos de coordenadores (veja `Coordenador`).'''
+
+    def __init__(self, host: str = '127.0.0.1', porta: int = PORTA, workers: int | None = None,
+                 cache: CacheResultados | None = None, diretorio: str | None = None, segredo: str | None = None,
+                 interpretadores: Iterable[str] = INTERPRETADORES):
+        '''Construtor. Abre a porta, mas só atende depois de `servir`.
+
+        Parâmetros:
+        - `host` e `porta` são o endereço do servidor. Com a porta 0, o sistema escolhe uma livre (veja `endereco`).
+        - `workers` é o número de grupos corrigidos ao mesmo tempo. O padrão é o número de processadores.
+        - `cache` é o cache de resultados passado para `GrupoExecucao.corrigir`.
+        - `diretorio` é onde os arquivos recebidos são guardados. O padrão é um diretório temporário.
+        - `segredo` é o segredo compartilhado com os coordenadores. O padrão é o valor de `$CORRETOR_SEGREDO`.
+        - `interpretadores` são os comandos com que as correções podem executar os scripts.
+
+        Lança `ErroDistribuido` se o segredo não estiver definido.
+        '''
+        self._segredo: str = obter_segredo(segredo)
+        self.interpretadores: frozenset[str] = frozenset(interpretadores)
+        self.workers: int = workers or WORKERS
+        self.cache = cache
+        self._temporario = diretorio is None
+        self.diretorio: str = diretorio or tempfile.mkdtemp(prefix='corretor-trabalhador-')
+        self._servidor = socket.create_server((host, porta))
+        self._servidor.settimeout(INTERVALO)
+        self.endereco: tuple[str, int] = self._servidor.getsockname()[:2]
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='trabalhador')
+        self._conexoes: set[_Conexao] = set()
+        self._trava = threading.Lock()
+        self._encerrado = threading.Event()
+
+    def servir(self):
+        '''Atende os coordenadores até `encerrar` ser chamado.'''
+        while not self._encerrado.is_set():
+            try:
+                sock, _ = self._servidor.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.settimeout(None)
+            threading.Thread(target=self._atender, args=(_Conexao(sock),), name='trabalhador-conexao',
+                             daemon=True).start()
+
+    def iniciar(self) -> 'Trabalhador':
+        '''Atende os coordenadores numa thread. Retorna o próprio trabalhador.'''
+        threading.Thread(target=self.servir, name='trabalhador', daemon=True).start()
+        return self
+
+    def encerrar(self):
+        '''Para de atender e fecha as conexões abertas. Os grupos em correção são descartados.'''
+        self._encerrado.set()
+        self._servidor.close()
+        with self._trava:
+            conexoes = list(self._conexoes)
+        for conexao in conexoes:
+            conexao.fechar()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._temporario:
+            shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def _atender(self, conexao: _Conexao):
+        '''Recebe os grupos de um coordenador e agenda as correções.'''
+        with self._trava:
+            self._conexoes.add(conexao)
+        try:
+            desafio = secrets.token_hex(32)
+            conexao.enviar({'tipo': 'ola', 'desafio': desafio})
+            autenticacao = conexao.receber(TIMEOUT_CONEXAO)
+            if (not isinstance(autenticacao, dict) or autenticacao.get('tipo') != 'autenticacao'
+                    or not hmac.compare_digest(str(autenticacao.get('prova')).encode('utf-8'),
+                                               _prova(self._segredo, desafio).encode('ascii'))):
+                return  # Coordenador sem o segredo: a conexão é fechada sem receber nada
+            conexao.enviar({'tipo': 'aceito', 'capacidade': self.workers})
+            while not self._encerrado.is_set():
+                mensagem = conexao.receber()
+                if mensagem.get('tipo') == 'grupo':
+                    self._guardar_conteudos(mensagem['conteudos'])
+                    self._pool.submit(self._corrigir, conexao, mensagem)
+        except (OSError, ConnectionError, ValueError, RuntimeError):
+            pass  # Coordenador desconectado ou pool encerrado
+        finally:
+            with self._trava:
+                self._conexoes.discard(conexao)
+            conexao.fechar()
+
+    def _guardar_conteudos(self, conteudos: dict[str, str]):
+        '''Guarda os arquivos recebidos, pelo hash do conteúdo.'''
+        os.makedirs(os.path.join(self.diretorio, 'objetos'), exist_ok=True)
+        for digest, texto in conteudos.items():
+            conteudo = base64.b64decode(texto)
+            if hashlib.sha256(conteudo).hexdigest() != digest:
+                raise ValueError(f'Conteúdo corrompido ({digest}).')
+            caminho = os.path.join(self.diretorio, 'objetos', digest)
+            if not os.path.exists(caminho):
+                temporario = f'{caminho}.{threading.get_native_id()}.tmp'
+                with open(temporario, 'wb') as arq:
+                    arq.write(conteudo)
+                os.replace(temporario, caminho)
+
+    def _materializar(self, arquivos: dict[str, str]) -> str:
+        '''Retorna um diretório com os `arquivos` (nome → hash), criado na primeira vez que o mesmo conjunto é pedido.
+        Como o nome do diretório vem do conteúdo, o cache de resultados continua valendo entre execuções.'''
+        identificador = hashlib.sha256(json.dumps(sorted(arquivos.items())).encode()).hexdigest()[:32]
+        diretorio = os.path.join(self.diretorio, 'grupos', identificador)
+        if os.path.isdir(diretorio):
+            return diretorio
+        temporario = tempfile.mkdtemp(dir=os.path.join(self.diretorio), prefix='grupo-')
+        for nome, digest in arquivos.items():
+            if not _nome_seguro(nome):
+                raise ValueError(f'Nome de arquivo inválido: {nome!r}.')
+            destino = os.path.join(temporario, nome)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            shutil.copyfile(os.path.join(self.diretorio, 'objetos', digest), destino)
+        os.makedirs(os.path.dirname(diretorio), exist_ok=True)
+        try:
+            os.rename(temporario, diretorio)
+        except OSError:  # Outra thread criou o mesmo diretório antes
+            shutil.rmtree(temporario, ignore_errors=True)
+        return diretorio
+
+    def _criar_correcao(self, campos: dict, diretorio: str) -> Correcao:
+        '''Cria uma correção recebida de um coordenador, nos arquivos em `diretorio`.
+
+        Lança `ValueError` se ela usar um interpretador não permitido ou um arquivo fora de `diretorio`.
+        '''
+        if campos.get('comando') not in self.interpretadores:
+            raise ValueError(f'Interpretador não permitido: {campos.get("comando")!r}. '
+                             f'Use um destes: {", ".join(sorted(self.interpretadores))}.')
+        for campo in ('script', 'entrada_arquivo'):
+            nome = campos.get(campo)
+            if nome is not None and not (isinstance(nome, str) and _nome_seguro(nome)):
+                raise ValueError(f'Nome de arquivo inválido: {nome!r}.')
+        return TIPOS_CORRECAO[campos['tipo']](diretorio=diretorio, **campos)
+
+    def _corrigir(self, conexao: _Conexao, mensagem: dict):
+        '''Corrige um grupo e envia o resultado ao coordenador.'''
+        try:
+            diretorio = self._materializar(mensagem['arquivos'])
+            correcoes = [self._criar_correcao(c, diretorio) for c in mensagem['correcoes']]
+            resultados = GrupoExecucao(correcoes).corrigir(self.cache)
+            vazias = {'tempo': None, 'tempo_cpu': None, 'memoria': None}
+            resposta = {'tipo': 'resultado', 'id': mensagem['id'], 'resultados': [
+                [*r, c.ultima_execucao.medidas if c.ultima_execucao else vazias]
+                for c, r in zip(correcoes, resultados)]}
+        except Exception as e:
+            resposta = {'tipo': 'erro', 'id': mensagem['id'], 'erro': f'Erro interno do trabalhador: {e}'}
+        try:
+            conexao.enviar(resposta)
+        except OSError:
+            pass  # Coordenador desconectado
+
+
+# PROGRAMA PRINCIPAL
+
+def main(argv: list[str] | None = None):
+    '''Inicia um trabalhador a partir da linha de comando.'''
+    parser = argparse.ArgumentParser(description='Trabalhador da correção distribuída.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='endereço em que atender (padrão: 127.0.0.1, só esta máquina; 0.0.0.0 para todos)')
+    parser.add_argument('--porta', type=int, default=PORTA, help=f'porta em que atender (padrão: {PORTA})')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='número de correções executadas ao mesmo tempo (padrão: número de processadores)')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='sempre executa os scripts, sem reaproveitar resultados anteriores')
+    parser.add_argument('--diretorio', default=None,
+                        help='onde guardar os arquivos recebidos (padrão: um diretório temporário)')
+    parser.add_argument('--segredo', default=None,
+                        help=f'segredo compartilhado com os coordenadores (padrão: ${VARIAVEL_SEGREDO})')
+    parser.add_argument('--interpretador', action='append', default=None, metavar='COMANDO',
+                        help='comando permitido para executar os scripts; pode ser repetido '
+                             f'(padrão: {", ".join(INTERPRETADORES)})')
+    args = parser.parse_args(argv)
+    try:
+        segredo = obter_segredo(args.segredo)
+    except ErroDistribuido as e:
+        parser.error(str(e))
+    cache = None if args.sem_cache else CacheResultados()
+    trabalhador = Trabalhador(args.host, args.porta, args.workers, cache, args.diretorio, segredo,
+                              args.interpretador or INTERPRETADORES)
+    print(f'Atendendo em {trabalhador.endereco[0]}:{trabalhador.endereco[1]} '
+          f'({trabalhador.workers} correções ao mesmo tempo).', flush=True)
+    try:
+        trabalhador.servir()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        trabalhador.encerrar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+'''Entradas do teclado dos scripts: um texto, um arquivo ou um gerador.
+
+A entrada de uma correção pode ser um texto (`"entrada": "..."`), um arquivo (`"entrada_arquivo"`, relativo ao
+diretório dos scripts) ou um gerador (`"entrada": {"gerador": {...}, "n": ...}`; veja `geradores`).
+Arquivos e geradores nunca são carregados inteiros no corretor: são escritos no processo em blocos,
+lidos do arquivo mapeado em memória (`mmap`) ou produzidos à medida que o processo lê a entrada.
+Na interface, entradas grandes são exibidas só com o tamanho e o início.
+'''
+
+import hashlib, json, mmap, os
+
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+
+from .erros import ErroConfiguracao
+
+# Constantes
+TAMANHO_BLOCO = 64 * 1024  # bytes lidos do arquivo por vez
+TAMANHO_PREVIA = 1024  # bytes do início da entrada exibidos na interface
+LIMITE_EXIBICAO = 4 * 1024  # Textos maiores são exibidos resumidos na interface
+# Hash do conteúdo de cada arquivo de entrada já lido, por caminho absoluto, com o tamanho e a data de modificação
+# da versão lida: só a última versão de cada arquivo é mantida
+_hashes: dict[str, tuple[tuple[int, int], str]] = {}
+
+
+# Classes
+
+class Entrada:
+    '''Uma entrada do teclado, produzida em blocos de bytes.'''
+
+    def blocos(self) -> Iterator[bytes]:
+        '''Produz o conteúdo da entrada em blocos.'''
+        raise NotImplementedError
+
+    def chave(self) -> str:
+        '''Identifica o conteúdo da entrada: entradas com a mesma chave são iguais (veja `cache` e `agrupar_execucoes`).'''
+        raise NotImplementedError
+
+    @property
+    def resumo(self) -> str:
+        '''Uma descrição curta da entrada, de uma linha.'''
+        raise NotImplementedError
+
+    def tamanho(self) -> int | None:
+        '''O tamanho da entrada, em bytes, ou None se ele só é conhecido depois de produzi-la.'''
+        return None
+
+    def previa(self, limite: int = TAMANHO_PREVIA) -> str:
+        '''Retorna o início da entrada, com até `limite` bytes.'''
+        inicio = bytearray()
+        blocos = self.blocos()
+        try:
+            for bloco in blocos:
+                inicio += bloco[:limite - len(inicio)]
+                if len(inicio) >= limite:
+                    break
+        finally:
+            blocos.close()
+        return bytes(inicio).decode('utf-8', errors='ignore')
+
+    def descricao(self) -> str:
+        '''A entrada como exibida na interface: o texto inteiro, se for pequeno, ou um resumo com o tamanho e o início.'''
+        tamanho = self.tamanho()
+        texto = f'{self.resumo} ({_formatar_tamanho(tamanho)})' if tamanho is not None else self.resumo
+        previa = self.previa()
+        if tamanho is None or tamanho > len(previa.encode('utf-8')):
+            previa += '\n[...]'
+        return f'{texto}. Início:\n{previa}'
+
+    def conteudo(self) -> bytes:
+        '''Retorna a entrada inteira (só para onde não é possível escrevê-la aos poucos).'''
+        return b''.join(self.blocos())
+
+    @contextmanager
+    def arquivo(self) -> Iterator[str]:
+        '''Gerenciador de contexto que fornece o caminho de um arquivo com a entrada, escrito em blocos
+        num arquivo temporário e apagado no fim.'''
+        import tempfile  # Só é necessário no modo fork
+        descritor, caminho = tempfile.mkstemp(prefix='entrada-')
+        try:
+            with os.fdopen(descritor, 'wb') as arq:
+                for bloco in self.blocos():
+                    arq.write(bloco)
+            yield caminho
+        finally:
+            os.remove(caminho)
+
+
+class EntradaTexto(Entrada):
+    '''Uma entrada definida no próprio arquivo de configuração.'''
+
+    def __init__(self, texto: str):
+        self.texto: str = texto
+
+    def blocos(self) -> Iterator[bytes]:
+        if self.texto:
+            yield self.texto.encode('utf-8')
+
+    def chave(self) -> str:
+        # O próprio texto, como antes das entradas em arquivo, para aproveitar os resultados já guardados no cache
+        return self.texto
+
+    @property
+    def resumo(self) -> str:
+        return self.texto[:100]
+
+    def tamanho(self) -> int:
+        return len(self.texto.encode('utf-8'))
+
+    def previa(self, limite: int = TAMANHO_PREVIA) -> str:
+        return self.texto.encode('utf-8')[:limite].decode('utf-8', errors='ignore')
+
+    def descricao(self) -> str:
+        if self.tamanho() <= LIMITE_EXIBICAO:
+            return self.texto
+        return f'Texto ({_formatar_tamanho(self.tamanho())}). Início:\n{self.previa()}\n[...]'
+
+
+class EntradaArquivo(Entrada):
+    '''Uma entrada lida de um arquivo, mapeado em memória.'''
+
+    def __init__(self, caminho: str):
+        self.caminho: str = caminho
+
+    def blocos(self) -> Iterator[bytes]:
+        '''Produz o conteúdo do arquivo em blocos de `TAMANHO_BLOCO`. Lança `OSError` se ele não puder ser lido.'''
+        with open(self.caminho, 'rb') as arq:
+            if os.fstat(arq.fileno()).st_size == 0:
+                return
+            with mmap.mmap(arq.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                for inicio in range(0, len(mapa), TAMANHO_BLOCO):
+                    yield mapa[inicio:inicio + TAMANHO_BLOCO]
+
+    def chave(self) -> str:
+        '''O hash do conteúdo do arquivo, calculado de novo só se o arquivo mudar.
+        Se o arquivo não existir, a chave é o caminho.'''
+        try:
+            st = os.stat(self.caminho)
+        except OSError:
+            return f'arquivo ausente:{self.caminho}'
+        caminho = os.path.abspath(self.caminho)
+        versao = (st.st_size, st.st_mtime_ns)
+        guardado = _hashes.get(caminho)
+        if guardado is None or guardado[0] != versao:
+            h = hashlib.sha256()
+            for bloco in self.blocos():
+                h.update(bloco)
+            guardado = _hashes[caminho] = (versao, h.hexdigest())
+        return f'arquivo:{guardado[1]}'
+
+    @property
+    def resumo(self) -> str:
+        return f'Arquivo {self.caminho}'
+
+    def tamanho(self) -> int | None:
+        try:
+            return os.path.getsize(self.caminho)
+        except OSError:
+            return None
+
+    def descricao(self) -> str:
+        try:
+            return super().descricao()
+        except OSError as e:
+            return f'{self.resumo}: não foi possível ler ({e.strerror}).'
+
+    @contextmanager
+    def arquivo(self) -> Iterator[str]:
+        '''Fornece o próprio arquivo, sem cópia.'''
+        yield self.caminho
+
+
+class EntradaGerador(Entrada):
+    '''Uma entrada produzida por um gerador (veja `geradores`).'''
+
+    def __init__(self, espec: Mapping, n: int):
+        '''Construtor.
+
+        Parâmetros:
+        - `espec` é a definição do gerador (veja `geradores.compilar`).
+        - `n` é o tamanho da entrada.
+
+        Lança `ErroConfiguracao` se o gerador for inválido.
+        '''
+        from .geradores import Gerador, compilar  # Só é necessário para entradas de geradores
+        self.espec: dict = dict(espec)
+        self.n: int = n
+        self.gerador: Gerador = compilar(espec)
+
+    def blocos(self) -> Iterator[bytes]:
+        for bloco in self.gerador.gerar(self.n):
+            yield bloco.encode('utf-8')
+
+    def chave(self) -> str:
+        return 'gerador:' + json.dumps([self.espec, self.n], sort_keys=True)
+
+    @property
+    def resumo(self) -> str:
+        return f'Gerador {json.dumps(self.espec, ensure_ascii=False)} com n = {self.n}'
+
+
+# Funções
+
+def _formatar_tamanho(tamanho: int) -> str:
+    if tamanho < 1024:
+        return f'{tamanho} bytes'
+    if tamanho < 1024 * 1024:
+        return f'{tamanho / 1024:.1f} KB'
+    return f'{tamanho / (1024 * 1024):.1f} MB'
+
+
+def criar(entrada: str | Mapping = '', entrada_arquivo: str | None = None, diretorio: str = '.') -> Entrada:
+    '''Cria a entrada de uma correção.
+
+    Parâmetros:
+    - `entrada` é o texto da entrada ou a definição de um gerador, `{"gerador": {...}, "n": ...}`.
+    - `entrada_arquivo` é o caminho de um arquivo com a entrada, relativo a `diretorio` (ou absoluto).
+      Se dado, `entrada` é ignorada.
+    - `diretorio` é o diretório dos scripts.
+
+    Lança `ErroConfiguracao` se a entrada for inválida.
+    '''
+    if entrada_arquivo:
+        return EntradaArquivo(os.path.join(diretorio, entrada_arquivo))
+    if isinstance(entrada, str):
+        return EntradaTexto(entrada)
+    if not isinstance(entrada, Mapping) or set(entrada) != {'gerador', 'n'}:
+        raise ErroConfiguracao(f'Entrada inválida: {entrada!r}. Use um texto ou {{"gerador": {{...}}, "n": ...}}.')
+    n = entrada['n']
+    if isinstance(n, bool) or not isinstance(n, int) or n < 0:
+        raise ErroConfiguracao(f'"n" da entrada deve ser um inteiro não negativo, não {n!r}.')
+    return EntradaGerador(entrada['gerador'], n)
@@ -0,0 +1,9 @@
+'''Exceções do corretor.'''
+
+
+class ErroConfiguracao(ValueError):
+    '''Erro no arquivo de configuração da atividade.'''
+
+
+class ErroDistribuido(RuntimeError):
+    '''Falha na correção distribuída: nenhum trabalhador disponível ou um grupo de correções que derrubou todos os que o receberam.'''
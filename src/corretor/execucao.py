@@ -0,0 +1,126 @@
+'''Motor de execução concorrente das correções.'''
+
+import os, queue, threading
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TYPE_CHECKING
+
+from . import processo
+
+if TYPE_CHECKING:
+    from .cache import CacheResultados
+    from .modelo import Correcao, GrupoExecucao
+
+# Constantes
+WORKERS = os.cpu_count() or 1
+
+
+# Classes
+
+class Executor:
+    '''Executa correções concorrentemente em um pool de workers.
+
+    Cada correção é executada numa thread do pool (o trabalho pesado é do processo filho, então threads bastam).
+    Os resultados são colocados na fila `resultados` à medida que ficam prontos, como tuplas `(chave, resultado)`,
+    onde `resultado` é o retorno de `Correcao.corrigir`.
+    A fila pode ser consumida por outra thread, por exemplo, pelo laço do Tk com `after`.
+    Cancelar as correções mata os processos das que estão em execução (veja `processo.interromper`).
+    '''
+
+    def __init__(self, workers: int | None = None, cache: 'CacheResultados | None' = None):
+        '''Construtor.
+
+        Parâmetros:
+        - `workers` é o número de correções executadas ao mesmo tempo. O padrão é o número de processadores.
+        - `cache` é o cache de resultados passado para `Correcao.corrigir`. Se omitido, os scripts são sempre executados.
+        '''
+        self.workers: int = workers or WORKERS
+        self.cache = cache
+        self.resultados: queue.SimpleQueue = queue.SimpleQueue()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                        thread_name_prefix='corretor')
+        self._trava = threading.Lock()
+        # Futuros da rodada atual. Cancelar inicia uma nova rodada.
+        self._pendentes: set[Future] = set()
+        self._rodada = 0
+        # Threads do pool que executam correções da rodada atual
+        self._threads: set[int] = set()
+
+    @property
+    def ocupado(self) -> bool:
+        '''Retorna True se há correções da rodada atual pendentes ou em execução.'''
+        with self._trava:
+            return len(self._pendentes) > 0
+
+    def submeter(self, correcao: 'Correcao', chave: Any = None) -> Future:
+        '''Agenda a execução de uma correção.
+
+        Parâmetros:
+        - `correcao` é a correção a executar.
+        - `chave` identifica o resultado na fila `resultados`. Se omitida, é a própria correção.
+        '''
+        if chave is None:
+            chave = correcao
+        return self._submeter(lambda: [correcao.corrigir(self.cache)], [chave])
+
+    def submeter_grupo(self, grupo: 'GrupoExecucao') -> Future:
+        '''Agenda a execução de um grupo de correções que executam o script da mesma forma.
+        O script é executado uma só vez, e o resultado de cada correção é colocado na fila com a correção como chave.'''
+        return self._submeter(lambda: grupo.corrigir(self.cache), grupo.correcoes)
+
+    def _submeter(self, funcao, chaves: list) -> Future:
+        '''Agenda `funcao`, que retorna os resultados das correções identificadas por `chaves`.'''
+        with self._trava:
+            rodada = self._rodada
+            futuro = self._pool.submit(self._executar, funcao, rodada)
+            self._pendentes.add(futuro)
+        futuro.add_done_callback(lambda f: self._concluir(f, chaves, rodada))
+        return futuro
+
+    def _executar(self, funcao, rodada: int) -> list | None:
+        '''Executa `funcao` na thread do pool, registrada para que `cancelar` possa matar os seus processos.'''
+        thread = threading.get_ident()
+        with self._trava:
+            if rodada != self._rodada:
+                return None  # Cancelada antes de começar
+            self._threads.add(thread)
+        try:
+            return funcao()
+        finally:
+            with self._trava:
+                self._threads.discard(thread)
+                processo.retomar()
+
+    def _concluir(self, futuro: Future, chaves: list, rodada: int):
+        '''Coloca os resultados de `futuro` na fila, se ele não foi cancelado.'''
+        if futuro.cancelled():
+            resultados = None
+        else:
+            try:
+                resultados = futuro.result()
+            except Exception as e:
+                resultados = [(False, -1, '', f'Erro interno do corretor: {e}\n')] * len(chaves)
+        with self._trava:
+            self._pendentes.discard(futuro)
+            # Na mesma trava de `cancelar`: nenhum resultado de uma rodada cancelada chega à fila
+            if resultados is None or rodada != self._rodada:
+                return
+            for chave, resultado in zip(chaves, resultados):
+                self.resultados.put((chave, resultado))
+
+    def cancelar(self):
+        '''Cancela as correções pendentes e mata os processos das que estão em execução.
+        Os resultados das correções canceladas são descartados.'''
+        with self._trava:
+            self._rodada += 1
+            pendentes = self._pendentes
+            self._pendentes = set()
+            processo.interromper(self._threads)
+            self._threads = set()
+        for futuro in pendentes:
+            futuro.cancel()
+
+    def encerrar(self):
+        '''Cancela as correções pendentes e libera o pool de workers.'''
+        self.cancelar()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,353 @@
+'''Servidor de fork: executa scripts Python sem pagar a inicialização do interpretador a cada correção.
+
+O servidor é um interpretador já inicializado que recebe pedidos pela entrada padrão (um JSON por linha).
+Para cada pedido, ele cria um processo filho com `os.fork`, que executa o script como `__main__` e termina.
+Assim, cada correção roda num processo isolado, mas sem o custo de iniciar o Python do zero.
+O servidor responde com o pid do filho, assim que ele é criado (para que o cliente possa matá-lo ao cancelar
+a correção), e depois com o resultado.
+
+Este arquivo é executado diretamente pelo interpretador do `comando` da correção,
+por isso o servidor só depende da biblioteca padrão e não usa imports relativos
+(só o cliente, `ServidorFork`, que executa no corretor, importa o resto do pacote).
+'''
+
+import sys
+
+# Módulos que o interpretador carrega ao iniciar, antes dos imports do servidor: são os únicos que um script
+# executado diretamente encontra já importados (veja `_esquecer_modulos`)
+MODULOS_INICIAIS = frozenset(sys.modules)
+
+import io, json, math, os, select, signal, subprocess, sys, tempfile, threading, time, traceback, types
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Constantes
+# O servidor é este arquivo, executado pelo interpretador da correção. No executável criado pelo PyInstaller,
+# os módulos não ficam em arquivos; o `corretor.spec` inclui este, e sem ele o modo fork usa subprocessos.
+DISPONIVEL = hasattr(os, 'fork') and resource is not None and os.path.isfile(__file__)
+TAMANHO_TRECHO = 8 * 1024  # O mesmo de `processo.TAMANHO_TRECHO`
+ESCALA_MAXRSS = 1 if sys.platform == 'darwin' else 1024  # O mesmo de `processo.ESCALA_MAXRSS`
+
+
+# SERVIDOR
+
+def _esquecer_modulos():
+    '''Remove de `sys.modules` os módulos importados pelo servidor (já no filho).
+
+    Sem isso, o script encontraria esses módulos já importados, e um módulo da resposta com o mesmo nome
+    (um `random.py`, por exemplo) seria ignorado no modo fork, mas não num subprocesso.
+    Os módulos embutidos no interpretador ficam, porque nunca são substituídos por arquivos.
+    As funções do servidor continuam funcionando: elas guardam suas próprias referências aos módulos.
+    '''
+    for nome in list(sys.modules):
+        if nome not in MODULOS_INICIAIS and nome not in sys.builtin_module_names:
+            del sys.modules[nome]
+
+
+def _rodar_script(script: str, args: list[str]) -> int:
+    '''Executa `script` no processo atual (já no filho), como o interpretador faria.
+
+    O script é compilado e executado num módulo `__main__` novo, como faz o `runpy.run_path`,
+    mas sem o custo de buscar um importador para o caminho.
+
+    Retorno:
+    O código de saída.
+    '''
+    try:
+        with open(script, 'rb') as arq:
+            fonte = arq.read()
+    except OSError as e:
+        print(f"{sys.orig_argv[0]}: can't open file {script!r}: [Errno {e.errno}] {e.strerror}",
+              file=sys.stderr)
+        return 2
+    sys.argv = [script] + args
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    modulo = types.ModuleType('__main__')
+    modulo.__file__ = script
+    modulo.__cached__ = None
+    sys.modules['__main__'] = modulo
+    try:
+        exec(compile(fonte, script, 'exec'), modulo.__dict__)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Omite do traceback os quadros deste servidor
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb, file=sys.stderr)
+        return 1
+    return 0
+
+
+def _filho(entrada: int, saida: int, erro: int, script: str, args: list[str],
+           limite_saida: int, limite_cpu: float | None, limite_memoria: int | None):
+    '''Código executado no processo filho. Nunca retorna.'''
+    codigo = 1
+    try:
+        os.setsid()  # Grupo de processos próprio, para poder matar também os netos
+        # A saída vai para arquivos: o limite de tamanho de arquivo mata o filho (SIGXFSZ) quando ela excede o limite.
+        # Isso também limita os arquivos que o próprio script escrever.
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limite_saida + 1, limite_saida + 1))
+        if limite_cpu:
+            # O filho herda o tempo de CPU zerado; o servidor não conta
+            segundos = max(1, math.ceil(limite_cpu))
+            resource.setrlimit(resource.RLIMIT_CPU, (segundos, segundos + 1))
+        if limite_memoria:
+            resource.setrlimit(resource.RLIMIT_AS, (limite_memoria, limite_memoria))
+        os.dup2(entrada, 0)
+        os.dup2(saida, 1)
+        os.dup2(erro, 2)
+        sys.stdin = open(0, 'r', encoding='utf-8', errors='ignore', closefd=False)
+        sys.stdout = open(1, 'w', encoding='utf-8', closefd=False)
+        sys.stderr = open(2, 'w', encoding='utf-8', errors='backslashreplace',
+                          closefd=False, buffering=1)
+        _esquecer_modulos()
+        codigo = _rodar_script(script, args)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except BaseException:
+            pass
+        os._exit(codigo & 0xff)
+
+
+def _esperar(pid: int, timeout: float) -> tuple[int, object, bool]:
+    '''Espera o filho `pid` terminar, matando-o (e seu grupo) se passar de `timeout` segundos.
+    Os netos que ficarem para trás também são mortos.
+
+    Retorno:
+    O status e o uso de recursos do `wait4` e se o timeout expirou.
+    '''
+    prazo = time.monotonic() + timeout
+    pidfd = None
+    if hasattr(os, 'pidfd_open'):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            pass
+    try:
+        espera = 0.0005
+        while True:
+            terminou, status, uso = os.wait4(pid, os.WNOHANG)
+            if terminou:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                return status, uso, False
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            if pidfd is not None:
+                select.select([pidfd], [], [], restante)
+            else:
+                time.sleep(min(espera, restante))
+                espera = min(espera * 2, 0.01)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        # O filho ainda não criou seu grupo de processos
+        os.kill(pid, signal.SIGKILL)
+    _, status, uso = os.wait4(pid, 0)
+    return status, uso, True
+
+
+def _ler(arquivo, limite_saida: int) -> tuple[str, bool]:
+    '''Lê a saída capturada em `arquivo`, mantendo só o início e o fim se ela excedeu o limite.
+
+    Retorno:
+    O texto e se o limite foi excedido.
+    '''
+    total = os.fstat(arquivo.fileno()).st_size
+    arquivo.seek(0)
+    dados = arquivo.read(limite_saida)
+    excedeu = total > limite_saida
+    if excedeu and len(dados) > 2 * TAMANHO_TRECHO:
+        omitidos = total - 2 * TAMANHO_TRECHO
+        texto = f'{_decodificar(dados[:TAMANHO_TRECHO])}\n[... {omitidos} bytes omitidos ...]\n' \
+                f'{_decodificar(dados[-TAMANHO_TRECHO:])}'
+    else:
+        texto = _decodificar(dados)
+    return texto, excedeu
+
+
+def _decodificar(dados: bytes) -> str:
+    texto = dados.decode('utf-8', errors='ignore')
+    return texto.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def atender(pedido: dict, ao_iniciar=None) -> dict:
+    '''Executa um pedido num processo filho.
+
+    Parâmetros:
+    - `pedido` é um dicionário com as chaves `"script"`, `"args"` (lista), `"entrada"`, `"timeout"`, `"limite_saida"`,
+      `"limite_cpu"` e `"limite_memoria"` (os dois últimos podem ser None).
+      Em vez de `"entrada"`, pode ter `"entrada_arquivo"`, o caminho de um arquivo aberto como a entrada do filho.
+      Sem nenhum dos dois (ou com `"entrada"` None), a entrada do filho é vazia.
+    - `ao_iniciar`, se dado, é chamado com o pid do filho assim que ele é criado.
+
+    Retorno:
+    Um dicionário com as chaves `"codigo"`, `"saida"`, `"erro"`, `"timeout"`, `"excedeu"`
+    (`"saida"` ou `"erro"`, se algum deles excedeu o limite de saída, ou None),
+    `"tempo"` (de relógio), `"tempo_cpu"` (em segundos) e `"memoria"` (pico, em bytes).
+    '''
+    if pedido.get('entrada_arquivo') is not None:
+        entrada = open(pedido['entrada_arquivo'], 'rb')
+    else:
+        entrada = tempfile.TemporaryFile()
+        entrada.write((pedido.get('entrada') or '').encode('utf-8'))
+        entrada.seek(0)
+    with entrada, tempfile.TemporaryFile() as saida, tempfile.TemporaryFile() as erro:
+        inicio = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            _filho(entrada.fileno(), saida.fileno(), erro.fileno(),
+                   pedido['script'], pedido['args'], pedido['limite_saida'],
+                   pedido.get('limite_cpu'), pedido.get('limite_memoria'))
+        if ao_iniciar is not None:
+            ao_iniciar(pid)
+        status, uso, expirou = _esperar(pid, pedido['timeout'])
+        tempo = time.perf_counter() - inicio
+        texto_saida, saida_excedeu = _ler(saida, pedido['limite_saida'])
+        texto_erro, erro_excedeu = _ler(erro, pedido['limite_saida'])
+        return {
+            'codigo': os.waitstatus_to_exitcode(status),
+            'saida': texto_saida,
+            'erro': texto_erro,
+            'timeout': expirou,
+            'excedeu': 'saida' if saida_excedeu else 'erro' if erro_excedeu else None,
+            'tempo': tempo,
+            'tempo_cpu': uso.ru_utime + uso.ru_stime,
+            'memoria': uso.ru_maxrss * ESCALA_MAXRSS,
+        }
+
+
+def servir():
+    '''Laço principal do servidor: lê pedidos da entrada padrão e escreve as respostas na saída padrão.'''
+    entrada = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    saida = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    def enviar(mensagem: dict):
+        saida.write(json.dumps(mensagem) + '\n')
+        saida.flush()
+
+    for linha in entrada:
+        enviar(atender(json.loads(linha), lambda pid: enviar({'pid': pid})))
+
+
+# CLIENTE
+
+class ServidorFork:
+    '''Cliente de um servidor de fork executado pelo interpretador `comando`.
+
+    Um servidor atende um pedido por vez. Para executar em paralelo, use um servidor por thread (veja `obter_servidor`).
+    '''
+
+    def __init__(self, comando: str = 'python'):
+        '''Construtor.
+
+        Parâmetros:
+        - `comando` é o comando do interpretador Python que executa o servidor (e os scripts).
+        '''
+        self.comando: str = comando
+        self._processo: subprocess.Popen | None = None
+        self._trava = threading.Lock()
+
+    def _iniciar(self):
+        '''Inicia (ou reinicia) o processo do servidor.'''
+        self.encerrar()
+        self._processo = subprocess.Popen(
+            [self.comando, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding='utf-8')
+
+    def executar(self, script: str, args: list[str], entrada: str | None, timeout: float,
+                 limite_saida: int, limite_cpu: float | None = None,
+                 limite_memoria: int | None = None, entrada_arquivo: str | None = None) -> dict:
+        '''Executa `script` num filho do servidor.
+
+        Parâmetros:
+        - `script` é o caminho do script.
+        - `args` são os argumentos da linha de comando.
+        - `entrada` é a entrada do teclado (None é uma entrada vazia).
+        - `timeout` é o tempo máximo de execução, em segundos.
+        - `limite_saida` é o número máximo de bytes da saída e do erro (cada um).
+        - `limite_cpu` é o tempo máximo de CPU, em segundos.
+        - `limite_memoria` é o tamanho máximo da memória do filho, em bytes.
+        - `entrada_arquivo` é o caminho de um arquivo com a entrada do teclado, usado no lugar de `entrada`.
+
+        Retorno:
+        A resposta do servidor (veja `atender`).
+
+        Lança `processo.ExecucaoCancelada` se a thread for interrompida (veja `processo.interromper`).
+        '''
+        from . import processo  # Só no cliente (veja a descrição do módulo)
+        pedido = json.dumps({'script': script, 'args': args, 'entrada': entrada, 'entrada_arquivo': entrada_arquivo,
+                             'timeout': timeout, 'limite_saida': limite_saida,
+                             'limite_cpu': limite_cpu, 'limite_memoria': limite_memoria})
+        with self._trava:
+            for tentativa in range(2):
+                if self._processo is None or self._processo.poll() is not None:
+                    self._iniciar()
+                try:
+                    self._processo.stdin.write(pedido + '\n')
+                    self._processo.stdin.flush()
+                    linha = self._processo.stdout.readline()
+                    if linha:
+                        with processo.registrar_grupo(json.loads(linha)['pid']):
+                            linha = self._processo.stdout.readline()
+                except BrokenPipeError:
+                    linha = ''
+                if linha:
+                    break
+                # O servidor morreu: tenta de novo com um servidor novo
+                self.encerrar()
+            else:
+                raise RuntimeError(f'O servidor de fork de "{self.comando}" não respondeu.')
+        processo.verificar_interrupcao()
+        return json.loads(linha)
+
+    def encerrar(self):
+        '''Encerra o processo do servidor, se houver.'''
+        if self._processo is not None:
+            try:
+                self._processo.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._processo.wait()
+            self._processo.stdout.close()
+            self._processo = None
+
+
+_servidores = threading.local()
+
+
+def obter_servidor(comando: str) -> ServidorFork:
+    '''Retorna o servidor de fork de `comando` da thread atual, criando-o se necessário.'''
+    if not hasattr(_servidores, 'por_comando'):
+        _servidores.por_comando = {}
+    servidor = _servidores.por_comando.get(comando)
+    if servidor is None:
+        servidor = ServidorFork(comando)
+        _servidores.por_comando[comando] = servidor
+    return servidor
+
+
+# PROGRAMA PRINCIPAL
+
+if __name__ == '__main__':
+    servir()
@@ -0,0 +1,137 @@
+'''Geradores de entradas de tamanho `n` para as correções (por exemplo, as de complexidade; veja `complexidade`).
+
+Um gerador é definido no arquivo de configuração por um dicionário com o nome do gerador em `"nome"`
+e os seus parâmetros, por exemplo `{"nome": "inteiros", "maximo": 1000, "ordem": "decrescente"}`.
+A entrada é produzida em blocos, sem montar o texto inteiro, e é sempre a mesma para o mesmo `n`
+e a mesma `"semente"` (padrão: 0).
+Os geradores ficam num registro, como as verificações; nomes e parâmetros desconhecidos causam `ErroConfiguracao`.
+'''
+
+import random, string
+
+from collections.abc import Iterator, Mapping
+from typing import Any, Callable
+
+from .erros import ErroConfiguracao
+
+# Constantes
+LINHAS_BLOCO = 4096  # Linhas produzidas por bloco
+
+
+# Classes
+
+class Gerador:
+    '''Um gerador compilado, pronto para produzir entradas.'''
+
+    def __init__(self, nome: str, func: Callable[..., Iterator[str]], parametros: dict):
+        self.nome: str = nome
+        self.func = func
+        self.parametros: dict = parametros
+
+    def gerar(self, n: int) -> Iterator[str]:
+        '''Produz a entrada de tamanho `n` em blocos de texto.'''
+        parametros = dict(self.parametros)
+        rng = random.Random(f'{parametros.pop("semente", 0)}:{n}')
+        return self.func(n, rng, **parametros)
+
+    def texto(self, n: int) -> str:
+        '''Retorna a entrada de tamanho `n` inteira.'''
+        return ''.join(self.gerar(n))
+
+
+# Registro
+
+GERADORES: dict[str, tuple[Callable[..., Iterator[str]], dict[str, Any], dict[str, tuple]]] = {}
+
+
+def registrar(nome: str, opcoes: dict[str, tuple] | None = None, **padroes):
+    '''Decorador que registra um gerador com o `nome` usado em `"nome"` e os seus parâmetros, com os valores padrão.
+    O gerador recebe `n`, um `random.Random` já com a semente e os parâmetros, e produz blocos de texto.
+    `opcoes` restringe parâmetros a alguns valores.'''
+    def decorador(func):
+        GERADORES[nome] = (func, {'semente': 0, **padroes}, opcoes or {})
+        return func
+    return decorador
+
+
+def compilar(espec: Mapping) -> Gerador:
+    '''Compila a definição de um gerador do arquivo de configuração.
+
+    Lança `ErroConfiguracao` se o gerador for desconhecido ou algum parâmetro for desconhecido ou de tipo diferente
+    do valor padrão.
+    '''
+    if not isinstance(espec, Mapping) or not isinstance(espec.get('nome'), str):
+        raise ErroConfiguracao(f'Gerador inválido: {espec!r}. Use {{"nome": ..., parâmetros...}}.')
+    nome = espec['nome']
+    if nome not in GERADORES:
+        raise ErroConfiguracao(f'Gerador "{nome}" desconhecido. Use um destes: {", ".join(sorted(GERADORES))}.')
+    func, padroes, opcoes = GERADORES[nome]
+    parametros = dict(padroes)
+    for chave, valor in espec.items():
+        if chave == 'nome':
+            continue
+        if chave not in padroes:
+            raise ErroConfiguracao(f'Parâmetro "{chave}" desconhecido para o gerador "{nome}". '
+                                   f'Use estes: {", ".join(padroes)}.')
+        padrao = padroes[chave]
+        if type(valor) is not type(padrao) and not (isinstance(padrao, float) and type(valor) is int):
+            raise ErroConfiguracao(f'Parâmetro "{chave}" do gerador "{nome}" deve ser do tipo '
+                                   f'{type(padrao).__name__}, não {valor!r}.')
+        if chave in opcoes and valor not in opcoes[chave]:
+            raise ErroConfiguracao(f'Parâmetro "{chave}" do gerador "{nome}" inválido: {valor!r}. '
+                                   f'Use um destes: {", ".join(map(repr, opcoes[chave]))}.')
+        parametros[chave] = valor
+    return Gerador(nome, func, parametros)
+
+
+# Funções
+
+def _em_linhas(valores: Iterator[str], n: int, cabecalho: bool, por_linha: int) -> Iterator[str]:
+    '''Agrupa `valores` em linhas de `por_linha` valores e as linhas em blocos, com `n` antes, se `cabecalho`.'''
+    if cabecalho:
+        yield f'{n}\n'
+    por_linha = max(1, por_linha)
+    linhas = []
+    linha = []
+    for valor in valores:
+        linha += [valor]
+        if len(linha) == por_linha:
+            linhas += [' '.join(linha)]
+            linha = []
+            if len(linhas) == LINHAS_BLOCO:
+                yield '\n'.join(linhas) + '\n'
+                linhas = []
+    if linha:
+        linhas += [' '.join(linha)]
+    if linhas:
+        yield '\n'.join(linhas) + '\n'
+
+
+@registrar('inteiros', opcoes={'ordem': ('aleatoria', 'crescente', 'decrescente')},
+           minimo=0, maximo=10 ** 9, ordem='aleatoria', cabecalho=True, por_linha=1)
+def inteiros(n: int, rng: random.Random, minimo: int, maximo: int, ordem: str, cabecalho: bool,
+             por_linha: int) -> Iterator[str]:
+    '''`n` inteiros entre `minimo` e `maximo`, em ordem `"aleatoria"`, `"crescente"` ou `"decrescente"`,
+    `por_linha` por linha, precedidos de uma linha com `n` se `cabecalho`.'''
+    valores = (rng.randint(minimo, maximo) for _ in range(n))
+    if ordem != 'aleatoria':
+        valores = sorted(valores, reverse=ordem == 'decrescente')
+    return _em_linhas((str(v) for v in valores), n, cabecalho, por_linha)
+
+
+@registrar('palavras', tamanho=5, cabecalho=True, por_linha=1)
+def palavras(n: int, rng: random.Random, tamanho: int, cabecalho: bool, por_linha: int) -> Iterator[str]:
+    '''`n` palavras aleatórias de `tamanho` letras minúsculas, `por_linha` por linha,
+    precedidas de uma linha com `n` se `cabecalho`.'''
+    valores = (''.join(rng.choices(string.ascii_lowercase, k=tamanho)) for _ in range(n))
+    return _em_linhas(valores, n, cabecalho, por_linha)
+
+
+@registrar('repetir', texto='', cabecalho=False)
+def repetir(n: int, _, texto: str, cabecalho: bool) -> Iterator[str]:
+    '''`texto` repetido `n` vezes, precedido de uma linha com `n` se `cabecalho`.'''
+    if cabecalho:
+        yield f'{n}\n'
+    vezes = max(1, LINHAS_BLOCO * 16 // max(1, len(texto)))
+    for inicio in range(0, n, vezes):
+        yield texto * min(vezes, n - inicio)
@@ -0,0 +1,168 @@
+'''Histórico das correções em SQLite, para consultas sobre a turma ao longo do tempo.
+
+Cada correção em lote com `--historico` é uma rodada, e cada correção de cada aluno é um registro da rodada
+(aluno, questão, correção, se passou, código de saída, tempos, memória e o hash da saída).
+Os registros são inseridos em lotes de `TAMANHO_LOTE`, cada um numa transação.
+As consultas consideram o último resultado de cada correção de cada aluno, exceto `tentativas`, que mostra todos.
+
+Uso (consultas):
+    python -m src.corretor.historico historico.db [--lentas N] [--aluno ALUNO]
+'''
+
+import argparse, hashlib, sqlite3, time
+
+# Constantes
+TAMANHO_LOTE = 500  # Registros inseridos por transação
+LENTAS = 10  # Correções exibidas por padrão em `--lentas`
+ESQUEMA = '''
+CREATE TABLE IF NOT EXISTS rodadas (
+    id INTEGER PRIMARY KEY,
+    inicio REAL NOT NULL,
+    config TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS execucoes (
+    id INTEGER PRIMARY KEY,
+    rodada INTEGER NOT NULL REFERENCES rodadas(id),
+    aluno TEXT NOT NULL,
+    questao INTEGER NOT NULL,
+    descricao TEXT NOT NULL,
+    correcao INTEGER NOT NULL,
+    passou INTEGER NOT NULL,
+    codigo INTEGER NOT NULL,
+    tempo REAL,
+    tempo_cpu REAL,
+    memoria INTEGER,
+    hash_saida TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS execucoes_aluno ON execucoes (aluno, questao, correcao);
+CREATE INDEX IF NOT EXISTS execucoes_correcao ON execucoes (questao, correcao);
+CREATE VIEW IF NOT EXISTS ultimas AS
+    SELECT * FROM execucoes WHERE id IN (SELECT MAX(id) FROM execucoes GROUP BY aluno, questao, correcao);
+'''
+COLUNAS = ('rodada', 'aluno', 'questao', 'descricao', 'correcao', 'passou', 'codigo',
+           'tempo', 'tempo_cpu', 'memoria', 'hash_saida')
+
+
+# Classes
+
+class Historico:
+    '''Um banco SQLite com os resultados das correções.
+
+    Não é seguro para uso por várias threads: na correção em lote, só o processo principal o usa.
+    '''
+
+    def __init__(self, caminho: str):
+        '''Abre (ou cria) o banco em `caminho`.'''
+        self.caminho: str = caminho
+        self._conexao = sqlite3.connect(caminho)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute('PRAGMA journal_mode = WAL')
+        self._conexao.execute('PRAGMA synchronous = NORMAL')
+        self._conexao.executescript(ESQUEMA)
+        self._pendentes: list[tuple] = []
+
+    def __enter__(self) -> 'Historico':
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def iniciar_rodada(self, caminho_config: str) -> int:
+        '''Registra o início de uma rodada de correção e retorna o seu id.'''
+        with self._conexao:
+            cursor = self._conexao.execute('INSERT INTO rodadas (inicio, config) VALUES (?, ?)',
+                                           (time.time(), caminho_config))
+        return cursor.lastrowid
+
+    def registrar(self, rodada: int, registros: list[dict]):
+        '''Acrescenta os registros de correção (`"tipo": "correcao"`; veja `lote.corrigir_aluno`) à rodada.
+        Eles são gravados quando houver `TAMANHO_LOTE` pendentes ou em `gravar`.'''
+        for r in registros:
+            if r['tipo'] != 'correcao':
+                continue
+            hash_saida = hashlib.sha256(r['saida'].encode('utf-8', 'surrogateescape')).hexdigest()
+            self._pendentes += [(rodada, r['aluno'], r['questao'], r['descricao'], r['correcao'],
+                                 int(r['passou']), r['codigo'], r['tempo'], r['tempo_cpu'], r['memoria'],
+                                 hash_saida)]
+        if len(self._pendentes) >= TAMANHO_LOTE:
+            self.gravar()
+
+    def gravar(self):
+        '''Grava os registros pendentes numa única transação.'''
+        if not self._pendentes:
+            return
+        with self._conexao:
+            self._conexao.executemany(
+                f'INSERT INTO execucoes ({", ".join(COLUNAS)}) VALUES ({", ".join("?" * len(COLUNAS))})',
+                self._pendentes)
+        self._pendentes = []
+
+    def fechar(self):
+        '''Grava os registros pendentes e fecha o banco.'''
+        self.gravar()
+        self._conexao.close()
+
+    def taxas_aprovacao(self) -> list[dict]:
+        '''Retorna, para cada correção de cada questão, o número de alunos, o de aprovados e a taxa de aprovação
+        (chaves `questao`, `correcao`, `descricao`, `alunos`, `aprovados` e `taxa`), da menor taxa para a maior.'''
+        return self._consultar('''
+            SELECT questao, correcao, descricao, COUNT(*) AS alunos, SUM(passou) AS aprovados,
+                   AVG(passou) AS taxa
+            FROM ultimas GROUP BY questao, correcao ORDER BY taxa, questao, correcao''')
+
+    def mais_lentas(self, n: int = LENTAS) -> list[dict]:
+        '''Retorna as `n` execuções mais demoradas (chaves `aluno`, `questao`, `correcao`, `descricao`,
+        `passou`, `tempo`, `tempo_cpu` e `memoria`).'''
+        return self._consultar('''
+            SELECT aluno, questao, correcao, descricao, passou, tempo, tempo_cpu, memoria
+            FROM ultimas WHERE tempo IS NOT NULL ORDER BY tempo DESC LIMIT ?''', (n,))
+
+    def tentativas(self, aluno: str) -> list[dict]:
+        '''Retorna todos os resultados do aluno, de todas as rodadas, por correção e depois por rodada
+        (chaves `rodada`, `inicio`, `questao`, `correcao`, `descricao`, `passou`, `codigo`, `tempo` e `hash_saida`).'''
+        return self._consultar('''
+            SELECT e.rodada, r.inicio, e.questao, e.correcao, e.descricao, e.passou, e.codigo, e.tempo, e.hash_saida
+            FROM execucoes e JOIN rodadas r ON r.id = e.rodada
+            WHERE e.aluno = ? ORDER BY e.questao, e.correcao, e.id''', (aluno,))
+
+    def _consultar(self, sql: str, parametros: tuple = ()) -> list[dict]:
+        self.gravar()
+        return [dict(linha) for linha in self._conexao.execute(sql, parametros)]
+
+
+# Funções
+
+def _formatar_tempo(tempo: float | None) -> str:
+    return '-' if tempo is None else f'{tempo:.3f}s'
+
+
+# PROGRAMA PRINCIPAL
+
+def main(argv: list[str] | None = None):
+    '''Exibe as taxas de aprovação e as correções mais lentas (ou o histórico de um aluno).'''
+    parser = argparse.ArgumentParser(description='Consulta o histórico das correções.')
+    parser.add_argument('historico', help='arquivo SQLite gravado com "lote --historico"')
+    parser.add_argument('--lentas', type=int, default=LENTAS, metavar='N',
+                        help=f'número de execuções mais lentas exibidas (padrão: {LENTAS})')
+    parser.add_argument('--aluno', default=None, help='exibe todas as tentativas deste aluno')
+    args = parser.parse_args(argv)
+    with Historico(args.historico) as historico:
+        if args.aluno:
+            for t in historico.tentativas(args.aluno):
+                inicio = time.strftime('%Y-%m-%d %H:%M', time.localtime(t['inicio']))
+                print(f'{inicio}  Q{t["questao"] + 1}.{t["correcao"] + 1} {t["descricao"]}: '
+                      f'{"passou" if t["passou"] else "falhou"} (código {t["codigo"]}, '
+                      f'{_formatar_tempo(t["tempo"])}, saída {t["hash_saida"][:8]})')
+            return
+        print('Taxas de aprovação:')
+        for t in historico.taxas_aprovacao():
+            print(f'  Q{t["questao"] + 1}.{t["correcao"] + 1} {t["descricao"]}: '
+                  f'{t["aprovados"]}/{t["alunos"]} ({t["taxa"]:.0%})')
+        print('Execuções mais lentas:')
+        for t in historico.mais_lentas(args.lentas):
+            print(f'  {_formatar_tempo(t["tempo"])}  {t["aluno"]}  Q{t["questao"] + 1}.{t["correcao"] + 1} '
+                  f'{t["descricao"]}{"" if t["passou"] else " (falhou)"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,390 @@
+'''Correção em lote, sem interface gráfica, das submissões de uma turma.
+
+Cada subpasta do diretório de submissões contém os scripts de um aluno, com os mesmos nomes usados no arquivo de configuração.
+Os resultados são gravados em JSONL (e, opcionalmente, CSV) à medida que cada aluno é corrigido.
+Se a correção for interrompida, basta executar o mesmo comando novamente: os alunos já corrigidos são pulados.
+
+Com `--trabalhadores`, as correções são distribuídas entre trabalhadores em outras máquinas (veja `distribuido`).
+Com `--historico`, os resultados também são acrescentados a um banco SQLite, para consultas sobre a turma (veja `historico`).
+
+Uso:
+    python -m src.corretor.lote config.json submissoes/ -o resultados.jsonl [--csv resultados.csv] [-j WORKERS] [--sem-cache]
+        [--rastreio rastro.json] [--trabalhadores HOST:PORTA ...] [--segredo SEGREDO] [--historico historico.db]
+'''
+
+import argparse, csv, functools, json, os, sys
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, TYPE_CHECKING
+
+from . import rastreio
+from .cache import CacheResultados
+from .erros import ErroConfiguracao, ErroDistribuido
+from .modelo import Atividade, agrupar_execucoes
+from .execucao import WORKERS
+
+if TYPE_CHECKING:
+    from .distribuido import Coordenador
+
+# Constantes
+CAMPOS_CSV = ['aluno', 'questao', 'descricao', 'correcao', 'passou', 'codigo', 'tempo',
+              'tempo_cpu', 'memoria', 'erro']
+
+
+# Cache de resultados de cada processo do pool (veja `_iniciar_worker`)
+_cache: CacheResultados | None = None
+
+
+# Funções
+
+def listar_alunos(pasta: str) -> list[tuple[str, str]]:
+    '''Retorna as submissões em `pasta` como tuplas `(aluno, caminho)`, ordenadas pelo nome do aluno.'''
+    alunos = []
+    with os.scandir(pasta) as entradas:
+        for entrada in entradas:
+            if entrada.is_dir() and not entrada.name.startswith('.'):
+                alunos += [(entrada.name, entrada.path)]
+    alunos.sort()
+    return alunos
+
+
+def corrigir_aluno(caminho_config: str, aluno: str, pasta: str,
+                   cache: CacheResultados | None = None,
+                   coordenador: 'Coordenador | None' = None) -> list[dict]:
+    '''Corrige a submissão de um aluno.
+
+    Parâmetros:
+    - `caminho_config` é o caminho para o arquivo de configuração da atividade.
+    - `aluno` é o nome do aluno.
+    - `pasta` é o diretório com os scripts do aluno.
+    - `cache` é o cache de resultados passado para `Correcao.corrigir`.
+    - `coordenador` distribui as correções entre trabalhadores. Se omitido, elas são executadas neste processo.
+
+    Retorno:
+    Os registros de cada correção (`"tipo": "correcao"`) seguidos do registro-resumo do aluno (`"tipo": "aluno"`).
+    '''
+    atividade = Atividade.ler_arquivo_config(caminho_config, diretorio=pasta,
+                                             diretorio_cache=cache.diretorio if cache else None)
+    acertos = cache.acertos if cache else 0
+    falhas = cache.falhas if cache else 0
+    # Cada execução distinta do script é feita uma só vez, e a saída é verificada por todas as correções que a usam
+    correcoes = [c for q in atividade.questoes for c in q.correcoes]
+    grupos = agrupar_execucoes(correcoes)
+    resultados = {}
+    if coordenador is None:
+        for grupo in grupos:
+            try:
+                resultados.update(zip(grupo.correcoes, grupo.corrigir(cache)))
+            except Exception as e:
+                resultados.update((c, (False, -1, '', f'Erro interno do corretor: {e}\n')) for c in grupo.correcoes)
+    else:
+        futuros = [(grupo, coordenador.submeter(grupo)) for grupo in grupos]
+        for grupo, futuro in futuros:
+            try:
+                resultados.update(zip(grupo.correcoes, futuro.result()))
+            except Exception as e:
+                resultados.update((c, (False, -1, '', f'Erro interno do corretor: {e}\n')) for c in grupo.correcoes)
+    registros = []
+    corretas = 0
+    nota = 0
+    for i, questao in enumerate(atividade.questoes):
+        questao_correta = True
+        for j, correcao in enumerate(questao.correcoes):
+            passou, codigo, saida, erro = resultados[correcao]
+            execucao = correcao.ultima_execucao
+            medidas = execucao.medidas if execucao else {'tempo': None, 'tempo_cpu': None, 'memoria': None}
+            questao_correta = questao_correta and passou
+            registros += [{
+                'tipo': 'correcao',
+                'aluno': aluno,
+                'questao': i,
+                'descricao': questao.descricao,
+                'correcao': j,
+                'comando': correcao.comando_completo_str,
+                'passou': passou,
+                'codigo': codigo,
+                'saida': saida,
+                'erro': erro,
+                **medidas,
+            }]
+        if questao_correta:
+            corretas += 1
+            nota += questao.pontos
+    registros += [{
+        'tipo': 'aluno',
+        'aluno': aluno,
+        'corretas': corretas,
+        'questoes': len(atividade.questoes),
+        'nota': nota,
+        'cache_acertos': cache.acertos - acertos if cache else 0,
+        'cache_falhas': cache.falhas - falhas if cache else 0,
+        'execucoes_evitadas': len(correcoes) - len(grupos),
+    }]
+    return registros
+
+
+def _iniciar_worker(usar_cache: bool, rastrear: bool = False):
+    '''Inicializa um processo do pool.'''
+    global _cache
+    _cache = CacheResultados() if usar_cache else None
+    if rastrear:
+        rastreio.ativar()
+
+
+def _criar_pool(workers: int, usar_cache: bool) -> ProcessPoolExecutor:
+    '''Cria o pool de processos que corrige os alunos (veja `_corrigir_aluno_worker`).'''
+    return ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                               initargs=(usar_cache, rastreio.ativo))
+
+
+def _corrigir_aluno_worker(caminho_config: str, aluno: str,
+                           pasta: str) -> tuple[list[dict], dict | None]:
+    '''Executa `corrigir_aluno` num processo do pool, com o cache do processo.
+
+    Retorno:
+    Os registros e, se a instrumentação estiver ativa, os intervalos registrados (veja `rastreio.coletar`).
+    '''
+    registros = corrigir_aluno(caminho_config, aluno, pasta, _cache)
+    return registros, rastreio.coletar() if rastreio.ativo else None
+
+
+def _corrigir_aluno_distribuido(coordenador: 'Coordenador', caminho_config: str, aluno: str,
+                                pasta: str) -> tuple[list[dict], None]:
+    '''Executa `corrigir_aluno` numa thread, distribuindo as correções entre os trabalhadores do `coordenador`.'''
+    return corrigir_aluno(caminho_config, aluno, pasta, coordenador=coordenador), None
+
+
+def _ler_registros(caminho: str) -> Iterator[dict | None]:
+    '''Lê os registros de um arquivo JSONL. Linhas inválidas (por exemplo, truncadas por uma queda) geram `None`.'''
+    with open(caminho, encoding='utf-8') as arq:
+        for linha in arq:
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                yield None
+
+
+def ler_concluidos(caminho_jsonl: str) -> set[str]:
+    '''Retorna os alunos cuja correção está completa em `caminho_jsonl`.
+    Também descarta do arquivo os registros de alunos incompletos e linhas inválidas, para que a correção possa continuar.'''
+    if not os.path.isfile(caminho_jsonl):
+        return set()
+    concluidos = set()
+    sujo = False
+    for registro in _ler_registros(caminho_jsonl):
+        if registro is None:
+            sujo = True
+        elif registro['tipo'] == 'aluno':
+            concluidos.add(registro['aluno'])
+    # Descarta registros de alunos sem resumo (interrompidos no meio da escrita)
+    for registro in _ler_registros(caminho_jsonl):
+        if registro is not None and registro['aluno'] not in concluidos:
+            sujo = True
+            break
+    if sujo:
+        temporario = f'{caminho_jsonl}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arq:
+            for registro in _ler_registros(caminho_jsonl):
+                if registro is not None and registro['aluno'] in concluidos:
+                    print(json.dumps(registro, ensure_ascii=False), file=arq)
+        os.replace(temporario, caminho_jsonl)
+    return concluidos
+
+
+def _filtrar_csv(caminho_csv: str, concluidos: set[str]):
+    '''Mantém no CSV apenas as linhas dos alunos concluídos, que são os mesmos do JSONL.'''
+    if not os.path.isfile(caminho_csv):
+        return
+    temporario = f'{caminho_csv}.tmp'
+    with open(caminho_csv, newline='', encoding='utf-8') as entrada, \
+         open(temporario, 'w', newline='', encoding='utf-8') as saida:
+        escritor = csv.DictWriter(saida, CAMPOS_CSV)
+        escritor.writeheader()
+        for linha in csv.DictReader(entrada):
+            if linha['aluno'] in concluidos:
+                escritor.writerow(linha)
+    os.replace(temporario, caminho_csv)
+
+
+def corrigir_lote(caminho_config: str, pasta_submissoes: str, caminho_jsonl: str,
+                  caminho_csv: str | None = None, workers: int | None = None,
+                  usar_cache: bool = True, verboso: bool = False,
+                  trabalhadores: list[tuple[str, int]] | None = None,
+                  caminho_historico: str | None = None, segredo: str | None = None) -> int:
+    '''Corrige todas as submissões em paralelo, gravando os resultados à medida que ficam prontos.
+
+    No máximo `2 * workers` alunos ficam em memória ao mesmo tempo, independentemente do tamanho da turma.
+    Um aluno cuja correção falha (por um erro interno ou porque o seu processo morreu) é relatado na saída de erro
+    e fica pendente, para ser corrigido na próxima execução; os outros continuam sendo corrigidos.
+
+    Parâmetros:
+    - `caminho_config` é o caminho para o arquivo de configuração da atividade.
+    - `pasta_submissoes` é o diretório com uma subpasta por aluno.
+    - `caminho_jsonl` é o arquivo de resultados. Se já existir, os alunos concluídos nele são pulados.
+    - `caminho_csv` é um arquivo CSV opcional com uma linha por correção.
+    - `workers` é o número de processos. O padrão é o número de processadores.
+      Com `trabalhadores`, é o número de alunos corrigidos ao mesmo tempo, e o padrão é a capacidade total deles.
+    - `usar_cache` indica se resultados de execuções anteriores de scripts que não mudaram devem ser reaproveitados.
+      Com `trabalhadores`, cada trabalhador usa o seu próprio cache.
+    - `verboso` indica se o progresso deve ser exibido na saída de erro.
+    - `trabalhadores` são os endereços `(host, porta)` de trabalhadores entre os quais distribuir as correções
+      (veja `distribuido`). Se omitido, as correções são executadas nesta máquina.
+    - `caminho_historico` é um banco SQLite opcional ao qual os resultados desta execução são acrescentados
+      como uma nova rodada (veja `historico`).
+    - `segredo` é o segredo compartilhado com os `trabalhadores`. O padrão é o valor de `$CORRETOR_SEGREDO`.
+
+    Retorno:
+    O número de alunos corrigidos nesta execução.
+
+    Lança `ErroConfiguracao` se o arquivo de configuração for inválido
+    e `ErroDistribuido` se o segredo não estiver definido ou se não for possível se conectar a nenhum trabalhador.
+    '''
+    caminho_config = os.path.abspath(caminho_config)
+    # Erros no arquivo de configuração aparecem aqui, antes de corrigir qualquer aluno
+    Atividade.ler_arquivo_config(caminho_config)
+    concluidos = ler_concluidos(caminho_jsonl)
+    if caminho_csv:
+        _filtrar_csv(caminho_csv, concluidos)
+    pendentes = [a for a in listar_alunos(pasta_submissoes) if a[0] not in concluidos]
+    total = len(pendentes)
+
+    # Conecta-se aos trabalhadores antes de abrir qualquer arquivo: sem eles, nada é corrigido
+    coordenador = None
+    if trabalhadores:
+        from .distribuido import Coordenador  # O socket só é necessário com --trabalhadores
+        coordenador = Coordenador(trabalhadores, segredo=segredo)
+        workers = workers or coordenador.capacidade
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lote')
+        corrigir = functools.partial(_corrigir_aluno_distribuido, coordenador)
+    else:
+        workers = workers or WORKERS
+        pool = _criar_pool(workers, usar_cache)
+        corrigir = _corrigir_aluno_worker
+
+    historico = None
+    if caminho_historico:
+        from .historico import Historico  # O sqlite3 só é necessário com --historico
+        historico = Historico(caminho_historico)
+        rodada = historico.iniciar_rodada(caminho_config)
+
+    arq_jsonl = open(caminho_jsonl, 'a', encoding='utf-8')
+    arq_csv = None
+    escritor_csv = None
+    if caminho_csv:
+        novo = not os.path.isfile(caminho_csv) or os.path.getsize(caminho_csv) == 0
+        arq_csv = open(caminho_csv, 'a', newline='', encoding='utf-8')
+        escritor_csv = csv.DictWriter(arq_csv, CAMPOS_CSV, extrasaction='ignore')
+        if novo:
+            escritor_csv.writeheader()
+
+    corrigidos = 0
+    acertos = falhas = 0
+    evitadas = 0
+    try:
+        alunos = iter(pendentes)
+        # Aluno e pool de cada correção em andamento
+        em_andamento: dict[Future, tuple[str, ThreadPoolExecutor | ProcessPoolExecutor]] = {}
+        while True:
+            # Mantém a fila de trabalho limitada
+            for aluno, pasta in alunos:
+                em_andamento[pool.submit(corrigir, caminho_config, aluno, pasta)] = (aluno, pool)
+                if len(em_andamento) >= 2 * workers:
+                    break
+            if not em_andamento:
+                break
+            prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                aluno, pool_futuro = em_andamento.pop(futuro)
+                try:
+                    registros, rastro = futuro.result()
+                except Exception as e:
+                    print(f'{aluno}: a correção falhou ({type(e).__name__}: {e}); '
+                          'o aluno fica pendente para a próxima execução.', file=sys.stderr)
+                    if isinstance(e, BrokenProcessPool) and pool_futuro is pool:
+                        # Um processo morreu: o pool não aceita mais trabalho, e os alunos seguintes vão para outro
+                        pool.shutdown(wait=False)
+                        pool = _criar_pool(workers, usar_cache)
+                    continue
+                if rastro:
+                    rastreio.incorporar(rastro)
+                # O JSONL é gravado primeiro, com o resumo por último: ele define quem está concluído
+                arq_jsonl.write(''.join(json.dumps(r, ensure_ascii=False) + '\n'
+                                        for r in registros))
+                arq_jsonl.flush()
+                os.fsync(arq_jsonl.fileno())
+                if escritor_csv:
+                    escritor_csv.writerows(r for r in registros if r['tipo'] == 'correcao')
+                    arq_csv.flush()
+                if historico:
+                    historico.registrar(rodada, registros)
+                corrigidos += 1
+                resumo = registros[-1]
+                acertos += resumo['cache_acertos']
+                falhas += resumo['cache_falhas']
+                evitadas += resumo['execucoes_evitadas']
+                if verboso:
+                    print(f'[{corrigidos}/{total}] {resumo["aluno"]}: '
+                          f'{resumo["corretas"]} de {resumo["questoes"]} ({resumo["nota"]} pts)',
+                          file=sys.stderr)
+    finally:
+        pool.shutdown()
+        if coordenador is not None:
+            coordenador.encerrar()
+        arq_jsonl.close()
+        if arq_csv:
+            arq_csv.close()
+        if historico:
+            historico.fechar()
+    if verboso and usar_cache and coordenador is None:
+        print(f'Cache: {acertos} acertos, {falhas} falhas', file=sys.stderr)
+    if verboso:
+        print(f'Execuções repetidas evitadas: {evitadas}', file=sys.stderr)
+    return corrigidos
+
+
+# PROGRAMA PRINCIPAL
+
+def main(argv: list[str] | None = None):
+    '''Executa a correção em lote a partir da linha de comando.'''
+    parser = argparse.ArgumentParser(description='Corrige em lote as submissões de uma turma.')
+    parser.add_argument('config', help='arquivo de configuração da atividade')
+    parser.add_argument('submissoes', help='diretório com uma subpasta por aluno')
+    parser.add_argument('-o', '--saida', default='resultados.jsonl',
+                        help='arquivo JSONL de resultados (padrão: resultados.jsonl)')
+    parser.add_argument('--csv', default=None, help='arquivo CSV de resultados (opcional)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='número de processos (padrão: número de processadores)')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='sempre executa os scripts, sem reaproveitar resultados anteriores')
+    parser.add_argument('--rastreio', metavar='ARQUIVO', default=None,
+                        help='grava a duração de cada fase da correção em ARQUIVO (formato Chrome Trace) '
+                             f'e exibe um resumo ao final (o mesmo que ${rastreio.VARIAVEL_AMBIENTE})')
+    parser.add_argument('--trabalhadores', nargs='+', metavar='HOST:PORTA', default=None,
+                        help='distribui as correções entre trabalhadores iniciados com '
+                             '"python -m src.corretor.distribuido" nessas máquinas')
+    parser.add_argument('--historico', metavar='ARQUIVO', default=None,
+                        help='acrescenta os resultados ao banco SQLite ARQUIVO; consulte-o com '
+                             '"python -m src.corretor.historico ARQUIVO"')
+    parser.add_argument('--segredo', default=None,
+                        help='segredo compartilhado com os trabalhadores (padrão: $CORRETOR_SEGREDO)')
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.config):
+        parser.error(f'arquivo de configuração "{args.config}" não encontrado')
+    rastreio.configurar(args.rastreio)
+    trabalhadores = None
+    if args.trabalhadores:
+        from .distribuido import ler_endereco
+        trabalhadores = [ler_endereco(t) for t in args.trabalhadores]
+    try:
+        corrigir_lote(args.config, args.submissoes, args.saida, args.csv,
+                      workers=args.workers, usar_cache=not args.sem_cache, verboso=True,
+                      trabalhadores=trabalhadores, caminho_historico=args.historico, segredo=args.segredo)
+    except ErroConfiguracao as e:
+        parser.error(f'erro no arquivo de configuração "{args.config}": {e}')
+    except ErroDistribuido as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,835 @@
+'''O modelo do corretor: atividades, questões e correções, sem a interface gráfica.
+
+Este módulo não importa o Tk: a correção em lote, os trabalhadores distribuídos e os testes usam só ele,
+e a interface (veja `corretor`) é montada sobre ele. Os módulos usados só por alguns modos e tipos de correção
+(o servidor de fork e o chamador de funções) são importados na primeira vez em que são usados.
+'''
+
+import json, os, sys
+
+from . import analise, complexidade, entradas, plano, rastreio
+from .cache import CacheResultados, versao_interpretador
+from .complexidade import MODELOS
+from .erros import ErroConfiguracao
+from .processo import Execucao, LIMITE_SAIDA, Limites, executar_processo, montar_execucao
+from .verificacoes import Verificacao, compilar as compilar_verificacao
+
+# Constantes
+TIMEOUT = 5
+MODOS = ('subprocesso', 'fork')
+TIMEOUT_CASO = 1  # Tempo máximo padrão, em segundos, de cada caso de uma correção de função
+VERSAO_CHAMADOR = 1  # Mude quando `chamador` mudar, para invalidar os resultados guardados no cache
+TAMANHO_BASE = 1  # Tamanho da entrada com que as correções de complexidade medem o tempo de iniciar o script
+
+# Classes
+
+class Questao:
+    '''Uma questão para corrigir.'''
+
+    def __init__(self, descricao: str, pontos: int, correcoes: list['Correcao']):
+        '''Construtor.
+
+        Parâmetros:
+        - `descricao` é uma descrição da questão.
+        - `pontos` são os pontos (nota) da questão.
+        - `correcoes` são os argumentos e verificações da saída do script para corrigir a questão.
+        '''
+        self.descricao = descricao
+        self.correcoes = correcoes
+        self.pontos = pontos
+    
+    @classmethod
+    def ler_config(cls, config: dict) -> 'Questao':
+        '''Cria uma instância a partir do dict obtido da leitura do arquivo de configuração.
+        
+        Parâmetros:
+        - `config`  são as configurações de uma questão (um elemento da lista "questoes"), já com os valores herdados.
+        '''
+        return cls.do_plano(plano._Compilador().questao(config, 'a questão'))
+
+    @classmethod
+    def do_plano(cls, plano_questao: plano.PlanoQuestao, diretorio: str | None = None) -> 'Questao':
+        '''Cria uma instância a partir de uma questão do plano de correção (veja `plano`).'''
+        correcoes = [criar_correcao(c, diretorio) for c in plano_questao.correcoes]
+        return cls(plano_questao.descricao, plano_questao.pontos, correcoes)
+
+
+class Correcao:
+    '''Uma correção de uma questão: executa o script e verifica a saída.'''
+    tipo = 'programa'
+
+    def __init__(self, comando: str, diretorio: str, script: str, 
+                 msg_erro: str,
+                 verificacoes: list = [],
+                 entrada: str | dict = '', args: str = '',
+                 modo: str = 'subprocesso', limite_saida: int = LIMITE_SAIDA,
+                 timeout: float | None = None, limite_cpu: float | None = None,
+                 limite_memoria: float | None = None, entrada_arquivo: str | None = None, **_):
+        '''Construtor.
+        
+        Parâmetros:
+        - `comando` é o comando do terminal para executar o script da resposta.
+        - `diretorio` é o diretório base, onde fica o arquivo de configuração. O caminho para o `script` é relativo a ele.
+        - `script` é o script da resposta.
+        - `msg_erro` mensagem de erro amigável ao usuário.
+        - `verificacoes` é uma lista de dicionários {"func_expect" : ..., "args_expect" : ...}, onde:
+            - `func_expect` é a função que verifica a saída do script.
+            - `args_expect` são os argumentos da função que verifica a saída do script.
+        - `entrada` é a entrada do teclado: um texto ou a definição de um gerador, `{"gerador": {...}, "n": ...}`
+          (veja `entradas`).
+        - `args` são os argumentos da linha de comando.
+        - `modo` é como o script é executado: `"subprocesso"` (um interpretador novo por execução) ou
+          `"fork"` (um filho de um interpretador Python pré-aquecido; veja `forkserver`).
+          Onde não há `fork` (Windows), o modo `"fork"` usa subprocessos.
+        - `limite_saida` é o número máximo de bytes da saída (e do erro) do script.
+          Ao exceder, o script é interrompido e a correção falha.
+        - `timeout` é o tempo máximo de execução (de relógio), em segundos. O padrão é `TIMEOUT`.
+        - `limite_cpu` é o tempo máximo de CPU do script, em segundos. Se None, não há limite além do timeout.
+        - `limite_memoria` é a memória máxima do script, em MB. Se None, não há limite.
+        Os limites de CPU e de memória só são aplicados em sistemas POSIX.
+        - `entrada_arquivo` é um arquivo com a entrada do teclado, relativo ao `diretorio` (ou absoluto).
+          Se definido, `entrada` é ignorada.
+
+        Lança `ErroConfiguracao` se o modo ou a entrada forem inválidos ou algum limite não for um número positivo.
+        '''
+        if modo not in MODOS:
+            raise ErroConfiguracao(f'Modo de execução "{modo}" inválido. Use um destes: {", ".join(MODOS)}.')
+        for nome, valor in [('timeout', timeout), ('limite_cpu', limite_cpu),
+                            ('limite_memoria', limite_memoria), ('limite_saida', limite_saida)]:
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, (int, float))
+                                      or valor <= 0):
+                raise ErroConfiguracao(f'"{nome}" deve ser um número positivo, não {valor!r}.')
+        self.comando: str = comando
+        self.diretorio: str = diretorio
+        self.script: str = script
+        self.msg_erro: str = msg_erro
+        self.verificacoes = verificacoes
+        self.entrada: str | dict = entrada
+        self.entrada_arquivo: str | None = entrada_arquivo
+        entradas.criar(entrada, entrada_arquivo, diretorio)  # Valida a entrada
+        self.args: str = args
+        self.modo: str = modo
+        self.limite_saida: int = limite_saida
+        self.timeout: float | None = timeout
+        self.limite_cpu: float | None = limite_cpu
+        self.limite_memoria: float | None = limite_memoria
+        # A última execução do script (ou a guardada no cache), com o tempo e a memória medidos
+        self.ultima_execucao: Execucao | None = None
+        # O retorno de `corrigir` da última correção concluída (e não cancelada) na interface.
+        # Fica guardado aqui para ser exibido quando o widget da correção for montado.
+        self.resultado: tuple[bool, int, str, str] | None = None
+
+    @property
+    def limites(self) -> Limites:
+        '''Os limites de recursos da execução do script.'''
+        memoria = None if self.limite_memoria is None else int(self.limite_memoria * 1024 * 1024)
+        return Limites(self.timeout or TIMEOUT, self.limite_saida, self.limite_cpu, memoria)
+
+    @property
+    def verificacoes(self) -> list[dict]:
+        '''As verificações, como definidas no arquivo de configuração.
+        Ao atribuir, elas são compiladas (veja `verificacoes.compilar`).'''
+        return self._verificacoes_config
+
+    @verificacoes.setter
+    def verificacoes(self, verificacoes: list[dict]):
+        self._verificacoes: list[Verificacao] = [compilar_verificacao(v, self.diretorio)
+                                                 for v in verificacoes]
+        self._verificacoes_config: list[dict] = verificacoes
+
+    @classmethod
+    def ler_config(cls, config: dict) -> 'Correcao':
+        '''Cria uma instância a partir do dict obtido da leitura do arquivo config.json.
+        
+        Parâmetros:
+        - `config` são as configurações de uma correção (um elemento da lista "correcoes"), já com os valores herdados.
+          Veja as chaves das verificações em `plano._Compilador.correcao`.
+
+        Retorno:
+        O objeto `Correcao`.
+
+        Lança `ErroConfiguracao` se faltar alguma chave ou alguma verificação usar uma função desconhecida ou argumentos inválidos.
+        '''
+        return cls.do_plano(plano.compilar_correcao(config))
+
+    @classmethod
+    def do_plano(cls, plano_correcao: plano.PlanoCorrecao, diretorio: str | None = None) -> 'Correcao':
+        '''Cria uma instância a partir de uma correção do plano de correção (veja `plano`).
+
+        Parâmetros:
+        - `plano_correcao` é a correção do plano.
+        - `diretorio` é o diretório dos scripts, usado se o plano não definir um.
+
+        Lança `ErroConfiguracao` se nenhum diretório for definido ou se alguma verificação for inválida.
+        '''
+        valores = {campo: plano._descongelar(getattr(plano_correcao, campo))
+                   for campo in plano.CAMPOS_CORRECAO}
+        valores['diretorio'] = valores['diretorio'] or diretorio
+        if valores['diretorio'] is None:
+            raise ErroConfiguracao('O diretório dos scripts não foi definido.')
+        return cls(verificacoes=list(plano_correcao.verificacoes), **valores)
+
+    @property
+    def fonte_entrada(self) -> entradas.Entrada:
+        '''A entrada do teclado (veja `entradas`).'''
+        return entradas.criar(self.entrada, self.entrada_arquivo, self.diretorio)
+
+    @property
+    def descricao_entrada(self) -> str:
+        '''A entrada, como exibida na interface: entradas grandes são resumidas ao tamanho e ao início.'''
+        return self.fonte_entrada.descricao()
+
+    @property
+    def chave_execucao(self) -> tuple:
+        '''Identifica a execução do script: correções com a mesma chave produzem a mesma saída
+        e só diferem nas verificações (veja `agrupar_execucoes`).'''
+        return (self.comando, self.diretorio, self.script, self.args, self.fonte_entrada.chave(), self.modo,
+                self.timeout, self.limite_saida, self.limite_cpu, self.limite_memoria)
+
+    @property
+    def comando_completo_str(self) -> str:
+        '''Retorna uma str concatenando o `comando_completo_list`.'''
+        comando_list = self.comando_completo_list
+        return ' '.join(comando_list)
+
+    @property
+    def comando_completo_list(self) -> list:
+        '''Retorna como list o comando para executar o script, incluindo o comando do terminal, script e argumentos.'''
+        script, args = self._script_e_args()
+        return [self.comando, script] + args
+
+    def _script_e_args(self) -> tuple[str, list[str]]:
+        '''Retorna o script executado pelo interpretador e os seus argumentos.'''
+        return f'{self.diretorio}/{self.script}', [self.args] if self.args else []
+
+    def corrigir(self, cache: CacheResultados | None = None) -> tuple[bool, int, str, str]:
+        '''Executa a correção.
+
+        Parâmetros:
+        - `cache` é um cache de resultados. Se o script, o comando, os argumentos e a entrada não mudaram desde
+          uma execução anterior guardada nele, o script não é executado de novo; só as verificações são refeitas.
+          Se omitido, o script é sempre executado.
+
+        Retorno:
+        - um booleano indicando se passou no teste ou não.
+        - o código de saída da execução do script.
+        - a saída do script.
+        - o erro, se houver, seja do script (arquivo não existe, erro de sintaxe, etc.) ou da resposta (saída diferente da esperada).
+        '''
+        with rastreio.intervalo('corrigir', script=self.script, entrada=self.fonte_entrada.resumo):
+            self.ultima_execucao = self.obter_execucao(cache)
+            return self.verificar(self.ultima_execucao)
+
+    def obter_execucao(self, cache: CacheResultados | None = None,
+                       observadores: list | None = None) -> Execucao:
+        '''Retorna a execução do script, guardada no `cache` ou nova.
+
+        Parâmetros:
+        - `cache` é o cache de resultados (veja `corrigir`).
+        - `observadores` interrompem o script antes do fim (veja `processo.executar_processo`).
+          O padrão são os desta correção, que interrompem o script quando alguma verificação já falhou com certeza.
+
+        Se a verificação prévia do script falhar (veja `diagnosticar`), ele não é executado.
+        '''
+        diagnostico = self.diagnosticar()
+        if diagnostico is not None:
+            return diagnostico
+        if cache is None:
+            return self.executar(observadores)
+        chave = cache.chave(self)
+        execucao = cache.obter(chave)
+        if observadores is None:
+            decididas = [v for v in self._verificacoes if v.decidida_no_fluxo]
+        else:
+            decididas = [v for o in _decisores(observadores) for v in o.decididas]
+        if execucao is not None and (execucao.truncada or execucao.resumida) and any(
+                v.chave not in execucao.vereditos for v in decididas):
+            # Guardada sem o veredito de alguma verificação que precisa da saída inteira
+            execucao = None
+        if execucao is None:
+            execucao = self.executar(observadores)
+            # Timeouts dependem da carga da máquina e execuções interrompidas têm só parte da saída
+            if not execucao.expirou and not execucao.interrompida:
+                cache.guardar(chave, execucao)
+        return execucao
+
+    def diagnosticar(self) -> Execucao | None:
+        '''Verificação prévia do script, sem executá-lo: ele deve existir e, se for um script Python executado
+        por este mesmo interpretador, ser compilado sem erros. A compilação é feita uma vez por versão do script
+        (veja `analise.diagnosticar`). O arquivo de entrada, se houver, também deve existir.
+
+        Retorno:
+        None, se o script pode ser executado, ou uma execução com o erro (veja `analise.diagnosticar`).
+        '''
+        with rastreio.intervalo('diagnosticar', 'execucao', script=self.script):
+            diagnostico = analise.diagnosticar(f'{self.diretorio}/{self.script}', self.script,
+                                               _mesmo_interpretador(self.comando))
+        fonte = self.fonte_entrada
+        if diagnostico is None and isinstance(fonte, entradas.EntradaArquivo) and not os.path.isfile(fonte.caminho):
+            diagnostico = 1, f'Arquivo de entrada {fonte.caminho} não encontrado.'
+        if diagnostico is None:
+            return None
+        codigo, erro = diagnostico
+        return Execucao(codigo, '', erro)
+
+    def executar(self, observadores: list | None = None, entrada: entradas.Entrada | None = None) -> Execucao:
+        '''Executa o script da correção, sem verificar a saída.
+        `observadores` são os de `obter_execucao`; não são usados no modo fork.
+        `entrada` substitui a entrada da correção, se dada.
+
+        Se alguma verificação é decidida durante a execução (veja `Verificacao.decidida_no_fluxo`), o script é
+        executado num subprocesso, também no modo fork, e a saída pode passar do limite sem interrompê-lo:
+        a verificação a recebe inteira e o veredito fica na execução (veja `Execucao.vereditos`).'''
+        if entrada is None:
+            entrada = self.fonte_entrada
+        if observadores is None:
+            observadores = self._observadores()
+        decisores = _decisores(observadores)
+        if self.modo == 'fork' and _forkserver_disponivel() and not decisores:
+            return self._executar_fork(entrada)
+        execucao = self._executar_subprocesso(observadores, entrada, limitar_saida=not decisores)
+        completa = not (execucao.expirou or execucao.interrompida)
+        for decisor in decisores:
+            execucao.vereditos.update(decisor.vereditos(completa))
+        return execucao
+
+    def _executar_subprocesso(self, observadores: list, entrada: entradas.Entrada,
+                              limitar_saida: bool = True) -> Execucao:
+        '''Executa o script num interpretador novo.'''
+        return executar_processo(self.comando_completo_list, entrada, self.limites, observadores, limitar_saida)
+
+    def _observadores(self) -> list:
+        '''Retorna os observadores que interrompem o script quando alguma verificação já falhou com certeza
+        e que decidem as verificações que precisam da saída inteira.'''
+        antecipaveis = [v for v in self._verificacoes if v.antecipavel]
+        decididas = [v for v in self._verificacoes if v.decidida_no_fluxo]
+        if not antecipaveis:
+            return []
+        return [_ObservadorFalha([antecipaveis], decididas)]
+
+    def _executar_fork(self, entrada: entradas.Entrada) -> Execucao:
+        '''Executa o script num filho do servidor de fork desta thread.
+        Entradas que não são texto chegam ao servidor como um arquivo (veja `entradas.Entrada.arquivo`).'''
+        from . import forkserver
+        servidor = forkserver.obter_servidor(self.comando)
+        script, args = self._script_e_args()
+        limites = self.limites
+        with rastreio.intervalo('executar_script_fork', 'execucao', script=script):
+            if isinstance(entrada, entradas.EntradaTexto):
+                r = servidor.executar(script, args, entrada.texto, limites.timeout, limites.limite_saida,
+                                      limites.limite_cpu, limites.limite_memoria)
+            else:
+                with entrada.arquivo() as caminho:
+                    r = servidor.executar(script, args, None, limites.timeout, limites.limite_saida,
+                                          limites.limite_cpu, limites.limite_memoria,
+                                          entrada_arquivo=os.path.abspath(caminho))
+        return montar_execucao(r['codigo'], r['saida'], r['erro'], limites,
+                               expirou=r['timeout'], excedeu=r['excedeu'],
+                               tempo=r['tempo'], tempo_cpu=r['tempo_cpu'], memoria=r['memoria'])
+
+    @rastreio.medido('verificar', 'verificacao')
+    def verificar(self, execucao: Execucao) -> tuple[bool, int, str, str]:
+        '''Aplica as verificações ao resultado de uma execução.
+
+        Retorno:
+        O mesmo de `corrigir`.
+        '''
+        codigo, resposta, erro = execucao.codigo, execucao.saida, execucao.erro
+        # Verificação do resultado
+        if execucao.interrompida:  # Alguma verificação falhou antes de o script terminar
+            return False, codigo, resposta, self._mensagem_erro(execucao, self._verificacoes, completa=False)
+        if codigo != 0:  # Veio com código de erro
+            return False, codigo, resposta, erro
+        # Código de sucesso, corrige a resposta
+        for verificacao in self._verificacoes:
+            with rastreio.intervalo(verificacao.verificador.nome, 'verificacao'):
+                if verificacao.chave in execucao.vereditos:  # Decidida durante a execução
+                    passou = execucao.vereditos[verificacao.chave] is None
+                else:
+                    passou = verificacao(resposta)
+            if not passou:
+                return False, codigo, resposta, self._mensagem_erro(execucao, [verificacao])
+        # Passou na correção
+        return True, codigo, resposta, erro
+
+
+    def _mensagem_erro(self, execucao: Execucao, verificacoes: list[Verificacao], completa: bool = True) -> str:
+        '''Retorna `msg_erro` seguida da explicação da primeira das `verificacoes` que explicar a falha, se houver.'''
+        for verificacao in verificacoes:
+            if verificacao.chave in execucao.vereditos:
+                detalhe = execucao.vereditos[verificacao.chave]
+            else:
+                detalhe = verificacao.detalhar(execucao.saida, completa)
+            if detalhe:
+                return f'{self.msg_erro}\n{detalhe}'
+        return self.msg_erro
+
+
+class CorrecaoFuncao(Correcao):
+    '''Uma correção que importa o script como módulo e chama uma função com vários casos de teste
+    (`"tipo": "funcao"` no arquivo de configuração).
+
+    Todos os casos são executados num único processo (veja `chamador`), com os mesmos modos e limites das outras
+    correções, e cada caso tem o seu próprio tempo máximo. A saída da correção é um relatório com o resultado
+    de cada caso; as `verificacoes`, se houver, são aplicadas a ele (as estáticas, por exemplo, funcionam como sempre).
+    '''
+    tipo = 'funcao'
+
+    def __init__(self, comando: str, diretorio: str, script: str, msg_erro: str, funcao: str,
+                 casos: list[dict], tolerancia: float = 0, timeout_caso: float | None = None, **kwargs):
+        '''Construtor.
+
+        Parâmetros:
+        - `funcao` é o nome da função testada.
+        - `casos` é uma lista de dicionários `{"args": [...], "esperado": ...}`: a função é chamada com `args`
+          e deve retornar `esperado` (tuplas retornadas valem como listas).
+        - `tolerancia` é a diferença máxima aceita entre números retornados e esperados.
+        - `timeout_caso` é o tempo máximo de cada caso, em segundos. O padrão é `TIMEOUT_CASO`.
+        Os demais parâmetros são os de `Correcao` (`entrada`, `entrada_arquivo` e `args` são ignorados).
+
+        Lança `ErroConfiguracao` se a tolerância ou o tempo máximo forem inválidos.
+        '''
+        super().__init__(comando, diretorio, script, msg_erro, **kwargs)
+        for nome, valor in [('tolerancia', tolerancia), ('timeout_caso', timeout_caso)]:
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, (int, float))
+                                      or valor < 0):
+                raise ErroConfiguracao(f'"{nome}" deve ser um número não negativo, não {valor!r}.')
+        self.funcao: str = funcao
+        self.casos: list[dict] = casos
+        self.tolerancia: float = tolerancia
+        self.timeout_caso: float | None = timeout_caso
+        # A especificação dos casos é a entrada do chamador. Inclui a função, que assim faz parte da chave
+        # do cache e da chave de execução.
+        self.entrada = json.dumps({'versao': VERSAO_CHAMADOR, 'funcao': funcao, 'casos': casos,
+                                   'tolerancia': tolerancia,
+                                   'timeout_caso': timeout_caso or TIMEOUT_CASO}, ensure_ascii=False)
+        self.entrada_arquivo = None
+        self.args = ''
+
+    @property
+    def descricao_entrada(self) -> str:
+        '''As chamadas da função e os retornos esperados, um caso por linha.'''
+        return '\n'.join(f'{self._chamada(c)} → {c["esperado"]!r}' for c in self.casos)
+
+    def _chamada(self, caso: dict) -> str:
+        return f'{self.funcao}({", ".join(repr(a) for a in caso["args"])})'
+
+    def _script_e_args(self) -> tuple[str, list[str]]:
+        '''O chamador é executado no lugar do script, que ele importa.'''
+        from . import chamador
+        return chamador.__file__, [f'{self.diretorio}/{self.script}', self.funcao]
+
+    def diagnosticar(self) -> Execucao | None:
+        '''Além da verificação prévia do script, o chamador deve existir como arquivo, para ser executado pelo
+        interpretador da correção (no executável criado pelo PyInstaller, ele é incluído pelo `corretor.spec`).'''
+        chamador = self._script_e_args()[0]
+        if not os.path.isfile(chamador):
+            return Execucao(1, '', f'O chamador das correções de função ({chamador}) não foi encontrado.')
+        return super().diagnosticar()
+
+    def _observadores(self) -> list:
+        return []  # A saída é do chamador, não do script
+
+    def ler_casos(self, execucao: Execucao) -> list[dict]:
+        '''Retorna o resultado de cada caso executado, na ordem dos casos (veja `chamador`),
+        com as chaves `passou`, `retorno`, `erro` e `saida`. Se a execução foi interrompida, faltam os últimos.'''
+        from .chamador import PREFIXO as prefixo
+        casos = []
+        for linha in execucao.saida.split('\n'):  # `splitlines` também separaria no \x1e do prefixo
+            if linha.startswith(prefixo):
+                try:
+                    casos += [json.loads(linha[len(prefixo):])]
+                except ValueError:
+                    break  # Linha cortada pelo limite de saída
+        return casos[:len(self.casos)]
+
+    def _relatorio(self, resultados: list[dict]) -> str:
+        '''Retorna o relatório dos casos, com uma linha por caso.'''
+        linhas = [f'{sum(r["passou"] for r in resultados)} de {len(self.casos)} casos corretos.']
+        for i, caso in enumerate(self.casos):
+            if i >= len(resultados):
+                linhas += [f'não executado: {self._chamada(caso)}']
+                continue
+            r = resultados[i]
+            if r['passou']:
+                linhas += [f'ok: {self._chamada(caso)} == {caso["esperado"]!r}']
+            elif r['erro']:
+                linhas += [f'falhou: {self._chamada(caso)}: {r["erro"]}']
+            else:
+                linhas += [f'falhou: {self._chamada(caso)} retornou {r["retorno"]}, esperado {caso["esperado"]!r}']
+        return '\n'.join(linhas) + '\n'
+
+    @rastreio.medido('verificar', 'verificacao')
+    def verificar(self, execucao: Execucao) -> tuple[bool, int, str, str]:
+        '''Verifica o resultado de cada caso e aplica as verificações ao relatório.
+
+        Retorno:
+        O mesmo de `corrigir`, com o relatório dos casos no lugar da saída.
+        '''
+        resultados = self.ler_casos(execucao)
+        relatorio = self._relatorio(resultados)
+        if execucao.codigo != 0:  # Erro ao importar o script, timeout etc.
+            return False, execucao.codigo, relatorio, execucao.erro
+        if len(resultados) < len(self.casos) or not all(r['passou'] for r in resultados):
+            return False, execucao.codigo, relatorio, self.msg_erro
+        for verificacao in self._verificacoes:
+            with rastreio.intervalo(verificacao.verificador.nome, 'verificacao'):
+                passou = verificacao(relatorio)
+            if not passou:
+                return False, execucao.codigo, relatorio, self._mensagem_erro(relatorio, [verificacao])
+        return True, execucao.codigo, relatorio, execucao.erro
+
+
+class ExecucaoComplexidade(Execucao):
+    '''As execuções de uma correção de complexidade, reunidas numa só (veja `CorrecaoComplexidade.obter_execucao`).
+    O código e a saída de erro são os da última execução; os tempos são a soma dos de todas, e a memória, o maior pico.'''
+
+    def __init__(self, execucoes: list[Execucao], saida: str, ajuste: complexidade.Ajuste | None = None,
+                 n: int | None = None):
+        '''Construtor.
+
+        Parâmetros:
+        - `execucoes` são as execuções do script, na ordem em que foram feitas.
+        - `saida` é a tabela das medidas ou, se a última execução falhou, a saída dela.
+        - `ajuste` é o modelo de crescimento estimado, ou None se alguma execução falhou.
+        - `n` é o tamanho da entrada da execução que falhou, se houver.
+        '''
+        ultima = execucoes[-1]
+        tempos = [e.tempo for e in execucoes]
+        tempos_cpu = [e.tempo_cpu for e in execucoes]
+        memorias = [e.memoria for e in execucoes]
+        super().__init__(ultima.codigo, saida, ultima.erro, ultima.expirou, ultima.truncada, ultima.interrompida,
+                         tempo=None if None in tempos else sum(tempos),
+                         tempo_cpu=None if None in tempos_cpu else sum(tempos_cpu),
+                         memoria=None if None in memorias else max(memorias))
+        self.ajuste: complexidade.Ajuste | None = ajuste
+        self.n: int | None = n
+
+
+class CorrecaoComplexidade(Correcao):
+    '''Uma correção que mede o tempo de CPU do script com entradas de tamanhos crescentes e compara o crescimento
+    com uma complexidade máxima (`"tipo": "complexidade"` no arquivo de configuração; veja `complexidade`).
+
+    As entradas são produzidas por um gerador (veja `geradores`). Cada tamanho é executado `repeticoes` vezes,
+    e vale o menor tempo, o menos afetado pela carga da máquina. O tempo de iniciar o script é medido da mesma forma,
+    com a entrada de tamanho `TAMANHO_BASE`, e descontado das medidas. As execuções não usam o cache de resultados,
+    já que o que interessa é o tempo. A saída da correção é a tabela das medidas, com o ajuste e um gráfico.
+    '''
+    tipo = 'complexidade'
+
+    def __init__(self, comando: str, diretorio: str, script: str, msg_erro: str, gerador: dict,
+                 tamanhos: list[int], complexidade: str, repeticoes: int = 3, **kwargs):
+        '''Construtor.
+
+        Parâmetros:
+        - `gerador` é a definição do gerador das entradas (veja `geradores.compilar`).
+        - `tamanhos` são os tamanhos `n` das entradas, em ordem crescente.
+        - `complexidade` é a complexidade máxima aceita, uma das chaves de `complexidade.MODELOS` (ex.: `"n log n"`).
+        - `repeticoes` é o número de execuções de cada tamanho.
+        Os demais parâmetros são os de `Correcao` (`entrada` e `entrada_arquivo` são ignoradas,
+        e `timeout` vale para cada execução).
+        As `verificacoes` são aplicadas à saída de cada execução dos `tamanhos`.
+
+        Lança `ErroConfiguracao` se o gerador, a complexidade ou o número de repetições forem inválidos.
+        '''
+        super().__init__(comando, diretorio, script, msg_erro, **kwargs)
+        if complexidade not in MODELOS:
+            raise ErroConfiguracao(f'Complexidade "{complexidade}" inválida. Use uma destas: {", ".join(MODELOS)}.')
+        if isinstance(repeticoes, bool) or not isinstance(repeticoes, int) or repeticoes < 1:
+            raise ErroConfiguracao(f'"repeticoes" deve ser um inteiro positivo, não {repeticoes!r}.')
+        self.gerador: dict = gerador
+        self.tamanhos: list[int] = sorted(tamanhos)
+        self.complexidade: str = complexidade
+        self.repeticoes: int = repeticoes
+        from .geradores import compilar
+        compilar(gerador)  # Valida o gerador
+        self.entrada = ''
+        self.entrada_arquivo = None
+
+    @property
+    def descricao_entrada(self) -> str:
+        return (f'Gerador {json.dumps(self.gerador, ensure_ascii=False)} com n = {", ".join(map(str, self.tamanhos))} '
+                f'({self.repeticoes} execuções de cada). Complexidade máxima: O({self.complexidade}).')
+
+    @property
+    def chave_execucao(self) -> tuple:
+        '''As execuções são próprias desta correção (não são compartilhadas com outras).'''
+        return super().chave_execucao + (id(self),)
+
+    def obter_execucao(self, cache: CacheResultados | None = None,
+                       observadores: list | None = None) -> Execucao:
+        '''Executa o script com a entrada de tamanho `TAMANHO_BASE` e com cada um dos `tamanhos`, e ajusta um modelo
+        de crescimento aos tempos. O `cache` e os `observadores` não são usados.
+
+        Retorno:
+        Uma `ExecucaoComplexidade` com o ajuste e a tabela das medidas, ou com a execução que falhou ou cuja saída não
+        passou nas verificações. Se a verificação prévia do script falhar (veja `diagnosticar`), ele não é executado.
+        '''
+        diagnostico = self.diagnosticar()
+        if diagnostico is not None:
+            return diagnostico
+        execucoes = []
+        menores = {}
+        for n in [TAMANHO_BASE] + self.tamanhos:
+            entrada = entradas.EntradaGerador(self.gerador, n)
+            for _ in range(self.repeticoes):
+                execucao = self.executar([], entrada)
+                execucoes += [execucao]
+                if execucao.codigo != 0 or (n in self.tamanhos and not super().verificar(execucao)[0]):
+                    return ExecucaoComplexidade(execucoes, execucao.saida, n=n)
+                tempo = execucao.tempo_cpu if execucao.tempo_cpu is not None else execucao.tempo
+                menores[n] = min(menores.get(n, tempo), tempo)
+        medidas = [(n, menores[n]) for n in self.tamanhos]
+        ajuste = complexidade.ajustar(medidas, menores[TAMANHO_BASE])
+        expoente = f'expoente medido: {ajuste.expoente:.2f}' if ajuste.expoente is not None else 'o tempo não cresceu'
+        relatorio = (f'Complexidade estimada: O({ajuste.modelo}). Máxima: O({self.complexidade}).\n'
+                     f'Tempo de início (n = {TAMANHO_BASE}): {menores[TAMANHO_BASE]:.4f}s, descontado; {expoente}.\n\n'
+                     + complexidade.grafico(medidas, ajuste))
+        return ExecucaoComplexidade(execucoes, relatorio, ajuste)
+
+    @rastreio.medido('verificar', 'verificacao')
+    def verificar(self, execucao: Execucao) -> tuple[bool, int, str, str]:
+        '''Compara o crescimento do tempo, estimado em `obter_execucao`, com a complexidade máxima.
+        A uma execução sem ajuste (de um só tamanho), aplica as verificações, como `Correcao.verificar`.
+
+        Retorno:
+        O mesmo de `corrigir`.
+        '''
+        if not isinstance(execucao, ExecucaoComplexidade) or execucao.ajuste is None:
+            passou, codigo, saida, erro = super().verificar(execucao)
+            if not passou and isinstance(execucao, ExecucaoComplexidade):
+                saida = f'{"Falhou" if codigo != 0 else "Saída incorreta"} com n = {execucao.n}.\n{saida}'
+            return passou, codigo, saida, erro
+        ajuste = execucao.ajuste
+        if complexidade.dentro_do_limite(ajuste, self.complexidade):
+            return True, 0, execucao.saida, ''
+        return False, 0, execucao.saida, (f'{self.msg_erro}\nO tempo cresce como O({ajuste.modelo}), '
+                                          f'mais rápido que O({self.complexidade}).')
+
+
+class _ObservadorFalha:
+    '''Acompanha a saída de um script e indica quando todas as correções que a usam certamente vão falhar,
+    isto é, quando alguma das verificações de cada uma certamente vai falhar.
+    As verificações incrementais (veja `Verificacao.iniciar_fluxo`) recebem cada trecho.
+    Para não custar tempo quadrático, as demais são refeitas só quando a saída dobra de tamanho,
+    e a saída só é acumulada se alguma delas precisar.
+
+    As verificações decididas no fluxo (veja `Verificacao.decidida_no_fluxo`) recebem a saída inteira,
+    e os seus vereditos são obtidos no fim com `vereditos`.'''
+
+    def __init__(self, verificacoes: list[list[Verificacao]], decididas: list[Verificacao] = []):
+        '''`verificacoes` tem as verificações antecipáveis de cada correção; se for vazia, o script nunca é
+        interrompido. `decididas` são as verificações decididas no fluxo.'''
+        self.verificacoes = verificacoes
+        self.decididas = decididas
+        self.fluxos = {}
+        for v in [v for correcao in verificacoes for v in correcao] + decididas:
+            if id(v) not in self.fluxos and (fluxo := v.iniciar_fluxo()) is not None:
+                self.fluxos[id(v)] = fluxo
+        self.acumular = any(v.verificador.falha_certa for correcao in verificacoes for v in correcao)
+        self.falhas: set[int] = set()  # Verificações incrementais que já falharam
+        self.partes: list[str] = []
+        self.tamanho = 0
+        self.proximo_teste = 1
+
+    def __call__(self, trecho: str) -> bool:
+        for chave, fluxo in self.fluxos.items():
+            if chave not in self.falhas and fluxo.alimentar(trecho):
+                self.falhas.add(chave)
+        if not self.verificacoes:
+            return False
+        if all(any(id(v) in self.falhas for v in correcao) for correcao in self.verificacoes):
+            return True
+        if not self.acumular:
+            return False
+        self.partes += [trecho]
+        self.tamanho += len(trecho)
+        if self.tamanho < self.proximo_teste:
+            return False
+        self.proximo_teste = 2 * self.tamanho
+        texto = ''.join(self.partes)
+        self.partes = [texto]
+        texto = texto.replace('\r\n', '\n').replace('\r', '\n')
+        return all(any(id(v) in self.falhas or v.falha_certa(texto) for v in correcao)
+                   for correcao in self.verificacoes)
+
+    def vereditos(self, completa: bool) -> dict[str, str | None]:
+        '''Retorna os vereditos das verificações decididas no fluxo, pela chave (veja `Execucao.vereditos`).
+        Se a saída não está `completa`, só as falhas já certas.'''
+        vereditos = {}
+        for v in self.decididas:
+            veredito = v.decidir(self.fluxos[id(v)], completa)
+            if completa or veredito is not None:
+                vereditos[v.chave] = veredito
+        return vereditos
+
+
+def _decisores(observadores: list) -> list[_ObservadorFalha]:
+    '''Os `observadores` que decidem verificações durante a execução.'''
+    return [o for o in observadores if isinstance(o, _ObservadorFalha) and o.decididas]
+
+
+class GrupoExecucao:
+    '''Correções que executam o script da mesma forma (mesma `Correcao.chave_execucao`).
+    O script é executado uma só vez e a saída é verificada por cada correção.'''
+
+    def __init__(self, correcoes: list[Correcao]):
+        self.correcoes: list[Correcao] = correcoes
+
+    def corrigir(self, cache: CacheResultados | None = None) -> list[tuple[bool, int, str, str]]:
+        '''Executa o script uma vez e aplica as verificações de cada correção.
+
+        Parâmetros:
+        - `cache` é o cache de resultados (veja `Correcao.corrigir`).
+
+        Retorno:
+        O retorno de `Correcao.corrigir` de cada correção, na mesma ordem.
+        '''
+        primeira = self.correcoes[0]
+        if len(self.correcoes) == 1:
+            return [primeira.corrigir(cache)]
+        with rastreio.intervalo('corrigir', script=primeira.script, entrada=primeira.fonte_entrada.resumo,
+                                correcoes=len(self.correcoes)):
+            execucao = primeira.obter_execucao(cache, self._observadores())
+            resultados = []
+            for correcao in self.correcoes:
+                correcao.ultima_execucao = execucao
+                resultados += [correcao.verificar(execucao)]
+            return resultados
+
+    def _observadores(self) -> list:
+        '''Retorna os observadores que interrompem o script quando todas as correções já falharam com certeza.'''
+        antecipaveis = [[v for v in c._verificacoes if v.antecipavel] for c in self.correcoes]
+        decididas = [v for c in self.correcoes for v in c._verificacoes if v.decidida_no_fluxo]
+        if not all(antecipaveis):  # Alguma correção precisa da saída completa
+            return [_ObservadorFalha([], decididas)] if decididas else []
+        return [_ObservadorFalha(antecipaveis, decididas)]
+
+
+class Atividade:
+    '''Uma atividade, com questões para corrigir.'''
+
+    def __init__(self, titulo: str, questoes: list[Questao]):
+        self.titulo: str = titulo
+        self.questoes: list[Questao] = questoes
+    
+    @classmethod
+    def ler_config(cls, config: dict) -> 'Atividade':
+        '''Lê um dicionário de configuração recursivamente.
+
+        Parâmetros:
+        - `config` é o dicionário lido do arquivo de configuração.
+
+        Lança `ErroConfiguracao` se a configuração for inválida.
+        '''
+        return cls.do_plano(plano.compilar(config))
+
+    @classmethod
+    def do_plano(cls, plano_atividade: plano.Plano, diretorio: str | None = None) -> 'Atividade':
+        '''Cria uma instância a partir de um plano de correção (veja `plano`).
+
+        Parâmetros:
+        - `plano_atividade` é o plano.
+        - `diretorio` é o diretório dos scripts das correções que não definem um.
+        '''
+        questoes = [Questao.do_plano(q, diretorio) for q in plano_atividade.questoes]
+        return cls(plano_atividade.titulo, questoes)
+
+    @classmethod 
+    def ler_arquivo_config(cls, caminho: str, diretorio: str | None = None,
+                           diretorio_cache: str | None = None):
+        '''Lê um arquivo de configuração recursivamente.
+        Atualiza todos os nomes de scripts para caminhos absolutos tendo como base o diretório do arquivo de configuração.
+        O plano de correção compilado do arquivo é reaproveitado enquanto ele não mudar (veja `plano.carregar`).
+
+        Parâmetros:
+        - `caminho` é o caminho para o arquivo de configuração.
+        - `diretorio` é o diretório onde ficam os scripts. O padrão é o diretório do arquivo de configuração.
+        - `diretorio_cache` é onde guardar o plano compilado em disco. Se omitido, ele só fica em memória.
+
+        Lança `ErroConfiguracao` se o arquivo for inválido.
+        '''
+        plano_atividade = plano.carregar(caminho, diretorio_cache)
+        # Diretório dos scripts
+        if diretorio is None:
+            diretorio = os.path.dirname(caminho)
+        return cls.do_plano(plano_atividade, os.path.abspath(diretorio))
+
+
+class Placar:
+    '''A contagem das correções e questões corretas de uma atividade, atualizada a cada resultado em tempo constante.'''
+
+    def __init__(self, atividade: Atividade):
+        self.atividade: Atividade = atividade
+        # Questão de cada correção
+        self._questao: dict[Correcao, Questao] = {c: q for q in atividade.questoes for c in q.correcoes}
+        # Número de correções corretas de cada questão
+        self._corretas: dict[Questao, int] = {}
+        for questao in atividade.questoes:
+            self._corretas[questao] = sum(1 for c in questao.correcoes
+                                          if c.resultado is not None and c.resultado[0])
+        self.questoes_corretas: int = sum(1 for q in atividade.questoes if self.correta(q))
+        self.nota: float = sum(q.pontos for q in atividade.questoes if self.correta(q))
+
+    def questao(self, correcao: Correcao) -> Questao:
+        '''Retorna a questão de `correcao`.'''
+        return self._questao[correcao]
+
+    def corretas(self, questao: Questao) -> int:
+        '''Retorna o número de correções corretas de `questao`.'''
+        return self._corretas[questao]
+
+    def correta(self, questao: Questao) -> bool:
+        '''Retorna True se todas as correções de `questao` estão corretas.'''
+        return self._corretas[questao] == len(questao.correcoes)
+
+    def registrar(self, correcao: Correcao, resultado: tuple[bool, int, str, str]) -> Questao:
+        '''Guarda `resultado` em `correcao.resultado` e atualiza as contagens.
+
+        Retorno:
+        A questão da correção.
+        '''
+        questao = self._questao[correcao]
+        antes = correcao.resultado is not None and correcao.resultado[0]
+        correcao.resultado = resultado
+        depois = bool(resultado[0])
+        if antes != depois:
+            estava_correta = self.correta(questao)
+            self._corretas[questao] += 1 if depois else -1
+            if estava_correta != self.correta(questao):
+                sinal = 1 if depois else -1
+                self.questoes_corretas += sinal
+                self.nota += sinal * questao.pontos
+        return questao
+
+
+# Funções
+
+def _forkserver_disponivel() -> bool:
+    '''Retorna se o modo fork pode ser usado. O `forkserver` só é importado quando o modo fork é pedido.'''
+    from . import forkserver
+    return forkserver.DISPONIVEL
+
+def criar_correcao(plano_correcao: plano.PlanoCorrecao, diretorio: str | None = None) -> Correcao:
+    '''Cria a correção do tipo definido no plano (`Correcao` ou `CorrecaoFuncao`; veja `Correcao.do_plano`).'''
+    return TIPOS_CORRECAO[plano_correcao.tipo].do_plano(plano_correcao, diretorio)
+
+
+def _mesmo_interpretador(comando: str) -> bool:
+    '''Retorna se `comando` é um interpretador Python da mesma versão deste, que compila os scripts como ele.'''
+    return (os.path.basename(comando).lower().startswith('python')
+            and f'Python {sys.version.split()[0]}' in versao_interpretador(comando))
+
+
+# Classe de cada tipo de correção (chave `"tipo"` do arquivo de configuração)
+TIPOS_CORRECAO: dict[str, type[Correcao]] = {'programa': Correcao, 'funcao': CorrecaoFuncao,
+                                             'complexidade': CorrecaoComplexidade}
+
+
+def agrupar_execucoes(correcoes: list[Correcao]) -> list[GrupoExecucao]:
+    '''Agrupa as correções que executam o script da mesma forma, na ordem da primeira correção de cada grupo.
+    Executar os grupos em vez das correções poupa `len(correcoes) - len(grupos)` processos.'''
+    grupos: dict[tuple, list[Correcao]] = {}
+    for correcao in correcoes:
+        grupos.setdefault(correcao.chave_execucao, []).append(correcao)
+    return [GrupoExecucao(g) for g in grupos.values()]
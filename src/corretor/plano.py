@@ -0,0 +1,366 @@
+'''Compilação do arquivo de configuração num plano de correção.
+
+O arquivo de configuração é hierárquico: as chaves definidas na atividade valem para todas as questões,
+e as definidas numa questão valem para todas as suas correções, a não ser que sejam redefinidas.
+O compilador resolve essa herança uma única vez e produz um plano plano (uma lista de questões, cada uma com
+as suas correções já com todos os valores), validado e imutável. Verificações iguais são compartilhadas.
+
+O plano de um arquivo é guardado em memória enquanto o arquivo não mudar e, opcionalmente, em disco,
+com chave no hash do conteúdo do arquivo, para que reabrir uma atividade grande seja imediato.
+'''
+
+import hashlib, json, os, threading
+
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any
+
+from . import entradas
+from .complexidade import MODELOS
+from .erros import ErroConfiguracao
+from .processo import LIMITE_SAIDA
+
+# Constantes
+VERSAO_FORMATO = 4  # Mude para invalidar os planos guardados em disco
+# Chaves obrigatórias (em algum nível) de cada correção
+OBRIGATORIAS = ('comando', 'script', 'msg_erro')
+# Chaves opcionais de cada correção e seus valores padrão
+OPCIONAIS = {
+    'entrada': '',
+    'entrada_arquivo': None,
+    'args': '',
+    'modo': 'subprocesso',
+    'limite_saida': LIMITE_SAIDA,
+    'timeout': None,
+    'limite_cpu': None,
+    'limite_memoria': None,
+    'diretorio': None,
+    # Correções de função (`"tipo": "funcao"`; veja `modelo.CorrecaoFuncao`)
+    'tipo': 'programa',
+    'funcao': None,
+    'casos': None,
+    'tolerancia': 0,
+    'timeout_caso': None,
+    # Correções de complexidade (`"tipo": "complexidade"`; veja `modelo.CorrecaoComplexidade`)
+    'gerador': None,
+    'tamanhos': None,
+    'repeticoes': 3,
+    'complexidade': None,
+}
+TIPOS = ('programa', 'funcao', 'complexidade')
+MIN_TAMANHOS = 3  # Tamanhos de entrada necessários para estimar a complexidade
+CAMPOS_CORRECAO = OBRIGATORIAS + tuple(OPCIONAIS)
+
+
+# Classes
+
+class _Imutavel:
+    '''Base dos registros do plano: atributos em `__slots__`, atribuídos só no construtor.'''
+    __slots__ = ()
+
+    def __init__(self, **valores):
+        for nome in self.__slots__:
+            object.__setattr__(self, nome, valores[nome])
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError(f'{type(self).__name__} é imutável.')
+
+    def __delattr__(self, nome):
+        raise AttributeError(f'{type(self).__name__} é imutável.')
+
+    def __repr__(self):
+        campos = ', '.join(f'{n}={getattr(self, n)!r}' for n in self.__slots__)
+        return f'{type(self).__name__}({campos})'
+
+
+class EspecVerificacao(_Imutavel, Mapping):
+    '''Uma verificação do plano, como `{"func_expect": ..., "args_expect": ...}` (pode ser lida como um dicionário).
+    Listas e dicionários em `args_expect` são congelados em tuplas e `MappingProxyType`.'''
+    __slots__ = ('func_expect', 'args_expect')
+
+    def __getitem__(self, chave: str):
+        if chave not in self.__slots__:
+            raise KeyError(chave)
+        return getattr(self, chave)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+
+class PlanoCorrecao(_Imutavel):
+    '''Uma correção do plano, com todos os valores herdados já resolvidos (veja `CAMPOS_CORRECAO`).
+    `diretorio` é None quando não foi definido no arquivo: nesse caso vale o diretório passado ao instanciar o plano.'''
+    __slots__ = CAMPOS_CORRECAO + ('verificacoes',)
+
+
+class PlanoQuestao(_Imutavel):
+    '''Uma questão do plano.'''
+    __slots__ = ('descricao', 'pontos', 'correcoes')
+
+
+class Plano(_Imutavel):
+    '''O plano de correção de uma atividade.'''
+    __slots__ = ('titulo', 'questoes')
+
+
+class _Compilador:
+    '''Resolve a herança de um dicionário de configuração. Verificações iguais viram o mesmo `EspecVerificacao`.'''
+
+    def __init__(self):
+        self.especs: dict[str, EspecVerificacao] = {}
+
+    def espec(self, func_expect: str, args_expect: Any) -> EspecVerificacao:
+        '''Retorna a verificação `(func_expect, args_expect)`, compartilhada com as iguais já compiladas.'''
+        chave = json.dumps([func_expect, args_expect], sort_keys=True, default=_descongelar)
+        if chave not in self.especs:
+            self.especs[chave] = EspecVerificacao(func_expect=func_expect,
+                                                  args_expect=_congelar(args_expect))
+        return self.especs[chave]
+
+    def atividade(self, config: dict) -> Plano:
+        titulo = _obter(config, 'titulo', 'a atividade')
+        questoes = _obter(config, 'questoes', 'a atividade', list)
+        # Valores herdados pelas questões: tudo, menos a lista das questões
+        herdado = {k: v for k, v in config.items() if k != 'questoes'}
+        return Plano(titulo=titulo, questoes=tuple(
+            self.questao({**herdado, **_dict(q, f'questoes[{i}]')}, f'questoes[{i}]')
+            for i, q in enumerate(questoes)))
+
+    def questao(self, config: dict, onde: str) -> PlanoQuestao:
+        descricao = _obter(config, 'descricao', onde)
+        pontos = _obter(config, 'pontos', onde, (int, float))
+        correcoes = _obter(config, 'correcoes', onde, list)
+        herdado = {k: v for k, v in config.items() if k != 'correcoes'}
+        return PlanoQuestao(descricao=descricao, pontos=pontos, correcoes=tuple(
+            self.correcao({**herdado, **_dict(c, f'{onde}.correcoes[{j}]')}, f'{onde}.correcoes[{j}]')
+            for j, c in enumerate(correcoes)))
+
+    def correcao(self, config: dict, onde: str) -> PlanoCorrecao:
+        '''Resolve uma correção.
+
+        A chave `"verificacoes"` é uma lista de dicionários `{"func_expect" : ..., "args_expect" : ...}`.
+        Além dela, há a chave `"mais_verificacoes"`, de mesmo tipo.
+        É obrigatório definir `"verificacoes"` na definição da correção ou em algum ancestral (para definir verificações comuns a várias correções).
+        Porém, caso se queira adicionar verificações a uma correção que herda correções comuns definidas em algum ancestral, pode-se usar a chave `"mais_verificacoes"` na definição dela.
+        As chaves `"func_expect"` e `"args_expect"` podem ser definidas para preencher valores faltando em `"verificacoes"` e `"mais_verificacoes"`.
+
+        A `"entrada"` é um texto ou a definição de um gerador, `{"gerador": {...}, "n": ...}`; no lugar dela,
+        `"entrada_arquivo"` é um arquivo com a entrada, relativo ao diretório dos scripts (veja `entradas`).
+
+        Correções com `"tipo": "funcao"` chamam a função `"funcao"` do script com cada um dos `"casos"`,
+        uma lista de `{"args": [...], "esperado": ...}`. Nelas, `"verificacoes"` é opcional.
+
+        Correções com `"tipo": "complexidade"` executam o script com entradas do `"gerador"` (veja `geradores`)
+        de cada um dos `"tamanhos"` e comparam o crescimento do tempo com `"complexidade"` (veja `complexidade.MODELOS`).
+        Nelas, `"verificacoes"` também é opcional e é aplicada à saída de cada execução.
+        '''
+        tipo = _obter(config, 'tipo', onde, str, 'programa')
+        if tipo not in TIPOS:
+            raise ErroConfiguracao(f'{onde}: tipo de correção "{tipo}" inválido. Use um destes: {", ".join(TIPOS)}.')
+        try:
+            entradas.criar(config.get('entrada', ''), _obter(config, 'entrada_arquivo', onde, str, None))
+        except ErroConfiguracao as e:
+            raise ErroConfiguracao(f'{onde}: {e}') from None
+        casos = None
+        if tipo == 'funcao':
+            _obter(config, 'funcao', onde, str)
+            casos = []
+            for k, caso in enumerate(_obter(config, 'casos', onde, list)):
+                caso = _dict(caso, f'{onde}.casos[{k}]')
+                casos += [{'args': _obter(caso, 'args', f'{onde}.casos[{k}]', list, []),
+                           'esperado': _obter(caso, 'esperado', f'{onde}.casos[{k}]')}]
+        elif tipo == 'complexidade':
+            _dict(_obter(config, 'gerador', onde), f'{onde}.gerador')
+            tamanhos = _obter(config, 'tamanhos', onde, list)
+            if len(tamanhos) < MIN_TAMANHOS or \
+                    not all(isinstance(n, int) and not isinstance(n, bool) and n > 0 for n in tamanhos):
+                raise ErroConfiguracao(f'{onde}: "tamanhos" deve ter pelo menos {MIN_TAMANHOS} inteiros positivos.')
+            complexidade = _obter(config, 'complexidade', onde, str)
+            if complexidade not in MODELOS:
+                raise ErroConfiguracao(f'{onde}: complexidade "{complexidade}" inválida. '
+                                       f'Use uma destas: {", ".join(MODELOS)}.')
+        verificacoes = _obter(config, 'verificacoes', onde, list, [] if tipo != 'programa' else _AUSENTE) + \
+            _obter(config, 'mais_verificacoes', onde, list, [])
+        especs = []
+        for k, v in enumerate(verificacoes):
+            v = _dict(v, f'{onde}.verificacoes[{k}]')
+            func = v.get('func_expect') or config.get('func_expect')
+            if 'args_expect' in v:
+                args = v['args_expect']
+            elif config.get('args_expect'):
+                args = config['args_expect']
+            else:
+                raise ErroConfiguracao(f'{onde}.verificacoes[{k}]: verificação sem "args_expect".')
+            if not func:
+                raise ErroConfiguracao(f'{onde}.verificacoes[{k}]: verificação sem "func_expect".')
+            especs += [self.espec(func, args)]
+        valores = {chave: _obter(config, chave, onde) for chave in OBRIGATORIAS}
+        valores.update({chave: _congelar(config.get(chave, padrao)) for chave, padrao in OPCIONAIS.items()})
+        valores['casos'] = _congelar(casos)
+        return PlanoCorrecao(verificacoes=tuple(especs), **valores)
+
+
+# Funções auxiliares
+
+_AUSENTE = object()
+
+
+def _obter(config: dict, chave: str, onde: str, tipo=None, padrao=_AUSENTE):
+    '''Retorna `config[chave]`, validando o tipo. Lança `ErroConfiguracao` indicando `onde` se faltar ou for inválido.'''
+    if chave not in config:
+        if padrao is _AUSENTE:
+            raise ErroConfiguracao(f'{onde}: falta a chave "{chave}".')
+        return padrao
+    valor = config[chave]
+    if tipo is not None and (not isinstance(valor, tipo) or isinstance(valor, bool)):
+        raise ErroConfiguracao(f'{onde}: valor inválido para "{chave}": {valor!r}.')
+    return valor
+
+
+def _dict(valor: Any, onde: str) -> dict:
+    if not isinstance(valor, dict):
+        raise ErroConfiguracao(f'{onde}: esperado um objeto, não {valor!r}.')
+    return valor
+
+
+def _congelar(valor: Any) -> Any:
+    '''Converte listas em tuplas e dicionários em `MappingProxyType`, recursivamente.'''
+    if isinstance(valor, dict):
+        return MappingProxyType({k: _congelar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+def _descongelar(valor: Any) -> Any:
+    '''O inverso de `_congelar`, para gravar em JSON.'''
+    if isinstance(valor, Mapping):
+        return {k: _descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [_descongelar(v) for v in valor]
+    return valor
+
+
+# Compilação
+
+def compilar(config: dict) -> Plano:
+    '''Compila um dicionário de configuração (lido do arquivo) num plano.
+
+    Lança `ErroConfiguracao` se faltar alguma chave obrigatória ou algum valor tiver o tipo errado.
+    As funções e os argumentos das verificações são validados ao instanciar as correções.
+    '''
+    return _Compilador().atividade(_dict(config, 'a atividade'))
+
+
+def compilar_correcao(config: dict) -> PlanoCorrecao:
+    '''Compila a configuração de uma única correção, já com os valores herdados.'''
+    return _Compilador().correcao(_dict(config, 'a correção'), 'a correção')
+
+
+# Serialização
+
+def para_json(plano: Plano) -> dict:
+    '''Converte o plano num dicionário que pode ser gravado em JSON. As verificações compartilhadas são gravadas uma vez.'''
+    especs: dict[int, int] = {}
+    lista_especs = []
+    questoes = []
+    for q in plano.questoes:
+        correcoes = []
+        for c in q.correcoes:
+            indices = []
+            for e in c.verificacoes:
+                if id(e) not in especs:
+                    especs[id(e)] = len(lista_especs)
+                    lista_especs += [[e.func_expect, _descongelar(e.args_expect)]]
+                indices += [especs[id(e)]]
+            correcoes += [{**{campo: _descongelar(getattr(c, campo)) for campo in CAMPOS_CORRECAO},
+                           'verificacoes': indices}]
+        questoes += [{'descricao': q.descricao, 'pontos': q.pontos, 'correcoes': correcoes}]
+    return {'versao': VERSAO_FORMATO, 'titulo': plano.titulo, 'especs': lista_especs,
+            'questoes': questoes}
+
+
+def de_json(dados: dict) -> Plano:
+    '''O inverso de `para_json`.'''
+    compilador = _Compilador()
+    especs = [compilador.espec(func, args) for func, args in dados['especs']]
+    return Plano(titulo=dados['titulo'], questoes=tuple(
+        PlanoQuestao(descricao=q['descricao'], pontos=q['pontos'], correcoes=tuple(
+            PlanoCorrecao(**{campo: _congelar(c[campo]) for campo in CAMPOS_CORRECAO},
+                          verificacoes=tuple(especs[i] for i in c['verificacoes']))
+            for c in q['correcoes']))
+        for q in dados['questoes']))
+
+
+# Carregamento com cache
+
+_planos: dict[str, tuple[tuple[int, int], Plano]] = {}
+_trava = threading.Lock()
+
+
+def carregar(caminho: str, diretorio_cache: str | None = None) -> Plano:
+    '''Retorna o plano do arquivo de configuração em `caminho`.
+
+    O plano fica em memória enquanto o arquivo não mudar (mesma data de modificação e tamanho).
+    Se `diretorio_cache` for dado, o plano também é guardado em disco, com chave no hash do conteúdo do arquivo,
+    e reaproveitado por outros processos.
+
+    Lança `OSError` se o arquivo não puder ser lido e `ErroConfiguracao` se ele for inválido.
+    '''
+    caminho = os.path.abspath(caminho)
+    st = os.stat(caminho)
+    versao = (st.st_mtime_ns, st.st_size)
+    with _trava:
+        guardado = _planos.get(caminho)
+    if guardado is not None and guardado[0] == versao:
+        return guardado[1]
+    with open(caminho, 'rb') as arq:
+        conteudo = arq.read()
+    plano = None
+    caminho_cache = None
+    if diretorio_cache:
+        chave = hashlib.sha256(f'{VERSAO_FORMATO}\n'.encode() + conteudo).hexdigest()
+        caminho_cache = os.path.join(diretorio_cache, 'planos', f'{chave}.json')
+        plano = _ler_cache(caminho_cache)
+    if plano is None:
+        try:
+            config = json.loads(conteudo.decode('utf-8'))
+        except ValueError as e:
+            raise ErroConfiguracao(f'JSON inválido: {e}') from e
+        plano = compilar(config)
+        if caminho_cache:
+            _gravar_cache(caminho_cache, plano)
+    with _trava:
+        _planos[caminho] = (versao, plano)
+    return plano
+
+
+def _ler_cache(caminho: str) -> Plano | None:
+    try:
+        with open(caminho, encoding='utf-8') as arq:
+            dados = json.load(arq)
+        if dados.get('versao') != VERSAO_FORMATO:
+            return None
+        return de_json(dados)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _gravar_cache(caminho: str, plano: Plano):
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arq:
+            json.dump(para_json(plano), arq, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    except OSError:
+        pass  # O cache é só uma otimização
+
+
+def limpar_cache():
+    '''Descarta os planos guardados em memória.'''
+    with _trava:
+        _planos.clear()
@@ -0,0 +1,450 @@
+'''Execução dos scripts com captura incremental e limitada da saída e limites de recursos.
+
+A saída e o erro do processo são lidos aos poucos. Se algum deles passar do limite de bytes,
+o processo (e todo o seu grupo) é morto na hora, em vez de acumular saída sem fim na memória até o timeout.
+Observadores podem acompanhar a saída enquanto ela é produzida e interromper o processo quando o veredito já é certo.
+
+A entrada é escrita no processo em blocos, à medida que ele a lê, sem ser carregada inteira (veja `entradas`).
+
+Cada processo roda no seu próprio grupo, com limites opcionais de tempo de CPU e de memória (rlimits).
+Quando ele termina, o grupo inteiro é morto, para que filhos esquecidos não disputem a máquina com as próximas correções.
+O tempo de relógio, o tempo de CPU e o pico de memória de cada execução são medidos.
+
+Os grupos em execução ficam registrados pela thread que os iniciou, e `interromper` mata os de algumas threads
+(por exemplo, ao cancelar as correções; veja `execucao.Executor.cancelar`).
+'''
+
+import codecs, math, os, select, selectors, signal, subprocess, sys, threading, time
+
+from collections.abc import Iterable
+from contextlib import contextmanager
+from typing import Callable
+
+from . import rastreio
+from .entradas import Entrada, EntradaTexto
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Constantes
+LIMITE_SAIDA = 1024 * 1024  # bytes, por fluxo (saída e erro)
+TAMANHO_TRECHO = 8 * 1024  # bytes do início e do fim mantidos quando a saída é truncada
+TAMANHO_BLOCO = 64 * 1024  # bytes lidos/escritos por vez
+POSIX = os.name == 'posix'
+ESCALA_MAXRSS = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss vem em bytes no macOS e em KiB no Linux
+# Grupos de processos em execução, por thread que os iniciou, e as threads interrompidas (veja `interromper`)
+_grupos: dict[int, set[int]] = {}
+_interrompidas: set[int] = set()
+_trava_grupos = threading.Lock()
+
+
+# Classes
+
+class ExecucaoCancelada(Exception):
+    '''Lançada por uma execução cuja thread foi interrompida (veja `interromper`): o seu resultado não vale.'''
+
+
+class Limites:
+    '''Os limites de recursos de uma execução.'''
+
+    def __init__(self, timeout: float, limite_saida: int = LIMITE_SAIDA,
+                 limite_cpu: float | None = None, limite_memoria: int | None = None):
+        '''Construtor.
+
+        Parâmetros:
+        - `timeout` é o tempo máximo de execução (de relógio), em segundos.
+        - `limite_saida` é o número máximo de bytes da saída e do erro (cada um).
+        - `limite_cpu` é o tempo máximo de CPU, em segundos. Se None, não há limite.
+        - `limite_memoria` é o tamanho máximo da memória (espaço de endereçamento), em bytes. Se None, não há limite.
+        '''
+        self.timeout: float = timeout
+        self.limite_saida: int = limite_saida
+        self.limite_cpu: float | None = limite_cpu
+        self.limite_memoria: int | None = limite_memoria
+
+    def rlimits(self) -> list[tuple[int, tuple[int, int]]]:
+        '''Retorna os rlimits `(recurso, (suave, rígido))` a aplicar no processo.'''
+        rlimits = []
+        if resource is None:
+            return rlimits
+        if self.limite_cpu:
+            # Ao passar do limite suave, o processo recebe SIGXCPU; do rígido, SIGKILL
+            segundos = max(1, math.ceil(self.limite_cpu))
+            rlimits += [(resource.RLIMIT_CPU, (segundos, segundos + 1))]
+        if self.limite_memoria:
+            rlimits += [(resource.RLIMIT_AS, (self.limite_memoria, self.limite_memoria))]
+        return rlimits
+
+
+class Execucao:
+    '''O resultado da execução do script de uma correção, antes das verificações.'''
+
+    def __init__(self, codigo: int, saida: str, erro: str, expirou: bool = False,
+                 truncada: bool = False, interrompida: bool = False,
+                 tempo: float | None = None, tempo_cpu: float | None = None,
+                 memoria: int | None = None, vereditos: dict[str, str | None] | None = None,
+                 resumida: bool = False):
+        '''Construtor.
+
+        Parâmetros:
+        - `codigo` é o código de saída do script.
+        - `saida` é a saída do script.
+        - `erro` é a saída de erro do script ou a mensagem de erro do corretor (timeout, por exemplo).
+        - `expirou` indica se o script foi interrompido por timeout.
+        - `truncada` indica se o script foi interrompido por exceder o limite de saída.
+          Nesse caso, `saida` e `erro` contêm só o início e o fim do que foi produzido.
+        - `interrompida` indica se o script foi interrompido por um observador, porque o veredito já era certo.
+        - `tempo` é o tempo de relógio da execução, em segundos.
+        - `tempo_cpu` é o tempo de CPU (usuário + sistema) do script, em segundos.
+        - `memoria` é o pico de memória residente do script, em bytes.
+        As medidas são None quando não puderam ser obtidas (no Windows, por exemplo).
+        - `vereditos` são os resultados das verificações decididas durante a execução, a partir da saída inteira
+          (veja `verificacoes.Verificacao.decidida_no_fluxo`), pela chave da verificação: None se ela passou ou
+          a explicação da falha.
+        - `resumida` indica se a saída passou do limite sem interromper o script, o que só acontece quando as
+          verificações são decididas durante a execução. Nesse caso, `saida` contém só o início e o fim.
+        '''
+        self.codigo: int = codigo
+        self.saida: str = saida
+        self.erro: str = erro
+        self.expirou: bool = expirou
+        self.truncada: bool = truncada
+        self.interrompida: bool = interrompida
+        self.tempo: float | None = tempo
+        self.tempo_cpu: float | None = tempo_cpu
+        self.memoria: int | None = memoria
+        self.vereditos: dict[str, str | None] = vereditos or {}
+        self.resumida: bool = resumida
+
+    @property
+    def medidas(self) -> dict:
+        '''O tempo, o tempo de CPU e a memória medidos, num dicionário.'''
+        return {'tempo': self.tempo, 'tempo_cpu': self.tempo_cpu, 'memoria': self.memoria}
+
+
+class Captura:
+    '''Acumula os bytes de um fluxo até um limite.
+
+    Com `continuar`, passar do limite não é um excesso: os bytes seguintes são descartados, exceto os últimos
+    `TAMANHO_TRECHO`, mantidos para exibir o fim do fluxo.'''
+
+    def __init__(self, limite: int, continuar: bool = False):
+        self.limite: int = limite
+        self.continuar: bool = continuar
+        self.dados = bytearray()
+        self.fim = bytearray()  # Os últimos bytes recebidos (só com `continuar`)
+        self.total: int = 0  # Bytes recebidos, inclusive os descartados
+
+    @property
+    def excedeu(self) -> bool:
+        return not self.continuar and self.total > self.limite
+
+    def adicionar(self, bloco: bytes):
+        self.total += len(bloco)
+        falta = self.limite + 1 - len(self.dados)
+        if falta > 0:
+            self.dados += bloco[:falta]
+        if self.continuar:
+            self.fim += bloco[-TAMANHO_TRECHO:]
+            del self.fim[:-TAMANHO_TRECHO]
+
+    def texto(self) -> str:
+        '''Retorna o texto capturado. Se passou do limite, só o início e o fim, com um aviso no meio.'''
+        dados = bytes(self.dados[:self.limite])
+        if self.total <= self.limite or len(dados) <= 2 * TAMANHO_TRECHO:
+            return decodificar(dados)
+        inicio = decodificar(dados[:TAMANHO_TRECHO])
+        fim = decodificar(self.fim if self.continuar else dados[-TAMANHO_TRECHO:])
+        omitidos = self.total - 2 * TAMANHO_TRECHO
+        return f'{inicio}\n[... {omitidos} bytes omitidos ...]\n{fim}'
+
+
+# Funções
+
+def decodificar(dados: bytes) -> str:
+    '''Decodifica a saída de um processo como `subprocess.run(text=True)` faria (UTF-8 e quebras de linha universais).'''
+    texto = dados.decode('utf-8', errors='ignore')
+    return texto.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def matar(processo: subprocess.Popen):
+    '''Mata o processo e, em sistemas POSIX, todo o seu grupo (inclusive os filhos que ele criou).'''
+    if POSIX:
+        try:
+            os.killpg(processo.pid, signal.SIGKILL)
+            return
+        except ProcessLookupError:
+            pass
+    try:
+        processo.kill()
+    except ProcessLookupError:
+        pass
+
+
+def _matar_grupo(pid: int):
+    '''Mata o grupo de processos `pid` ou, se o processo ainda não criou o seu grupo, só o processo.'''
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+@contextmanager
+def registrar_grupo(pid: int):
+    '''Registra o grupo de processos `pid`, iniciado pela thread atual, enquanto o bloco executa, para que
+    `interromper` possa matá-lo. Se a thread já foi interrompida, o grupo é morto na hora.'''
+    thread = threading.get_ident()
+    with _trava_grupos:
+        _grupos.setdefault(thread, set()).add(pid)
+        if thread in _interrompidas:
+            _matar_grupo(pid)
+    try:
+        yield
+    finally:
+        with _trava_grupos:
+            _grupos[thread].discard(pid)
+            if not _grupos[thread]:
+                del _grupos[thread]
+
+
+def interromper(threads: Iterable[int]):
+    '''Mata os grupos de processos em execução iniciados pelas `threads` e os que elas iniciarem até chamarem
+    `retomar`. As execuções interrompidas lançam `ExecucaoCancelada` ao terminar.'''
+    with _trava_grupos:
+        for thread in threads:
+            _interrompidas.add(thread)
+            for pid in _grupos.get(thread, ()):
+                _matar_grupo(pid)
+
+
+def retomar():
+    '''Desfaz `interromper` para a thread atual.'''
+    with _trava_grupos:
+        _interrompidas.discard(threading.get_ident())
+
+
+def verificar_interrupcao():
+    '''Lança `ExecucaoCancelada` se a thread atual foi interrompida.'''
+    if threading.get_ident() in _interrompidas:
+        raise ExecucaoCancelada()
+
+
+def _aplicar_limites(pid: int, limites: Limites):
+    '''Aplica os rlimits ao processo `pid`, já iniciado (Linux).'''
+    for recurso, valor in limites.rlimits():
+        try:
+            resource.prlimit(pid, recurso, valor)
+        except ProcessLookupError:  # Já terminou
+            pass
+
+
+def _preexec(limites: Limites) -> Callable[[], None] | None:
+    '''Retorna a função que aplica os rlimits no filho antes do `exec`, onde não há `prlimit` (macOS, por exemplo).'''
+    rlimits = limites.rlimits()
+    if not rlimits or hasattr(resource, 'prlimit'):
+        return None
+    def aplicar():
+        for recurso, valor in rlimits:
+            resource.setrlimit(recurso, valor)
+    return aplicar
+
+
+def esperar(pid: int, prazo: float | None = None):
+    '''Espera o processo filho `pid` terminar, até o instante `prazo` (de `time.monotonic`), se dado.
+
+    Retorno:
+    O status e o uso de recursos (`resource.struct_rusage`) do `os.wait4`, ou None se o prazo passou.
+    '''
+    if prazo is None:
+        _, status, uso = os.wait4(pid, 0)
+        return status, uso
+    pidfd = None
+    if hasattr(os, 'pidfd_open'):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            pass
+    try:
+        espera = 0.0005
+        while True:
+            terminou, status, uso = os.wait4(pid, os.WNOHANG)
+            if terminou:
+                return status, uso
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                return None
+            if pidfd is not None:
+                select.select([pidfd], [], [], restante)
+            else:
+                time.sleep(min(espera, restante))
+                espera = min(espera * 2, 0.01)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def executar_processo(comando: list[str], entrada: str | Entrada, limites: Limites,
+                      observadores: list[Callable[[str], bool]] = [], limitar_saida: bool = True) -> Execucao:
+    '''Executa `comando`, escrevendo `entrada` no teclado e capturando a saída e o erro aos poucos.
+
+    Parâmetros:
+    - `comando` é o comando e seus argumentos.
+    - `entrada` é a entrada do teclado, um texto ou uma `Entrada`, escrita no processo um bloco por vez.
+    - `limites` são os limites de recursos. Ao exceder o timeout ou o limite de saída, o processo é morto.
+    - `observadores` recebem cada trecho novo da saída (já decodificado). Se algum retornar True, o processo é morto
+      e a execução é marcada como `interrompida`.
+    - `limitar_saida`: se False, a saída pode passar do limite sem interromper o processo, e os observadores a recebem
+      inteira, mas só o início e o fim são mantidos (veja `Captura`). O erro continua limitado.
+
+    Retorno:
+    A `Execucao`. As mensagens de timeout e de limites excedidos são colocadas em `erro`.
+    '''
+    if isinstance(entrada, str):
+        entrada = EntradaTexto(entrada)
+    if not POSIX:
+        return _executar_sem_selectors(comando, entrada, limites)
+    inicio = time.perf_counter_ns()
+    processo = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, start_new_session=True,
+                                preexec_fn=_preexec(limites))
+    with registrar_grupo(processo.pid):
+        if hasattr(resource, 'prlimit'):
+            _aplicar_limites(processo.pid, limites)
+        iniciado = time.perf_counter_ns()
+        prazo = time.monotonic() + limites.timeout
+        saida = Captura(limites.limite_saida, continuar=not limitar_saida)
+        erro = Captura(limites.limite_saida)
+        decodificador = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        fonte = entrada.blocos()
+        blocos = (bloco for bloco in fonte if bloco)
+        pendente = memoryview(next(blocos, b''))
+        expirou = interrompida = False
+
+        seletor = selectors.DefaultSelector()
+        seletor.register(processo.stdout, selectors.EVENT_READ, saida)
+        seletor.register(processo.stderr, selectors.EVENT_READ, erro)
+        if pendente:
+            os.set_blocking(processo.stdin.fileno(), False)
+            seletor.register(processo.stdin, selectors.EVENT_WRITE)
+        else:
+            processo.stdin.close()
+        try:
+            while seletor.get_map():
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    expirou = True
+                    break
+                for chave, _ in seletor.select(restante):
+                    if chave.fileobj is processo.stdin:
+                        try:
+                            escritos = os.write(chave.fd, pendente[:TAMANHO_BLOCO])
+                            pendente = pendente[escritos:]
+                            if not pendente:
+                                pendente = memoryview(next(blocos, b''))
+                        except BrokenPipeError:  # O script terminou sem ler toda a entrada
+                            pendente = pendente[:0]
+                        if not pendente:
+                            seletor.unregister(processo.stdin)
+                            processo.stdin.close()
+                        continue
+                    bloco = os.read(chave.fd, TAMANHO_BLOCO)
+                    if not bloco:
+                        seletor.unregister(chave.fileobj)
+                        continue
+                    captura: Captura = chave.data
+                    captura.adicionar(bloco)
+                    if captura is saida and observadores:
+                        texto = decodificador.decode(bloco)
+                        interrompida = interrompida or any([o(texto) for o in observadores])
+                if saida.excedeu or erro.excedeu or interrompida:
+                    break
+        finally:
+            seletor.close()
+            fonte.close()
+        esperado = None
+        if not (expirou or saida.excedeu or erro.excedeu or interrompida):
+            esperado = esperar(processo.pid, prazo)
+            # Se o prazo passou, fechou a saída, mas continua executando
+            expirou = esperado is None
+        if esperado is None:
+            matar(processo)
+            esperado = esperar(processo.pid)
+        else:
+            # Mata os filhos que ficaram para trás
+            try:
+                os.killpg(processo.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        status, uso = esperado
+    processo.returncode = os.waitstatus_to_exitcode(status)
+    fim = time.perf_counter_ns()
+    if rastreio.ativo:
+        rastreio.registrar('iniciar_processo', 'execucao', inicio, iniciado - inicio)
+        rastreio.registrar('executar_script', 'execucao', iniciado, fim - iniciado,
+                           {'comando': ' '.join(comando)})
+    for fluxo in (processo.stdin, processo.stdout, processo.stderr):
+        if not fluxo.closed:
+            fluxo.close()
+    verificar_interrupcao()
+    excedeu = 'saida' if saida.excedeu else 'erro' if erro.excedeu else None
+    return montar_execucao(processo.returncode, saida.texto(), erro.texto(), limites,
+                           expirou, excedeu, interrompida, resumida=saida.total > saida.limite,
+                           tempo=(fim - inicio) / 1e9,
+                           tempo_cpu=uso.ru_utime + uso.ru_stime,
+                           memoria=uso.ru_maxrss * ESCALA_MAXRSS)
+
+
+def montar_execucao(codigo: int, saida: str, erro: str, limites: Limites,
+                    expirou: bool = False, excedeu: str | None = None,
+                    interrompida: bool = False, resumida: bool = False, **medidas) -> Execucao:
+    '''Monta a `Execucao`, com as mensagens de erro do corretor, a partir do que foi capturado.
+
+    Parâmetros:
+    - `codigo`, `saida` e `erro` são o que foi capturado do processo.
+    - `limites` são os limites usados na execução.
+    - `expirou` indica se o timeout expirou.
+    - `excedeu` é o fluxo que excedeu o limite de saída (`"saida"` ou `"erro"`), se algum excedeu.
+    - `interrompida` indica se um observador interrompeu o processo.
+    - `resumida` indica se a saída passou do limite sem interromper o processo (veja `Execucao`).
+    - `medidas` são o `tempo`, o `tempo_cpu` e a `memoria` medidos (veja `Execucao`).
+    '''
+    if expirou:
+        return Execucao(1, saida if saida else '\n', f'Timeout de {limites.timeout}s expirado.',
+                        expirou=True, **medidas)
+    if excedeu:
+        fluxo = 'A saída' if excedeu == 'saida' else 'O erro'
+        return Execucao(1, saida, f'{fluxo} excedeu o limite de {limites.limite_saida} bytes.\n{erro}',
+                        truncada=True, **medidas)
+    if limites.limite_cpu and POSIX and codigo in (-signal.SIGXCPU, -signal.SIGKILL):
+        return Execucao(1, saida, f'Limite de CPU de {limites.limite_cpu}s excedido.\n{erro}',
+                        resumida=resumida, **medidas)
+    return Execucao(codigo, saida, erro, interrompida=interrompida, resumida=resumida, **medidas)
+
+
+def _executar_sem_selectors(comando: list[str], entrada: Entrada, limites: Limites) -> Execucao:
+    '''Versão para sistemas em que `selectors` não funciona com pipes (Windows).
+    A entrada e a saída são acumuladas inteiras, e a saída só é limitada ao final. Os limites de CPU e de memória não são aplicados
+    e só o tempo de relógio é medido. O processo não é morto por `interromper`, mas o seu resultado é descartado.'''
+    verificar_interrupcao()
+    inicio = time.perf_counter()
+    try:
+        processo = subprocess.run(comando, capture_output=True, input=entrada.conteudo(),
+                                  timeout=limites.timeout)
+        codigo, dados_saida, dados_erro, expirou = \
+            processo.returncode, processo.stdout, processo.stderr, False
+    except subprocess.TimeoutExpired as e:
+        codigo, dados_saida, dados_erro, expirou = 1, e.stdout or b'', e.stderr or b'', True
+    tempo = time.perf_counter() - inicio
+    verificar_interrupcao()
+    saida = Captura(limites.limite_saida)
+    saida.adicionar(dados_saida)
+    erro = Captura(limites.limite_saida)
+    erro.adicionar(dados_erro)
+    excedeu = 'saida' if saida.excedeu else 'erro' if erro.excedeu else None
+    return montar_execucao(codigo, saida.texto(), erro.texto(), limites, expirou, excedeu,
+                           tempo=tempo)
@@ -0,0 +1,165 @@
+'''Instrumentação das fases da correção.
+
+Quando ativado, cada fase instrumentada (execução do script, verificações, atualização da interface etc.)
+registra um intervalo com o seu início e a sua duração. Os intervalos podem ser exportados no formato
+Chrome Trace (JSON), aberto no Perfetto (https://ui.perfetto.dev) ou em `chrome://tracing`, e resumidos numa tabela.
+
+Desativado (o padrão), cada ponto de instrumentação custa só a consulta de uma variável global.
+
+Para ativar, use a opção `--rastreio ARQUIVO` da linha de comando ou a variável de ambiente `CORRETOR_RASTREIO=ARQUIVO`.
+Ao final do programa, o rastro é gravado em `ARQUIVO` e o resumo é exibido na saída de erro.
+'''
+
+import atexit, contextlib, functools, json, os, sys, threading, time
+
+from typing import Callable
+
+# Constantes
+VARIAVEL_AMBIENTE = 'CORRETOR_RASTREIO'
+
+# Estado
+ativo: bool = False
+# Intervalos registrados: (nome, categoria, início em µs, duração em µs, pid, tid, args)
+_eventos: list[tuple[str, str, float, float, int, int, dict]] = []
+# Nomes das threads, por (pid, tid)
+_threads: dict[tuple[int, int], str] = {}
+_NULO = contextlib.nullcontext()
+
+
+# Classes
+
+class _Intervalo:
+    '''Registra a duração de um bloco `with`.'''
+    __slots__ = ('nome', 'categoria', 'args', 'inicio')
+
+    def __init__(self, nome: str, categoria: str, args: dict):
+        self.nome = nome
+        self.categoria = categoria
+        self.args = args
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_):
+        fim = time.perf_counter_ns()
+        registrar(self.nome, self.categoria, self.inicio, fim - self.inicio, self.args)
+
+
+# Funções
+
+def intervalo(nome: str, categoria: str = 'corretor', **args):
+    '''Retorna um gerenciador de contexto que registra a duração do bloco como a fase `nome`.
+
+    Parâmetros:
+    - `nome` é o nome da fase (as fases de mesmo nome são somadas no resumo).
+    - `categoria` agrupa fases relacionadas (`"execucao"`, `"verificacao"`, `"interface"` etc.).
+    - `args` são informações extras exibidas no visualizador do rastro.
+    '''
+    if not ativo:
+        return _NULO
+    return _Intervalo(nome, categoria, args)
+
+
+def medido(nome: str, categoria: str = 'corretor') -> Callable[[Callable], Callable]:
+    '''Decorador que registra cada chamada da função como a fase `nome`.'''
+    def decorador(funcao: Callable) -> Callable:
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not ativo:
+                return funcao(*args, **kwargs)
+            with _Intervalo(nome, categoria, {}):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def registrar(nome: str, categoria: str, inicio_ns: int, duracao_ns: int, args: dict | None = None):
+    '''Registra um intervalo já medido (com `time.perf_counter_ns`).'''
+    pid = os.getpid()
+    tid = threading.get_native_id()
+    if (pid, tid) not in _threads:
+        _threads[(pid, tid)] = threading.current_thread().name
+    _eventos.append((nome, categoria, inicio_ns / 1000, duracao_ns / 1000, pid, tid, args or {}))
+
+
+def ativar(caminho: str | None = None):
+    '''Ativa a instrumentação.
+
+    Parâmetros:
+    - `caminho` é o arquivo em que o rastro é gravado ao final do programa, quando também é exibido o resumo.
+      Se None, os intervalos só são acumulados (veja `coletar`).
+    '''
+    global ativo
+    ativo = True
+    if caminho:
+        atexit.register(_finalizar, caminho)
+
+
+def desativar():
+    '''Desativa a instrumentação e descarta os intervalos registrados.'''
+    global ativo
+    ativo = False
+    _eventos.clear()
+    _threads.clear()
+
+
+def configurar(caminho: str | None = None):
+    '''Ativa a instrumentação se `caminho` (da linha de comando) ou a variável de ambiente `CORRETOR_RASTREIO` for dado.'''
+    caminho = caminho or os.environ.get(VARIAVEL_AMBIENTE)
+    if caminho:
+        ativar(caminho)
+
+
+def coletar() -> dict:
+    '''Retorna e descarta os intervalos registrados até agora, para serem incorporados por outro processo.'''
+    eventos = _eventos[:]
+    del _eventos[:len(eventos)]
+    return {'eventos': eventos, 'threads': list(_threads.items())}
+
+
+def incorporar(coletados: dict):
+    '''Incorpora os intervalos retornados por `coletar` em outro processo.'''
+    _eventos.extend(tuple(e) for e in coletados['eventos'])
+    for (pid, tid), nome in coletados['threads']:
+        _threads.setdefault((pid, tid), nome)
+
+
+def exportar_chrome(caminho: str):
+    '''Grava os intervalos registrados em `caminho`, no formato Chrome Trace (JSON).'''
+    eventos = [{'name': nome, 'cat': categoria, 'ph': 'X', 'ts': inicio, 'dur': duracao,
+                'pid': pid, 'tid': tid, 'args': args}
+               for nome, categoria, inicio, duracao, pid, tid, args in list(_eventos)]
+    eventos += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': nome}}
+                for (pid, tid), nome in list(_threads.items())]
+    with open(caminho, 'w', encoding='utf-8') as arq:
+        json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, arq)
+
+
+def resumo() -> list[dict]:
+    '''Retorna, para cada fase, o número de intervalos e as durações total, média e máxima (em ms),
+    da fase com maior tempo total para a de menor.'''
+    fases: dict[tuple[str, str], list[float]] = {}
+    for nome, categoria, _, duracao, *_ in list(_eventos):
+        fases.setdefault((categoria, nome), []).append(duracao / 1000)
+    linhas = [{'categoria': categoria, 'fase': nome, 'n': len(duracoes), 'total': sum(duracoes),
+               'media': sum(duracoes) / len(duracoes), 'max': max(duracoes)}
+              for (categoria, nome), duracoes in fases.items()]
+    linhas.sort(key=lambda l: l['total'], reverse=True)
+    return linhas
+
+
+def tabela() -> str:
+    '''Retorna o `resumo` formatado como uma tabela de texto.'''
+    linhas = [f'{"categoria":12} {"fase":28} {"n":>7} {"total (ms)":>12} {"média (ms)":>11} {"máx. (ms)":>11}']
+    for l in resumo():
+        linhas += [f'{l["categoria"]:12} {l["fase"]:28} {l["n"]:7} {l["total"]:12.1f} '
+                   f'{l["media"]:11.3f} {l["max"]:11.3f}']
+    return '\n'.join(linhas)
+
+
+def _finalizar(caminho: str):
+    '''Grava o rastro e exibe o resumo (ao final do programa).'''
+    exportar_chrome(caminho)
+    print(tabela(), file=sys.stderr)
+    print(f'Rastro gravado em "{caminho}".', file=sys.stderr)
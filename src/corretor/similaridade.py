@@ -0,0 +1,212 @@
+'''Detecção de respostas parecidas numa turma, para apoiar a verificação de plágio.
+
+Cada script é reduzido à sequência dos tipos dos nós da sua árvore sintática, sem nomes nem valores:
+renomear variáveis, trocar literais ou mudar a formatação não muda a sequência.
+Os trechos de `TAMANHO_SHINGLE` nós consecutivos formam um conjunto, resumido numa assinatura MinHash
+de `PERMUTACOES` números, cuja fração de posições iguais entre dois scripts estima a semelhança (Jaccard) dos conjuntos.
+As assinaturas são divididas em `BANDAS` faixas, e só os scripts que coincidem em alguma faixa inteira (LSH)
+são comparados: o custo cresce com o tamanho da turma, e não com o número de pares.
+
+As assinaturas ficam em cache em disco, com chave no hash do conteúdo do script, então corrigir de novo
+a turma com uma submissão nova só analisa essa submissão.
+
+Uso:
+    python -m src.corretor.similaridade config.json submissoes/ [--limiar 0.8] [--sem-cache]
+'''
+
+import argparse, ast, hashlib, json, os, random
+
+from collections import defaultdict
+
+from . import analise, plano
+from .cache import diretorio_padrao
+from .erros import ErroConfiguracao
+from .lote import listar_alunos
+
+# Constantes
+TAMANHO_SHINGLE = 5  # Nós consecutivos em cada trecho
+PERMUTACOES = 128  # Tamanho da assinatura MinHash
+BANDAS = 32  # Faixas do índice LSH (cada uma com PERMUTACOES // BANDAS posições)
+LIMIAR = 0.8  # Semelhança mínima dos pares relatados
+VERSAO_FORMATO = 1  # Mude quando a normalização ou a assinatura mudarem, para invalidar o cache
+_PRIMO = (1 << 61) - 1
+_rng = random.Random(VERSAO_FORMATO)
+_COEFICIENTES = [(_rng.randrange(1, _PRIMO), _rng.randrange(_PRIMO)) for _ in range(PERMUTACOES)]
+# Nós que só dizem se um nome é lido ou escrito
+_IGNORADOS = (ast.expr_context,)
+
+# Tipos
+Assinatura = list[int]
+
+
+# Funções
+
+def normalizar(arvore: ast.AST) -> list[str]:
+    '''Retorna os tipos dos nós de `arvore` em pré-ordem, sem nomes nem valores (constantes viram o seu tipo).
+    O percurso é iterativo, como em `analise`.'''
+    tokens = []
+    pilha = [arvore]
+    while pilha:
+        no = pilha.pop()
+        if isinstance(no, _IGNORADOS):
+            continue
+        if isinstance(no, ast.Constant):
+            tokens += [f'Constant:{type(no.value).__name__}']
+        else:
+            tokens += [type(no).__name__]
+        pilha.extend(reversed(list(ast.iter_child_nodes(no))))
+    return tokens
+
+
+def _hash(texto: str) -> int:
+    '''Hash estável entre execuções (o `hash` do Python muda a cada processo).'''
+    return int.from_bytes(hashlib.blake2b(texto.encode(), digest_size=8).digest(), 'big')
+
+
+def calcular_assinatura(tokens: list[str]) -> Assinatura:
+    '''Retorna a assinatura MinHash dos trechos de `TAMANHO_SHINGLE` tokens consecutivos.'''
+    n = max(1, len(tokens) - TAMANHO_SHINGLE + 1)
+    shingles = {_hash(' '.join(tokens[i:i + TAMANHO_SHINGLE])) for i in range(n)}
+    return [min((a * s + b) % _PRIMO for s in shingles) for a, b in _COEFICIENTES]
+
+
+def semelhanca(a: Assinatura, b: Assinatura) -> float:
+    '''Estimativa da semelhança de Jaccard entre os scripts de duas assinaturas.'''
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def unir(assinaturas: list[Assinatura]) -> Assinatura:
+    '''Retorna a assinatura da união dos conjuntos das `assinaturas` (por exemplo, dos vários scripts de uma questão).'''
+    return [min(valores) for valores in zip(*assinaturas)]
+
+
+def assinatura(caminho: str, diretorio_cache: str | None = None) -> Assinatura | None:
+    '''Retorna a assinatura do script em `caminho`, ou None se ele não existir ou tiver erro de sintaxe.
+
+    Parâmetros:
+    - `caminho` é o caminho do script.
+    - `diretorio_cache` é o diretório do cache de resultados (veja `cache`), onde as assinaturas também são guardadas,
+      num subdiretório próprio que o limite de tamanho dos resultados não apaga. Se omitido, elas não são guardadas.
+    '''
+    try:
+        with open(caminho, 'rb') as arq:
+            conteudo = arq.read()
+    except OSError:
+        return None
+    arquivo_cache = None
+    if diretorio_cache:
+        chave = hashlib.sha256(conteudo + f'\0{VERSAO_FORMATO},{TAMANHO_SHINGLE},{PERMUTACOES}'.encode()).hexdigest()
+        arquivo_cache = os.path.join(diretorio_cache, 'assinaturas', f'{chave}.json')
+        try:
+            with open(arquivo_cache, encoding='utf-8') as arq:
+                return json.load(arq)
+        except (OSError, ValueError):
+            pass
+    try:
+        tokens = normalizar(analise.analisar(caminho).arvore)
+    except (OSError, SyntaxError):
+        return None
+    resultado = calcular_assinatura(tokens)
+    if arquivo_cache:
+        os.makedirs(os.path.dirname(arquivo_cache), exist_ok=True)
+        temporario = f'{arquivo_cache}.{os.getpid()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arq:
+            json.dump(resultado, arq)
+        os.replace(temporario, arquivo_cache)
+    return resultado
+
+
+def comparar_turma(caminho_config: str, pasta_submissoes: str, limiar: float = LIMIAR,
+                   diretorio_cache: str | None = None) -> list[tuple[str, list[tuple[str, str, float]]]]:
+    '''Procura respostas parecidas em cada questão da atividade.
+
+    Parâmetros:
+    - `caminho_config` é o arquivo de configuração da atividade; os scripts de cada questão são os das suas correções.
+    - `pasta_submissoes` é o diretório com uma subpasta por aluno (veja `lote`).
+    - `limiar` é a semelhança mínima dos pares relatados, entre 0 e 1.
+    - `diretorio_cache` é o diretório do cache (veja `assinatura`).
+
+    Retorno:
+    Para cada questão, a sua descrição e os pares `(aluno, aluno, semelhança)` parecidos, dos mais parecidos para os menos.
+
+    Lança `ErroConfiguracao` se o arquivo de configuração for inválido.
+    '''
+    plano_atividade = plano.carregar(caminho_config)
+    alunos = listar_alunos(pasta_submissoes)
+    resultado = []
+    for questao in plano_atividade.questoes:
+        scripts = list(dict.fromkeys(c.script for c in questao.correcoes))
+        indice = IndiceLSH()
+        for aluno, pasta in alunos:
+            assinaturas = [a for s in scripts
+                           if (a := assinatura(os.path.join(pasta, s), diretorio_cache)) is not None]
+            if assinaturas:
+                indice.adicionar(aluno, unir(assinaturas))
+        resultado += [(questao.descricao, indice.pares(limiar))]
+    return resultado
+
+
+# Classes
+
+class IndiceLSH:
+    '''Índice LSH de assinaturas MinHash: encontra os pares parecidos sem comparar todos com todos.'''
+
+    def __init__(self, bandas: int = BANDAS):
+        '''Construtor. Com `bandas` faixas de `r` posições, pares com semelhança `s` viram candidatos com
+        probabilidade `1 - (1 - s**r)**bandas` (com os valores padrão, quase certamente a partir de 0,6).'''
+        self.bandas: int = bandas
+        self.assinaturas: dict[str, Assinatura] = {}
+        self._baldes: list[defaultdict[tuple, list[str]]] = [defaultdict(list) for _ in range(bandas)]
+
+    def adicionar(self, chave: str, assinatura: Assinatura):
+        '''Adiciona a assinatura de `chave` ao índice.'''
+        r = len(assinatura) // self.bandas
+        self.assinaturas[chave] = assinatura
+        for i, baldes in enumerate(self._baldes):
+            baldes[tuple(assinatura[i * r:(i + 1) * r])].append(chave)
+
+    def candidatos(self) -> set[tuple[str, str]]:
+        '''Retorna os pares que coincidem em alguma faixa, cada um como uma tupla ordenada.'''
+        pares = set()
+        for baldes in self._baldes:
+            for chaves in baldes.values():
+                for i, a in enumerate(chaves):
+                    for b in chaves[i + 1:]:
+                        pares.add((a, b) if a < b else (b, a))
+        return pares
+
+    def pares(self, limiar: float = LIMIAR) -> list[tuple[str, str, float]]:
+        '''Retorna os candidatos com semelhança estimada de pelo menos `limiar`, dos mais parecidos para os menos.'''
+        pares = [(a, b, semelhanca(self.assinaturas[a], self.assinaturas[b])) for a, b in self.candidatos()]
+        return sorted((p for p in pares if p[2] >= limiar), key=lambda p: (-p[2], p[0], p[1]))
+
+
+# PROGRAMA PRINCIPAL
+
+def main(argv: list[str] | None = None):
+    '''Exibe os pares de respostas parecidas de cada questão.'''
+    parser = argparse.ArgumentParser(description='Procura respostas parecidas nas submissões de uma turma.')
+    parser.add_argument('config', help='arquivo de configuração da atividade')
+    parser.add_argument('submissoes', help='diretório com uma subpasta por aluno')
+    parser.add_argument('--limiar', type=float, default=LIMIAR,
+                        help=f'semelhança mínima dos pares exibidos, entre 0 e 1 (padrão: {LIMIAR})')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='analisa todos os scripts, sem reaproveitar as assinaturas guardadas')
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.config):
+        parser.error(f'arquivo de configuração "{args.config}" não encontrado')
+    diretorio_cache = None if args.sem_cache else diretorio_padrao()
+    try:
+        questoes = comparar_turma(args.config, args.submissoes, args.limiar, diretorio_cache)
+    except ErroConfiguracao as e:
+        parser.error(f'erro no arquivo de configuração "{args.config}": {e}')
+    for i, (descricao, pares) in enumerate(questoes):
+        print(f'Questão {i + 1}: {descricao}')
+        if not pares:
+            print('  nenhum par parecido')
+        for a, b, s in pares:
+            print(f'  {s:.0%}  {a}  {b}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+'''Funções que verificam a saída dos scripts e o registro que as associa aos nomes usados no arquivo de configuração.
+
+As verificações de uma correção são compiladas uma vez, quando a configuração é lida:
+o nome em `"func_expect"` é resolvido para a função registrada e os argumentos em `"args_expect"` são preparados
+(por exemplo, expressões regulares são compiladas). Nomes desconhecidos causam um `ErroConfiguracao` na leitura.
+'''
+
+import json, os, re
+
+from collections.abc import Mapping
+from typing import Any, Callable
+
+from .analise import Analise, analisar
+from .comparacao import ComparadorArquivo, comparar
+from .erros import ErroConfiguracao
+
+
+# Classes
+
+class Verificador:
+    '''Uma função de verificação registrada.'''
+
+    def __init__(self, nome: str, func: Callable[[str, Any], bool],
+                 preparar: Callable[[Any, str], Any] | None = None,
+                 falha_certa: Callable[[str, Any], bool] | None = None,
+                 fluxo: Callable[[Any], Any] | None = None,
+                 detalhar: Callable[[str, Any, bool], str | None] | None = None,
+                 decidir: Callable[[Any, bool], str | None] | None = None):
+        '''Construtor.
+
+        Parâmetros:
+        - `nome` é o nome usado em `"func_expect"`.
+        - `func` é a função, que recebe a saída do script e os argumentos preparados e retorna se passou.
+        - `preparar` converte `"args_expect"` no argumento passado para `func`.
+          Recebe `"args_expect"` e o diretório da correção. Deve lançar `ValueError` se o argumento for inválido.
+        - `falha_certa` recebe o início da saída (enquanto o script ainda executa) e os argumentos preparados,
+          e retorna True se a verificação certamente vai falhar, qualquer que seja o resto da saída.
+        - `fluxo` recebe os argumentos preparados e retorna um objeto com o método `alimentar(trecho) -> bool`,
+          que recebe cada trecho novo da saída e retorna True se a verificação certamente vai falhar.
+          É a alternativa incremental a `falha_certa`, para verificações que não precisam rever a saída desde o início.
+        - `detalhar` recebe a saída, os argumentos preparados e se a saída está completa, e retorna uma explicação
+          da falha (ou None), exibida depois de `msg_erro`.
+        - `decidir`, se dado, faz do `fluxo` o juiz da verificação: o fluxo recebe a saída inteira, mesmo além do
+          limite de saída, e `decidir` recebe o objeto do fluxo e se a saída está completa e retorna a explicação
+          da falha, ou None se não há falha. Assim, a saída não precisa ser guardada inteira para ser verificada.
+        '''
+        self.nome: str = nome
+        self.func = func
+        self.preparar = preparar
+        self.falha_certa = falha_certa
+        self.fluxo = fluxo
+        self.detalhar = detalhar
+        self.decidir = decidir
+
+
+class Verificacao:
+    '''Uma verificação compilada, pronta para ser aplicada à saída de um script.'''
+
+    def __init__(self, verificador: Verificador, args: Any, chave: str | None = None):
+        '''Construtor.
+
+        Parâmetros:
+        - `verificador` é a função de verificação registrada.
+        - `args` são os argumentos preparados.
+        - `chave` identifica a verificação nos vereditos das execuções (veja `processo.Execucao`).
+          O padrão é o nome do verificador.
+        '''
+        self.verificador: Verificador = verificador
+        self.args: Any = args
+        self.chave: str = chave or verificador.nome
+
+    def __call__(self, saida: str) -> bool:
+        '''Retorna se `saida` passa nesta verificação.'''
+        return self.verificador.func(saida, self.args)
+
+    @property
+    def antecipavel(self) -> bool:
+        '''Retorna se esta verificação pode decidir uma falha antes de o script terminar.'''
+        return self.verificador.falha_certa is not None or self.verificador.fluxo is not None
+
+    def falha_certa(self, inicio_saida: str) -> bool:
+        '''Retorna True se, dado o início da saída, esta verificação certamente vai falhar.'''
+        if self.verificador.falha_certa is None:
+            return False
+        return self.verificador.falha_certa(inicio_saida, self.args)
+
+    @property
+    def decidida_no_fluxo(self) -> bool:
+        '''Retorna se esta verificação é decidida pelo seu fluxo, que recebe a saída inteira (veja `Verificador`).'''
+        return self.verificador.decidir is not None
+
+    def decidir(self, fluxo, completa: bool = True) -> str | None:
+        '''Retorna a explicação da falha decidida pelo `fluxo` desta verificação, ou None se não há falha.
+        `completa` é False se o script foi interrompido antes do fim: nesse caso, só falhas já certas são retornadas.
+        Os recursos do fluxo são liberados.'''
+        return self.verificador.decidir(fluxo, completa)
+
+    def iniciar_fluxo(self):
+        '''Retorna o acompanhamento incremental da saída desta verificação (veja `Verificador`), ou None se ela não tem.'''
+        if self.verificador.fluxo is None:
+            return None
+        return self.verificador.fluxo(self.args)
+
+    def detalhar(self, saida: str, completa: bool = True) -> str | None:
+        '''Retorna uma explicação de por que `saida` não passa nesta verificação, se houver.
+        `completa` é False se o script foi interrompido antes do fim.'''
+        if self.verificador.detalhar is None:
+            return None
+        return self.verificador.detalhar(saida, self.args, completa)
+
+
+# Registro
+
+VERIFICADORES: dict[str, Verificador] = {}
+
+
+def registrar(nome: str, preparar: Callable[[Any, str], Any] | None = None,
+              falha_certa: Callable[[str, Any], bool] | None = None,
+              fluxo: Callable[[Any], Any] | None = None,
+              detalhar: Callable[[str, Any, bool], str | None] | None = None,
+              decidir: Callable[[Any, bool], str | None] | None = None):
+    '''Decorador que registra uma função de verificação com o `nome` usado em `"func_expect"`.
+
+    Parâmetros:
+    - `nome` é o nome da verificação.
+    - `preparar` converte `"args_expect"` no argumento passado para a função (veja `Verificador`).
+    - `falha_certa` e `fluxo` antecipam falhas a partir do início da saída (veja `Verificador`).
+    - `detalhar` explica as falhas (veja `Verificador`).
+    - `decidir` decide a verificação a partir do fluxo (veja `Verificador`).
+    '''
+    def decorador(func):
+        VERIFICADORES[nome] = Verificador(nome, func, preparar, falha_certa, fluxo, detalhar, decidir)
+        return func
+    return decorador
+
+
+def compilar(verificacao: dict, diretorio: str = '') -> Verificacao:
+    '''Compila uma verificação do arquivo de configuração.
+
+    Parâmetros:
+    - `verificacao` é um dicionário `{"func_expect": ..., "args_expect": ...}`.
+    - `diretorio` é o diretório da correção, base dos caminhos relativos nos argumentos.
+
+    Retorno:
+    A verificação compilada.
+    '''
+    nome = verificacao.get('func_expect')
+    if nome is None:
+        raise ErroConfiguracao(f'Verificação sem "func_expect": {verificacao}.')
+    if nome not in VERIFICADORES:
+        raise ErroConfiguracao(f'Função de verificação "{nome}" desconhecida. '
+                               f'Use uma destas: {", ".join(sorted(VERIFICADORES))}.')
+    if 'args_expect' not in verificacao:
+        raise ErroConfiguracao(f'Verificação "{nome}" sem "args_expect".')
+    verificador = VERIFICADORES[nome]
+    args = verificacao['args_expect']
+    if verificador.preparar is not None:
+        try:
+            args = verificador.preparar(args, diretorio)
+        except (ValueError, re.error) as e:
+            raise ErroConfiguracao(f'Argumento inválido para "{nome}": {args!r} ({e}).') from e
+    return Verificacao(verificador, args, json.dumps([nome, verificacao['args_expect']], sort_keys=True))
+
+
+# Funções de correcao
+
+def _preparar_regex(regex: str, _) -> re.Pattern:
+    return re.compile(regex)
+
+@registrar('testar_regex', preparar=_preparar_regex)
+def testar_regex(resultado: str, regex: str | re.Pattern) -> bool:
+    '''Verifica se `regex` casa em `resultado`.'''
+    resultado = resultado.strip("\n\r\t ")
+    padrao = re.compile(regex)  # Não recompila se já for um re.Pattern
+    if padrao.search(resultado) is None:
+        return False
+    return True
+
+# Construções cujo resultado pode mudar quando a saída cresce
+_SENSIVEIS_AO_FIM = re.compile(r'\$|\\Z|\\b|\\B|\(\?=|\(\?!|\(\?<=|\(\?<!')
+
+def _nao_regex_falha_certa(inicio_saida: str, padrao: re.Pattern) -> bool:
+    '''Se a expressão já casa no início da saída, longe do fim, ela vai casar na saída completa.'''
+    if _SENSIVEIS_AO_FIM.search(padrao.pattern):
+        return False
+    inicio_saida = inicio_saida.lstrip("\n\r\t ")
+    casamento = padrao.search(inicio_saida)
+    return casamento is not None and casamento.end() <= len(inicio_saida.rstrip("\n\r\t "))
+
+@registrar('testar_nao_regex', preparar=_preparar_regex, falha_certa=_nao_regex_falha_certa)
+def testar_nao_regex(resultado: str, regex: str | re.Pattern) -> bool:
+    '''Verifica se `regex` não casa em `resultado`.'''
+    return not testar_regex(resultado, regex)
+
+# Comparação com um arquivo de referência (veja `comparacao`)
+# O caminho do arquivo é relativo ao diretório da correção.
+
+class _Referencia:
+    '''Os argumentos preparados de `testar_arquivo`.'''
+
+    def __init__(self, caminho: str, tolerancia: float | None):
+        self.caminho: str = caminho
+        self.tolerancia: float | None = tolerancia
+
+def _preparar_referencia(args: str | dict, diretorio: str) -> _Referencia:
+    if isinstance(args, str):
+        return _Referencia(os.path.join(diretorio, args), None)
+    if not isinstance(args, Mapping) or not isinstance(args.get('arquivo'), str):
+        raise ValueError('esperado o caminho de um arquivo ou {"arquivo": ..., "tolerancia": ...}')
+    tolerancia = args.get('tolerancia')
+    if tolerancia is not None and (isinstance(tolerancia, bool) or not isinstance(tolerancia, (int, float))
+                                   or tolerancia < 0):
+        raise ValueError('"tolerancia" deve ser um número não negativo')
+    return _Referencia(os.path.join(diretorio, args['arquivo']), tolerancia)
+
+class _FluxoReferencia:
+    '''O fluxo de `testar_arquivo`: compara a saída com a referência enquanto ela é produzida.
+    Se a referência não puder ser aberta, a verificação falha com certeza.'''
+
+    def __init__(self, referencia: _Referencia):
+        self.erro: str | None = None
+        try:
+            self.comparador: ComparadorArquivo | None = ComparadorArquivo(referencia.caminho, referencia.tolerancia)
+        except OSError as e:
+            self.comparador = None
+            self.erro = f'Arquivo de referência "{referencia.caminho}" inacessível: {e.strerror}.'
+
+    def alimentar(self, trecho: str) -> bool:
+        return self.comparador is None or self.comparador.alimentar(trecho)
+
+def _fluxo_referencia(referencia: _Referencia) -> _FluxoReferencia:
+    return _FluxoReferencia(referencia)
+
+def _decidir_referencia(fluxo: _FluxoReferencia, completa: bool) -> str | None:
+    if fluxo.comparador is None:
+        return fluxo.erro
+    if completa:
+        divergencia = fluxo.comparador.concluir()
+    else:
+        fluxo.comparador.fechar()
+        divergencia = fluxo.comparador.divergencia
+    return str(divergencia) if divergencia else None
+
+def _detalhar_referencia(resultado: str, referencia: _Referencia, completa: bool) -> str | None:
+    try:
+        divergencia = comparar(resultado, referencia.caminho, referencia.tolerancia, completa)
+    except OSError as e:
+        return f'Arquivo de referência "{referencia.caminho}" inacessível: {e.strerror}.'
+    return str(divergencia) if divergencia else None
+
+@registrar('testar_arquivo', preparar=_preparar_referencia, fluxo=_fluxo_referencia, detalhar=_detalhar_referencia,
+           decidir=_decidir_referencia)
+def testar_arquivo(resultado: str, referencia: _Referencia) -> bool:
+    '''Verifica se `resultado` é igual ao arquivo de referência, linha a linha (ignorando espaços no fim das linhas
+    e linhas em branco no fim). O argumento na configuração é o caminho do arquivo ou
+    `{"arquivo": ..., "tolerancia": ...}`, para comparar palavra a palavra, com números iguais até a tolerância.
+    Executando o script, a comparação é feita durante a execução, com a saída inteira (veja `Verificador`);
+    esta função compara uma saída já capturada.'''
+    try:
+        return comparar(resultado, referencia.caminho, referencia.tolerancia) is None
+    except OSError:
+        return False
+
+# Verificações estáticas
+# Analisam o próprio script (veja `analise`), e não a saída. O caminho do script é relativo ao diretório da correção.
+
+def _preparar_caminho(caminho: str, diretorio: str) -> str:
+    if not isinstance(caminho, str):
+        raise ValueError('esperado o caminho de um script')
+    return os.path.join(diretorio, caminho)
+
+def _preparar_script_e_nomes(chave: str):
+    def preparar(args: dict, diretorio: str) -> tuple[str, list[str]]:
+        if not isinstance(args, Mapping) or 'script' not in args or chave not in args:
+            raise ValueError(f'esperado {{"script": ..., "{chave}": [...]}}')
+        return _preparar_caminho(args['script'], diretorio), list(args[chave])
+    return preparar
+
+def _analisar(caminho_script: str) -> Analise | None:
+    '''Retorna a análise do script, ou None se ele não existe ou tem erro de sintaxe.'''
+    try:
+        return analisar(caminho_script)
+    except (OSError, SyntaxError):
+        return None
+
+@registrar('testar_param_sem_tipo', preparar=_preparar_caminho)
+def testar_param_sem_tipo(_, caminho_script: str) -> bool:
+    '''Verifica se o script não tem nenhuma função com parâmetros não tipados.'''
+    analise = _analisar(caminho_script)
+    if analise is None:
+        return False
+    for func in analise.funcoes:
+        args = func.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs:
+            if arg.annotation is None:
+                return False
+    return True
+
+@registrar('testar_retorno_sem_tipo', preparar=_preparar_caminho)
+def testar_retorno_sem_tipo(_, caminho_script: str) -> bool:
+    '''Verifica se todas as funções do script têm o tipo de retorno anotado.'''
+    analise = _analisar(caminho_script)
+    if analise is None:
+        return False
+    return all(func.returns is not None for func in analise.funcoes)
+
+@registrar('testar_import_proibido', preparar=_preparar_script_e_nomes('modulos'))
+def testar_import_proibido(_, script_e_modulos: tuple[str, list[str]]) -> bool:
+    '''Verifica se o script não importa nenhum dos módulos proibidos.
+    O argumento na configuração é `{"script": ..., "modulos": [...]}`.'''
+    caminho_script, modulos = script_e_modulos
+    analise = _analisar(caminho_script)
+    if analise is None:
+        return False
+    return not any(analise.importa(m) for m in modulos)
+
+@registrar('testar_funcao_definida', preparar=_preparar_script_e_nomes('funcoes'))
+def testar_funcao_definida(_, script_e_funcoes: tuple[str, list[str]]) -> bool:
+    '''Verifica se o script define todas as funções pedidas.
+    O argumento na configuração é `{"script": ..., "funcoes": [...]}`.'''
+    caminho_script, funcoes = script_e_funcoes
+    analise = _analisar(caminho_script)
+    if analise is None:
+        return False
+    return set(funcoes) <= analise.nomes_funcoes
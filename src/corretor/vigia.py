@@ -0,0 +1,191 @@
+'''Vigia de arquivos: avisa quando os scripts das respostas mudam.
+
+No Linux, usa o inotify (sem consumir CPU enquanto nada muda); nos outros sistemas, ou se o inotify falhar,
+consulta a data de modificação dos arquivos periodicamente.
+Os diretórios dos arquivos são vigiados, e não os arquivos em si, porque muitos editores salvam escrevendo
+um arquivo novo e renomeando-o por cima do antigo.
+
+Salvamentos seguidos são agrupados: a mudança só é avisada depois de `atraso` segundos sem novos eventos.
+Arquivos salvos sem mudar o conteúdo não são avisados.
+'''
+
+import ctypes, ctypes.util, hashlib, os, queue, select, struct, sys, threading, time
+
+from typing import Iterable
+
+# Constantes
+ATRASO = 0.3  # segundos sem eventos antes de avisar as mudanças
+INTERVALO_POLLING = 0.5  # segundos entre as consultas, sem inotify
+# Eventos do inotify (veja `man inotify`)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+MASCARA = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENTO = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+# Funções
+
+def _conteudo(caminho: str) -> bytes | None:
+    '''Retorna o hash do conteúdo do arquivo, ou None se ele não existir ou não puder ser lido.'''
+    try:
+        with open(caminho, 'rb') as arq:
+            return hashlib.sha256(arq.read()).digest()
+    except OSError:
+        return None
+
+
+def _assinatura(caminho: str) -> tuple[int, int, int] | None:
+    '''Retorna `(mtime_ns, tamanho, inode)` do arquivo, ou None se ele não existir.'''
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _libc_inotify():
+    '''Retorna a libc, se ela tiver as funções do inotify, ou None.'''
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+# Classes
+
+class Vigia:
+    '''Vigia um conjunto de arquivos numa thread e coloca na fila `mudancas` cada conjunto de arquivos que mudou.
+
+    A fila pode ser consumida por outra thread, por exemplo, pelo laço do Tk com `after`.
+    '''
+
+    def __init__(self, caminhos: Iterable[str], atraso: float = ATRASO,
+                 intervalo: float = INTERVALO_POLLING, polling: bool = False):
+        '''Construtor.
+
+        Parâmetros:
+        - `caminhos` são os arquivos a vigiar. Arquivos que ainda não existem também podem ser vigiados.
+        - `atraso` é o tempo, em segundos, sem novos eventos antes de avisar as mudanças.
+        - `intervalo` é o tempo, em segundos, entre as consultas aos arquivos quando o inotify não é usado.
+        - `polling` força a consulta periódica, mesmo com inotify disponível.
+        '''
+        self.caminhos: set[str] = {os.path.abspath(c) for c in caminhos}
+        self.atraso: float = atraso
+        self.intervalo: float = intervalo
+        self.mudancas: queue.SimpleQueue[set[str]] = queue.SimpleQueue()
+        self._conteudos = {c: _conteudo(c) for c in self.caminhos}
+        self._libc = None if polling else _libc_inotify()
+        self._parar = threading.Event()
+        self._acordar_r, self._acordar_w = os.pipe()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def usa_inotify(self) -> bool:
+        return self._libc is not None
+
+    def iniciar(self):
+        '''Começa a vigiar os arquivos. Mudanças feitas depois do retorno já são percebidas.'''
+        fd = self._iniciar_inotify() if self._libc is not None else None
+        if fd is None:
+            alvo, args = self._executar_polling, ({c: _assinatura(c) for c in self.caminhos},)
+        else:
+            alvo, args = self._executar_inotify, (fd,)
+        self._thread = threading.Thread(target=alvo, args=args, name='vigia', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        '''Para de vigiar os arquivos e espera a thread terminar.'''
+        self._parar.set()
+        os.write(self._acordar_w, b'x')
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        os.close(self._acordar_r)
+        os.close(self._acordar_w)
+
+    def _iniciar_inotify(self) -> int | None:
+        '''Cria o inotify e vigia os diretórios dos arquivos. Retorna None se não for possível.'''
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            self._libc = None
+            return None
+        self._diretorios: dict[int, str] = {}
+        for diretorio in {os.path.dirname(c) for c in self.caminhos}:
+            wd = self._libc.inotify_add_watch(fd, os.fsencode(diretorio), MASCARA)
+            if wd >= 0:
+                self._diretorios[wd] = diretorio
+            elif os.path.isdir(diretorio):  # Limite de vigias atingido, por exemplo
+                os.close(fd)
+                self._libc = None
+                return None
+        return fd
+
+    def _executar_inotify(self, fd: int):
+        try:
+            self._ler_inotify(fd)
+        finally:
+            os.close(fd)
+
+    def _ler_inotify(self, fd: int):
+        suspeitos: set[str] = set()  # Arquivos com eventos ainda não avisados
+        prazo = None
+        while not self._parar.is_set():
+            espera = None if prazo is None else max(prazo - time.monotonic(), 0)
+            prontos, _, _ = select.select([fd, self._acordar_r], [], [], espera)
+            if fd in prontos:
+                try:
+                    dados = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    dados = b''
+                inicio = 0
+                while inicio + _EVENTO.size <= len(dados):
+                    wd, _, _, tamanho = _EVENTO.unpack_from(dados, inicio)
+                    nome = dados[inicio + _EVENTO.size:inicio + _EVENTO.size + tamanho].rstrip(b'\0')
+                    inicio += _EVENTO.size + tamanho
+                    caminho = os.path.join(self._diretorios.get(wd, ''), os.fsdecode(nome))
+                    if caminho in self.caminhos:
+                        suspeitos.add(caminho)
+                        prazo = time.monotonic() + self.atraso
+            if prazo is not None and time.monotonic() >= prazo:
+                self._avisar(suspeitos)
+                suspeitos = set()
+                prazo = None
+
+    def _executar_polling(self, assinaturas: dict[str, tuple[int, int, int] | None]):
+        suspeitos: set[str] = set()
+        prazo = None
+        while not self._parar.wait(self.intervalo if prazo is None else
+                                   min(self.intervalo, max(prazo - time.monotonic(), 0))):
+            for caminho in self.caminhos:
+                assinatura = _assinatura(caminho)
+                if assinatura != assinaturas[caminho]:
+                    assinaturas[caminho] = assinatura
+                    suspeitos.add(caminho)
+                    prazo = time.monotonic() + self.atraso
+            if prazo is not None and time.monotonic() >= prazo:
+                self._avisar(suspeitos)
+                suspeitos = set()
+                prazo = None
+
+    def _avisar(self, suspeitos: set[str]):
+        '''Coloca na fila os arquivos de `suspeitos` cujo conteúdo realmente mudou.'''
+        mudaram = set()
+        for caminho in suspeitos:
+            conteudo = _conteudo(caminho)
+            if conteudo != self._conteudos[caminho]:
+                self._conteudos[caminho] = conteudo
+                mudaram.add(caminho)
+        if mudaram:
+            self.mudancas.put(mudaram)
@@ -1,6 +1,6 @@
 import os, pytest
 
-from src.corretor.corretor import Atividade
+from src.corretor.modelo import Atividade
 
 # Diretório deste script
 TEST_DIR = os.path.dirname(os.path.realpath(__file__))
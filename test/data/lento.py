@@ -0,0 +1,4 @@
+import time
+
+time.sleep(float(input()))
+print("acordei")
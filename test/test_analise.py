@@ -0,0 +1,130 @@
+'''Testa a análise estática e as verificações que a usam.'''
+
+import ast, os, pytest
+
+from src.corretor import analise
+from src.corretor.analise import Analise, analisar
+from src.corretor.verificacoes import compilar
+from . import TEST_DIR
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_script(tmp_path):
+    caminho = tmp_path / 'resp.py'
+    caminho.write_text(
+        'import os.path\n'
+        'from collections import deque\n'
+        'def soma(a: int, b: int) -> int:\n'
+        '    def interna(x):\n'
+        '        return x\n'
+        '    return a + b\n'
+        'class C:\n'
+        '    async def metodo(self: "C") -> None:\n'
+        '        pass\n')
+    return caminho
+
+
+# CASOS DE TESTE
+
+class TestAnalise:
+    def test_passada_unica(self, fxt_script):
+        '''Funções aninhadas, métodos e imports são encontrados.'''
+        a = analisar(str(fxt_script))
+
+        assert [f.name for f in a.funcoes] == ['soma', 'interna', 'metodo']
+        assert a.imports == {'os.path', 'collections'}
+        assert a.importa('os')
+        assert not a.importa('o')
+
+    def test_cache(self, fxt_script):
+        '''O script só é analisado de novo quando muda.'''
+        primeira = analisar(str(fxt_script))
+        assert analisar(str(fxt_script)) is primeira
+
+        fxt_script.write_text('def f(): pass\n')
+        os.utime(fxt_script, ns=(0, 0))
+
+        assert analisar(str(fxt_script)) is not primeira
+        assert [f.name for f in analisar(str(fxt_script)).funcoes] == ['f']
+
+    def test_arvore_profunda(self):
+        '''A árvore é percorrida sem recursão.'''
+        no = ast.Module(body=[], type_ignores=[])
+        raiz = no
+        for i in range(5000):
+            func = ast.FunctionDef(name=f'f{i}', args=ast.arguments(
+                posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[]),
+                body=[], decorator_list=[], lineno=i + 1, col_offset=0)
+            no.body += [func]
+            no = func
+
+        assert len(Analise(raiz).funcoes) == 5000
+
+    def test_erro_sintaxe(self):
+        '''Scripts com erro de sintaxe lançam SyntaxError, também quando vêm do cache.'''
+        for _ in range(2):
+            with pytest.raises(SyntaxError):
+                analisar(f'{TEST_DIR}/data/q2.py')
+
+
+class TestDiagnosticar:
+    def test_script_valido(self, fxt_script):
+        '''Scripts que existem e compilam passam na verificação prévia.'''
+        assert analise.diagnosticar(str(fxt_script), 'resp.py', True) is None
+
+    def test_ausente(self, tmp_path):
+        '''Scripts ausentes falham, mesmo sem compilar, com uma mensagem que não depende do interpretador.'''
+        codigo, erro = analise.diagnosticar(str(tmp_path / 'x.py'), 'x.py', False)
+
+        assert codigo == 2
+        assert erro == 'Arquivo "x.py" não encontrado.\n'
+
+    def test_compilacao(self, tmp_path, monkeypatch):
+        '''Erros de compilação (também os que não são de sintaxe) são detectados, uma vez por versão do script.'''
+        script = tmp_path / 'r.py'
+        script.write_text('return 1\n')
+        compilacoes = []
+        monkeypatch.setattr(analise, 'compile', lambda *a, **k: compilacoes.append(1) or compile(*a, **k),
+                            raising=False)
+        for _ in range(2):
+            codigo, erro = analise.diagnosticar(str(script), 'r.py', True)
+        assert (codigo, erro.splitlines()[-1]) == (1, "SyntaxError: 'return' outside function")
+        assert len(compilacoes) == 1
+
+        script.write_text('x = 1\n')
+        os.utime(script, ns=(0, 0))
+        assert analise.diagnosticar(str(script), 'r.py', True) is None
+
+
+class TestVerificacoesEstaticas:
+    @pytest.mark.parametrize('func_expect, args_expect, esperado', [
+        ('testar_param_sem_tipo', 'resp.py', False),
+        ('testar_retorno_sem_tipo', 'resp.py', False),
+        ('testar_import_proibido', {'script': 'resp.py', 'modulos': ['os']}, False),
+        ('testar_import_proibido', {'script': 'resp.py', 'modulos': ['sys', 're']}, True),
+        ('testar_funcao_definida', {'script': 'resp.py', 'funcoes': ['soma', 'metodo']}, True),
+        ('testar_funcao_definida', {'script': 'resp.py', 'funcoes': ['subtrai']}, False),
+        ('testar_param_sem_tipo', 'ausente.py', False),
+    ])
+    def test_verificacao(self, fxt_script, func_expect, args_expect, esperado):
+        '''As verificações estáticas resolvem o script relativo ao diretório da correção.'''
+        verificacao = compilar({'func_expect': func_expect, 'args_expect': args_expect},
+                               str(fxt_script.parent))
+        assert verificacao('') == esperado
+
+    def test_uma_analise_por_script(self, fxt_script, monkeypatch):
+        '''Várias verificações do mesmo script compartilham uma única análise.'''
+        analise.limpar_cache()
+        chamadas = []
+        original = analise.Analise.__init__
+        def contar(self, arvore):
+            chamadas.append(arvore)
+            original(self, arvore)
+        monkeypatch.setattr(analise.Analise, '__init__', contar)
+        diretorio = str(fxt_script.parent)
+        for func_expect in ['testar_param_sem_tipo', 'testar_retorno_sem_tipo']:
+            compilar({'func_expect': func_expect, 'args_expect': 'resp.py'}, diretorio)('')
+
+        assert len(chamadas) == 1
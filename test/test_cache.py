@@ -0,0 +1,99 @@
+'''Testa o cache de resultados.'''
+
+import pytest
+
+from src.corretor.cache import CacheResultados
+from src.corretor.modelo import Correcao
+from src.corretor.processo import Execucao
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_cache(tmp_path):
+    return CacheResultados(str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def fxt_correcao(tmp_path, monkeypatch):
+    # O script conta as execuções em execucoes.txt, no diretório atual
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'conta.py').write_text(
+        'import os\n'
+        'with open("execucoes.txt", "a") as arq:\n'
+        '    arq.write("x")\n'
+        'print(input())\n')
+    verificacoes = [{'func_expect': 'testar_regex', 'args_expect': 'oi'}]
+    return Correcao('python', str(tmp_path), 'conta.py', 'Erro.',
+                    verificacoes=verificacoes, entrada='oi\n')
+
+
+# CASOS DE TESTE
+
+class TestCacheResultados:
+    def test_acerto(self, fxt_cache, fxt_correcao, tmp_path):
+        '''A segunda correção reaproveita a execução da primeira.'''
+        primeira = fxt_correcao.corrigir(fxt_cache)
+        segunda = fxt_correcao.corrigir(fxt_cache)
+
+        assert primeira == segunda == (True, 0, 'oi\n', '')
+        assert (tmp_path / 'execucoes.txt').read_text() == 'x'
+        assert (fxt_cache.acertos, fxt_cache.falhas) == (1, 1)
+
+    def test_verificacoes_refeitas(self, fxt_cache, fxt_correcao):
+        '''Num acerto, as verificações são aplicadas de novo.'''
+        fxt_correcao.corrigir(fxt_cache)
+        fxt_correcao.verificacoes = [{'func_expect': 'testar_regex', 'args_expect': 'tchau'}]
+
+        assert fxt_correcao.corrigir(fxt_cache) == (False, 0, 'oi\n', 'Erro.')
+        assert fxt_cache.acertos == 1
+
+    def test_script_alterado(self, fxt_cache, fxt_correcao, tmp_path):
+        '''Mudar o script, os argumentos ou a entrada invalida o resultado guardado.'''
+        fxt_correcao.corrigir(fxt_cache)
+        (tmp_path / 'conta.py').write_text('print("oi")\n')
+        fxt_correcao.corrigir(fxt_cache)
+        fxt_correcao.entrada = 'tchau\n'
+        fxt_correcao.corrigir(fxt_cache)
+
+        assert (fxt_cache.acertos, fxt_cache.falhas) == (0, 3)
+
+    def test_modo(self, fxt_cache, fxt_correcao):
+        '''Execuções em modos diferentes são guardadas separadamente.'''
+        chave = fxt_cache.chave(fxt_correcao)
+        fxt_correcao.modo = 'fork'
+
+        assert fxt_cache.chave(fxt_correcao) != chave
+
+    def test_sem_cache(self, fxt_correcao, tmp_path):
+        '''Sem cache, o script é sempre executado.'''
+        fxt_correcao.corrigir()
+        fxt_correcao.corrigir()
+
+        assert (tmp_path / 'execucoes.txt').read_text() == 'xx'
+
+    def test_despejo(self, tmp_path):
+        '''Os resultados menos usados são apagados quando o cache passa do tamanho máximo.'''
+        cache = CacheResultados(str(tmp_path / 'cache'), tamanho_max=1000)
+        for i in range(10):
+            cache.guardar(f'{i:02d}' * 32, Execucao(0, 'x' * 100, ''))
+            # O último uso é o horário de modificação: reusa a primeira chave sempre
+            assert cache.obter('00' * 32) is not None
+
+        assert sum(t for _, t, _ in cache._arquivos()) <= 1000
+        assert cache.obter('00' * 32) is not None
+        assert cache.obter('01' * 32) is None
+
+    def test_outros_dados(self, tmp_path):
+        '''Os planos e as assinaturas guardados no diretório do cache não são despejados nem apagados.'''
+        cache = CacheResultados(str(tmp_path / 'cache'), tamanho_max=1000)
+        for subdiretorio in ('planos', 'assinaturas'):
+            (tmp_path / 'cache' / subdiretorio).mkdir(parents=True)
+            (tmp_path / 'cache' / subdiretorio / f'{"ab" * 32}.json').write_text('x' * 2000)
+        for i in range(10):
+            cache.guardar(f'{i:02d}' * 32, Execucao(0, 'x' * 100, ''))
+        cache.limpar()
+
+        assert cache._arquivos() == []
+        assert (tmp_path / 'cache' / 'planos' / f'{"ab" * 32}.json').exists()
+        assert (tmp_path / 'cache' / 'assinaturas' / f'{"ab" * 32}.json').exists()
@@ -0,0 +1,47 @@
+'''Testa a comparação incremental da saída com um arquivo de referência.'''
+
+import pytest
+
+from src.corretor.comparacao import ComparadorArquivo, comparar
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_referencia(tmp_path):
+    caminho = tmp_path / 'esperado.txt'
+    caminho.write_text('Tabela\n1 0.500\n2 0.250\n\n')
+    return str(caminho)
+
+
+# CASOS DE TESTE
+
+class TestComparacao:
+    @pytest.mark.parametrize('saida', ['Tabela\n1 0.500\n2 0.250\n', 'Tabela  \n1 0.500\n2 0.250\n\n\n',
+                                       'Tabela\r\n1 0.500\r\n2 0.250'])
+    def test_iguais(self, fxt_referencia, saida):
+        '''Espaços no fim das linhas e linhas em branco no fim não importam.'''
+        assert comparar(saida, fxt_referencia) is None
+
+    @pytest.mark.parametrize('saida, tolerancia, mensagem', [
+        ('Tabela\n1 0.500\n2 0.251\n', None, "Linha 3, coluna 7: esperado '0', obtido '1'."),
+        ('Tabela\n1 0.5\n2 0.2501\n', 0.001, None),
+        ('Tabela\n1 0.5\n2 0.26\n', 0.001, "Linha 3, coluna 3: esperado '0.250', obtido '0.26'."),
+        ('Tabela\n1 0.500\n', None, "Linha 3: a saída terminou antes do esperado (faltou '2 0.250')."),
+        ('Tabela\n1 0.500\n2 0.250\n\nfim\n', None, "Linha 5: a saída tem linhas a mais que o esperado ('fim')."),
+    ])
+    def test_divergencia(self, fxt_referencia, saida, tolerancia, mensagem):
+        '''A primeira divergência é informada com a linha e a coluna; números podem diferir até a tolerância.'''
+        divergencia = comparar(saida, fxt_referencia, tolerancia)
+
+        assert (str(divergencia) if divergencia else None) == mensagem
+
+    def test_trechos(self, fxt_referencia):
+        '''Trechos que cortam linhas ao meio são comparados como a saída inteira, e a primeira divergência
+        é detectada assim que a linha dela termina.'''
+        comparador = ComparadorArquivo(fxt_referencia)
+
+        assert not comparador.alimentar('Tab')
+        assert not comparador.alimentar('ela\n1 0.')
+        assert comparador.alimentar('5\n2 0.250\n')
+        assert comparador.concluir().linha == 2
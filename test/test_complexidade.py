@@ -0,0 +1,96 @@
+'''Testa a estimativa de complexidade, os geradores de entradas e as correções de complexidade.'''
+
+import math, random, pytest
+
+from src.corretor import complexidade, geradores
+from src.corretor.modelo import CorrecaoComplexidade
+from src.corretor.erros import ErroConfiguracao
+from src.corretor.processo import Execucao
+
+# Constantes
+TAMANHOS = [1000, 2000, 4000, 8000, 16000]
+BASE = 0.02  # Tempo de iniciar o script nas medidas simuladas
+
+
+# CASOS DE TESTE
+
+class TestAjuste:
+    @pytest.mark.parametrize('modelo, tempo', [
+        ('n', lambda n: BASE + 2e-5 * n),
+        ('n log n', lambda n: BASE + 2e-6 * n * math.log2(n)),
+        ('n^2', lambda n: BASE + 1e-9 * n * n),
+        ('1', lambda n: BASE + 1e-3 * (n % 3)),
+    ])
+    def test_modelo(self, modelo, tempo):
+        '''O modelo escolhido é o que gerou os tempos; variações menores que a resolução são constantes.'''
+        ajuste = complexidade.ajustar([(n, tempo(n)) for n in TAMANHOS], BASE)
+
+        assert ajuste.modelo == modelo
+        assert ajuste.prever(TAMANHOS[-1]) == pytest.approx(tempo(TAMANHOS[-1]), rel=0.1)
+
+    @pytest.mark.parametrize('modelo, estimados', [('n log n', {'n', 'n log n'}), ('n^2', {'n^2'}), ('n^3', {'n^3'})])
+    def test_ruido(self, modelo, estimados):
+        '''Com 10% de ruído nas medidas (o menor de 3 tempos, como na correção), o modelo não muda.
+        Só `n` e `n log n`, de expoentes muito próximos, não são distinguidos com tamanhos tão próximos.'''
+        rng = random.Random(modelo)
+        f = complexidade.MODELOS[modelo]
+        tamanhos = [1000, 2000, 4000, 8000]
+        coeficiente = 0.2 / f(tamanhos[-1])
+        medir = lambda tempo: min(tempo * rng.uniform(0.9, 1.1) for _ in range(3))
+        for _ in range(200):
+            medidas = [(n, medir(BASE + coeficiente * f(n))) for n in tamanhos]
+
+            assert complexidade.ajustar(medidas, medir(BASE + coeficiente * f(1))).modelo in estimados
+
+    def test_limite(self):
+        '''Modelos de menor ordem estão dentro do limite.'''
+        ajuste = complexidade.ajustar([(n, BASE + 1e-9 * n * n) for n in TAMANHOS], BASE)
+
+        assert complexidade.dentro_do_limite(ajuste, 'n^3')
+        assert not complexidade.dentro_do_limite(ajuste, 'n log n')
+
+
+class TestGeradores:
+    def test_inteiros(self):
+        '''As entradas são reprodutíveis, e os parâmetros são respeitados.'''
+        gerador = geradores.compilar({'nome': 'inteiros', 'maximo': 9, 'ordem': 'crescente', 'por_linha': 3})
+        texto = gerador.texto(7)
+        linhas = texto.splitlines()
+
+        assert texto == gerador.texto(7) != gerador.texto(8)
+        assert linhas[0] == '7' and [len(l.split()) for l in linhas[1:]] == [3, 3, 1]
+        valores = [int(v) for v in ' '.join(linhas[1:]).split()]
+        assert valores == sorted(valores) and max(valores) <= 9
+
+    @pytest.mark.parametrize('espec', [{'nome': 'nada'}, {'nome': 'inteiros', 'ordem': 'torta'},
+                                       {'nome': 'inteiros', 'maximo': '9'}, {'nome': 'palavras', 'x': 1}, 'inteiros'])
+    def test_invalido(self, espec):
+        with pytest.raises(ErroConfiguracao):
+            geradores.compilar(espec)
+
+
+class TestCorrecaoComplexidade:
+    def test_corrigir(self, tmp_path):
+        '''Uma resposta quadrática é reprovada com limite O(n log n), e uma linear é aprovada.'''
+        (tmp_path / 'linear.py').write_text('n = int(input())\nprint(sum(int(input()) for _ in range(n)))\n')
+        (tmp_path / 'quadratica.py').write_text(
+            'n = int(input())\nv = [int(input()) for _ in range(n)]\nprint(sum(1 for a in v for b in v if a < b))\n')
+        correcoes = [CorrecaoComplexidade('python', str(tmp_path), script, 'Lento.', gerador={'nome': 'inteiros'},
+                                          tamanhos=[500, 1000, 2000, 4000], complexidade='n log n', repeticoes=2)
+                     for script in ['linear.py', 'quadratica.py']]
+
+        assert correcoes[0].corrigir()[0]
+        passou, codigo, saida, erro = correcoes[1].corrigir()
+        assert (passou, codigo) == (False, 0)
+        assert saida.startswith('Complexidade estimada: O(n^2). Máxima: O(n log n).\nTempo de início (n = 1): ')
+        assert len(saida.splitlines()) == 2 + 1 + 1 + 4
+        assert erro.startswith('Lento.\n')
+
+    def test_verificar(self, tmp_path):
+        '''Uma execução de um só tamanho é verificada como nas outras correções.'''
+        correcao = CorrecaoComplexidade('python', str(tmp_path), 'x.py', 'Errado.', gerador={'nome': 'inteiros'},
+                                        tamanhos=[1, 2, 3], complexidade='n',
+                                        verificacoes=[{'func_expect': 'testar_regex', 'args_expect': '^3$'}])
+
+        assert correcao.verificar(Execucao(0, '3\n', ''))[0]
+        assert correcao.verificar(Execucao(0, '4\n', '')) == (False, 0, '4\n', 'Errado.')
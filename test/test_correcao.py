@@ -2,6 +2,8 @@
 
 import pytest
 
+from src.corretor import modelo
+from src.corretor.modelo import Correcao, CorrecaoFuncao, agrupar_execucoes
 from . import fxt_atividade, TEST_DIR
 
 
@@ -38,3 +40,128 @@ class TestCorrecao:
         assert resposta == 'hello\n'
         assert msg_erro == ""
         assert codigo == 0
+
+
+class TestAgruparExecucoes:
+    def test_agrupar(self, fxt_atividade):
+        '''Correções com o mesmo comando e a mesma entrada ficam no mesmo grupo e têm os mesmos resultados
+        de quando são corrigidas separadamente.'''
+        correcoes = fxt_atividade.questoes[0].correcoes
+        grupos = agrupar_execucoes(correcoes)
+        resultados = [r for g in grupos for r in g.corrigir()]
+
+        assert [g.correcoes for g in grupos] == [[correcoes[0], correcoes[2]], [correcoes[1]]]
+        assert resultados == [correcoes[0].corrigir(), correcoes[2].corrigir(), correcoes[1].corrigir()]
+
+    def test_executa_uma_vez(self, tmp_path):
+        '''O script de um grupo é executado uma só vez, e não é interrompido enquanto alguma correção
+        do grupo ainda puder passar.'''
+        (tmp_path / 'conta.py').write_text(
+            'open(__file__ + ".n", "a").write("x")\nprint("a" * 1000)\nprint("b")\n')
+        falha = [{'func_expect': 'testar_regex', 'args_expect': 'c'}]
+        passa = [{'func_expect': 'testar_regex', 'args_expect': 'b'}]
+        correcoes = [Correcao('python', str(tmp_path), 'conta.py', 'Erro.', verificacoes=v)
+                     for v in (falha, passa)]
+        [grupo] = agrupar_execucoes(correcoes)
+
+        assert [r[0] for r in grupo.corrigir()] == [False, True]
+        assert (tmp_path / 'conta.py.n').read_text() == 'x'
+        assert correcoes[0].ultima_execucao is correcoes[1].ultima_execucao
+
+
+class TestDiagnosticar:
+    def test_sem_executar(self, monkeypatch):
+        '''Scripts com erro de sintaxe falham sem ser executados, com o mesmo erro do interpretador.'''
+        correcao = Correcao('python', f'{TEST_DIR}/data', 'q2.py', 'Erro.', verificacoes=[])
+        execucao = correcao.executar()
+        def falhar(*_):
+            raise AssertionError('o script não deveria ser executado')
+        monkeypatch.setattr(modelo, 'executar_processo', falhar)
+
+        assert correcao.corrigir() == (False, execucao.codigo, '', execucao.erro)
+
+    @pytest.mark.parametrize('comando', ['python', 'node'])
+    def test_ausente(self, comando, monkeypatch):
+        '''Scripts ausentes falham sem ser executados, com uma mensagem que não depende do interpretador.'''
+        def falhar(*_):
+            raise AssertionError('o script não deveria ser executado')
+        monkeypatch.setattr(modelo, 'executar_processo', falhar)
+        correcao = Correcao(comando, f'{TEST_DIR}/data', 'arquivo_ausente.py', 'Erro.', verificacoes=[])
+
+        assert correcao.corrigir() == (False, 2, '', 'Arquivo "arquivo_ausente.py" não encontrado.\n')
+
+
+class TestCorrecaoFuncao:
+    @pytest.fixture
+    def fxt_script(self, tmp_path):
+        (tmp_path / 'soma.py').write_text(
+            'import time\n'
+            'print("importado")\n'
+            'def soma(a, b):\n'
+            '    print("somando")\n'
+            '    if a < 0:\n'
+            '        time.sleep(10)\n'
+            '    return a + b\n'
+            'def media(valores):\n'
+            '    return sum(valores) / len(valores), len(valores)\n')
+        return tmp_path
+
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_casos(self, fxt_script, modo):
+        '''Todos os casos são executados num só processo, e um caso que falha não impede os seguintes.'''
+        casos = [{'args': [1, 2], 'esperado': 3}, {'args': [[1, 2]], 'esperado': [1.5000001, 2]},
+                 {'args': [[]], 'esperado': 0}, {'args': [1, 2], 'esperado': 4}]
+        correcoes = [CorrecaoFuncao('python', str(fxt_script), 'soma.py', 'Erro.', funcao='soma', casos=casos[:1],
+                                    modo=modo),
+                     CorrecaoFuncao('python', str(fxt_script), 'soma.py', 'Erro.', funcao='media', casos=casos[1:3],
+                                    tolerancia=0.001, modo=modo)]
+
+        assert correcoes[0].corrigir()[:3] == (True, 0, '1 de 1 casos corretos.\nok: soma(1, 2) == 3\n')
+        passou, codigo, saida, erro = correcoes[1].corrigir()
+        assert (passou, codigo, erro) == (False, 0, 'Erro.')
+        assert saida.splitlines()[:2] == ['1 de 2 casos corretos.', 'ok: media([1, 2]) == [1.5000001, 2]']
+        assert 'ZeroDivisionError' in saida.splitlines()[2]
+        assert [c['passou'] for c in correcoes[1].ler_casos(correcoes[1].ultima_execucao)] == [True, False]
+        assert len(agrupar_execucoes(correcoes)) == 2
+
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_modulo_da_resposta(self, tmp_path, modo):
+        '''Um módulo da resposta com o nome de um módulo importado pelo chamador é o importado pela resposta.'''
+        (tmp_path / 'json.py').write_text('def dumps(valor):\n    return "meu"\n')
+        (tmp_path / 'serializa.py').write_text('import json\ndef serializa(valor):\n    return json.dumps(valor)\n')
+        correcao = CorrecaoFuncao('python', str(tmp_path), 'serializa.py', 'Erro.', funcao='serializa',
+                                  casos=[{'args': [1], 'esperado': 'meu'}], modo=modo)
+
+        assert correcao.corrigir()[0]
+
+    def test_timeout_caso(self, fxt_script):
+        '''Um caso que excede o seu tempo máximo falha sem esgotar o tempo da correção.'''
+        casos = [{'args': [-1, 0], 'esperado': -1}, {'args': [2, 2], 'esperado': 4}]
+        correcao = CorrecaoFuncao('python', str(fxt_script), 'soma.py', 'Erro.', funcao='soma', casos=casos,
+                                  timeout_caso=0.2)
+        passou, _, saida, _ = correcao.corrigir()
+
+        assert not passou
+        assert saida.splitlines()[1:] == ['falhou: soma(-1, 0): Tempo esgotado (0.2s).', 'ok: soma(2, 2) == 4']
+        assert not correcao.ultima_execucao.expirou
+
+    def test_funcao_ausente(self, fxt_script):
+        '''Se a função não existe, a correção falha com o erro do chamador e nenhum caso é executado.'''
+        correcao = CorrecaoFuncao('python', str(fxt_script), 'soma.py', 'Erro.', funcao='subtrai',
+                                  casos=[{'args': [], 'esperado': 0}])
+        passou, codigo, saida, erro = correcao.corrigir()
+
+        assert (passou, codigo) == (False, 1)
+        assert 'não executado: subtrai()' in saida
+        assert '"subtrai" não foi definida' in erro
+
+    def test_chamador_ausente(self, fxt_script, monkeypatch):
+        '''Se o chamador não existe como arquivo (como num executável sem ele), a correção falha sem executar.'''
+        from src.corretor import chamador
+        monkeypatch.setattr(chamador, '__file__', str(fxt_script / 'ausente' / 'chamador.py'))
+        correcao = CorrecaoFuncao('python', str(fxt_script), 'soma.py', 'Erro.', funcao='soma',
+                                  casos=[{'args': [1, 2], 'esperado': 3}])
+        passou, codigo, _, erro = correcao.corrigir()
+
+        assert (passou, codigo) == (False, 1)
+        assert 'chamador' in erro
@@ -1,6 +1,7 @@
 '''Testa o script corretor.py'''
 
-from src.corretor.corretor import Atividade
+from src.corretor.corretor import Paginador
+from src.corretor.modelo import Atividade, Placar
 from . import fxt_atividade, TEST_DIR
 
 
@@ -27,3 +28,66 @@ class TestLerConfig:
         assert questao.descricao == "Questão 1"
         assert len(questao.correcoes) == 3
         assert questao.pontos == 0
+
+
+class TestPlacar:
+
+    def test_registrar(self, fxt_atividade):
+        '''A contagem acompanha cada resultado, inclusive quando uma correção muda de resultado.'''
+        placar = Placar(fxt_atividade)
+        questao = fxt_atividade.questoes[0]
+        correcoes = questao.correcoes
+        questao.pontos = 2
+
+        for c in correcoes:
+            assert placar.registrar(c, (True, 0, '', '')) is questao
+        assert placar.corretas(questao) == len(correcoes)
+        assert placar.correta(questao)
+        assert (placar.questoes_corretas, placar.nota) == (1, 2)
+
+        placar.registrar(correcoes[0], (False, 1, '', 'Erro.'))
+        placar.registrar(correcoes[0], (False, 1, '', 'Erro.'))
+        assert placar.corretas(questao) == len(correcoes) - 1
+        assert (placar.questoes_corretas, placar.nota) == (0, 0)
+        assert correcoes[0].resultado == (False, 1, '', 'Erro.')
+
+    def test_resultados_existentes(self, fxt_atividade):
+        '''O placar começa com os resultados já guardados nas correções.'''
+        questao = fxt_atividade.questoes[1]
+        for c in questao.correcoes:
+            c.resultado = (True, 0, '', '')
+        placar = Placar(fxt_atividade)
+
+        assert placar.corretas(questao) == len(questao.correcoes)
+        assert placar.questoes_corretas == 1
+
+
+class TestPaginador:
+
+    def test_previa(self):
+        '''A prévia tem as primeiras e as últimas linhas, e as páginas completam o texto na ordem.'''
+        texto = ''.join(f'linha {i}\n' for i in range(1000))
+        paginador = Paginador(texto, linhas_inicio=3, linhas_fim=2)
+
+        assert paginador.inicio == 'linha 0\nlinha 1\nlinha 2\n'
+        assert paginador.fim == 'linha 998\nlinha 999\n'
+        assert paginador.linhas_omitidas == 995
+        paginas = [paginador.proxima_pagina(400) for _ in range(3)]
+        assert [p.count('\n') for p in paginas] == [400, 400, 195]
+        assert paginador.inicio + ''.join(paginas) + paginador.fim == texto
+        assert paginador.caracteres_omitidos == 0
+
+    def test_texto_curto(self):
+        '''Textos curtos cabem inteiros na prévia.'''
+        paginador = Paginador('a\nb', linhas_inicio=3, linhas_fim=2)
+
+        assert paginador.inicio + paginador.fim == 'a\nb'
+        assert paginador.caracteres_omitidos == 0
+
+    def test_linha_longa(self):
+        '''Linhas muito longas são cortadas em partes de tamanho limitado.'''
+        paginador = Paginador('x' * 10_000, limite_caracteres=1000)
+
+        assert (len(paginador.inicio), len(paginador.fim)) == (1000, 1000)
+        assert len(paginador.proxima_pagina()) == 1000
+        assert paginador.caracteres_omitidos == 7000
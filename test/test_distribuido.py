@@ -0,0 +1,177 @@
+'''Testa a correção distribuída.'''
+
+import pytest, socket, threading, time
+
+from src.corretor.modelo import Correcao, GrupoExecucao, agrupar_execucoes
+from src.corretor.distribuido import Coordenador, Trabalhador, _Conexao, _arquivos
+from src.corretor.erros import ErroDistribuido
+from . import fxt_atividade, TEST_DIR
+
+# Constantes
+SEGREDO = 'segredo de teste'
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_trabalhadores():
+    '''Retorna uma função que inicia `n` trabalhadores locais e retorna seus endereços.'''
+    trabalhadores = []
+
+    def iniciar(n: int, workers: int = 2) -> list[tuple[str, int]]:
+        novos = [Trabalhador(porta=0, workers=workers, segredo=SEGREDO).iniciar() for _ in range(n)]
+        trabalhadores.extend(novos)
+        return [t.endereco for t in novos]
+
+    yield iniciar
+    for trabalhador in trabalhadores:
+        trabalhador.encerrar()
+
+
+@pytest.fixture
+def fxt_trabalhador_instavel():
+    '''Um trabalhador que se desconecta ao receber o primeiro grupo. Retorna o seu endereço.'''
+    servidor = socket.create_server(('127.0.0.1', 0))
+
+    def atender():
+        sock, _ = servidor.accept()
+        conexao = _Conexao(sock)
+        conexao.enviar({'tipo': 'ola', 'desafio': '0'})
+        conexao.receber()
+        conexao.enviar({'tipo': 'aceito', 'capacidade': 4})
+        conexao.receber()
+        conexao.fechar()
+
+    threading.Thread(target=atender, daemon=True).start()
+    yield servidor.getsockname()[:2]
+    servidor.close()
+
+
+# FUNÇÕES AUXILIARES
+
+def _correcao_lenta(segundos: float, i: int) -> Correcao:
+    return Correcao('python', f'{TEST_DIR}/data', 'lento.py', 'Erro.',
+                    verificacoes=[], entrada=f'{segundos}\n{i}\n')
+
+
+def _corrigir_lentas(enderecos: list[tuple[str, int]], n: int) -> float:
+    '''Corrige `n` correções lentas nos trabalhadores e retorna a duração.'''
+    coordenador = Coordenador(enderecos, segredo=SEGREDO)
+    inicio = time.monotonic()
+    futuros = [coordenador.submeter(GrupoExecucao([_correcao_lenta(0.3, i)])) for i in range(n)]
+    assert all(f.result(timeout=30)[0][0] for f in futuros)
+    duracao = time.monotonic() - inicio
+    coordenador.encerrar()
+    return duracao
+
+
+# CASOS DE TESTE
+
+class TestDistribuido:
+    def test_mesmos_resultados(self, fxt_atividade, fxt_trabalhadores):
+        '''Os resultados dos trabalhadores são os mesmos da correção local, inclusive das verificações estáticas.'''
+        coordenador = Coordenador(fxt_trabalhadores(2), segredo=SEGREDO)
+        correcoes = [c for q in fxt_atividade.questoes for c in q.correcoes]
+        grupos = agrupar_execucoes(correcoes)
+        futuros = [coordenador.submeter(g) for g in grupos]
+        distribuidos = [r for f in futuros for r in f.result(timeout=30)]
+        coordenador.encerrar()
+        locais = [r for g in grupos for r in g.corrigir()]
+
+        assert [r[:3] for r in distribuidos] == [r[:3] for r in locais]
+        assert [r[0] for r in distribuidos] == [r[0] for r in locais]
+        assert correcoes[0].ultima_execucao.tempo is not None
+
+    def test_modulos_locais(self, tmp_path, fxt_trabalhadores):
+        '''Os módulos importados pelo script, os arquivos de dados do seu diretório e o arquivo citado nos seus
+        argumentos vão junto com ele; os outros scripts, não.'''
+        (tmp_path / 'pacote').mkdir()
+        (tmp_path / 'pacote' / '__init__.py').write_text('')
+        (tmp_path / 'pacote' / 'formato.py').write_text('def formatar(n):\n    return f"<{n}>"\n')
+        (tmp_path / 'auxiliar.py').write_text('from pacote import formato\n'
+                                               'def somar(texto):\n    return formato.formatar(sum(map(int, texto.split())))\n')
+        (tmp_path / 'principal.py').write_text(
+            'import os, sys, auxiliar\n'
+            'diretorio = os.path.dirname(__file__)\n'
+            'texto = open(os.path.join(diretorio, sys.argv[1])).read() + open(os.path.join(diretorio, "mais.txt")).read()\n'
+            'print(auxiliar.somar(texto))\n')
+        (tmp_path / 'dados').mkdir()
+        (tmp_path / 'dados' / 'numeros.txt').write_text('1 2\n')
+        (tmp_path / 'mais.txt').write_text('3\n')
+        (tmp_path / 'outro.py').write_text('')
+        correcao = Correcao('python', str(tmp_path), 'principal.py', 'Erro.', args='dados/numeros.txt',
+                            verificacoes=[{'func_expect': 'testar_regex', 'args_expect': '<6>'}])
+        arquivos = _arquivos(correcao)
+        coordenador = Coordenador(fxt_trabalhadores(1), segredo=SEGREDO)
+        resultado = coordenador.submeter(GrupoExecucao([correcao])).result(timeout=30)
+        coordenador.encerrar()
+
+        assert resultado[0][:3] == (True, 0, '<6>\n')
+        assert sorted(arquivos) == ['auxiliar.py', 'dados/numeros.txt', 'mais.txt', 'pacote/__init__.py',
+                                    'pacote/formato.py', 'principal.py']
+
+    def test_trabalhador_caiu(self, fxt_trabalhador_instavel, fxt_trabalhadores):
+        '''Os grupos de um trabalhador que caiu são reenviados aos outros.'''
+        coordenador = Coordenador([fxt_trabalhador_instavel] + fxt_trabalhadores(1), segredo=SEGREDO)
+        futuros = [coordenador.submeter(GrupoExecucao([_correcao_lenta(0, i)])) for i in range(6)]
+
+        assert all(f.result(timeout=30)[0][0] for f in futuros)
+        assert coordenador.trabalhadores == 1
+        coordenador.encerrar()
+
+    def test_todos_cairam(self, fxt_trabalhador_instavel):
+        '''Sem trabalhadores, os grupos falham com ErroDistribuido.'''
+        coordenador = Coordenador([fxt_trabalhador_instavel], segredo=SEGREDO)
+        futuro = coordenador.submeter(GrupoExecucao([_correcao_lenta(0, 0)]))
+
+        with pytest.raises(ErroDistribuido):
+            futuro.result(timeout=30)
+        with pytest.raises(ErroDistribuido):
+            coordenador.submeter(GrupoExecucao([_correcao_lenta(0, 1)])).result(timeout=30)
+        coordenador.encerrar()
+
+    def test_sem_conexao(self):
+        '''Não conseguir conectar a nenhum trabalhador lança ErroDistribuido.'''
+        servidor = socket.create_server(('127.0.0.1', 0))
+        endereco = servidor.getsockname()[:2]
+        servidor.close()
+
+        with pytest.raises(ErroDistribuido):
+            Coordenador([endereco], segredo=SEGREDO)
+
+    def test_escala(self, fxt_trabalhadores):
+        '''Com mais trabalhadores, as correções terminam proporcionalmente mais rápido.'''
+        um = _corrigir_lentas(fxt_trabalhadores(1, workers=1), 8)
+        quatro = _corrigir_lentas(fxt_trabalhadores(4, workers=1), 8)
+
+        assert quatro < um / 2
+
+
+class TestSeguranca:
+    def test_segredo_errado(self, fxt_trabalhadores):
+        '''O trabalhador recusa coordenadores que não conhecem o segredo.'''
+        with pytest.raises(ErroDistribuido, match='recusou'):
+            Coordenador(fxt_trabalhadores(1), segredo='outro segredo')
+
+    def test_sem_segredo(self, monkeypatch):
+        '''Sem segredo definido, nem o trabalhador nem o coordenador são criados.'''
+        monkeypatch.delenv('CORRETOR_SEGREDO', raising=False)
+
+        with pytest.raises(ErroDistribuido):
+            Trabalhador(porta=0)
+        with pytest.raises(ErroDistribuido):
+            Coordenador([('127.0.0.1', 1)])
+
+    @pytest.mark.parametrize('campos', [{'comando': 'sh'}, {'script': '../lento.py'},
+                                        {'entrada_arquivo': '/etc/passwd'}])
+    def test_correcao_recusada(self, fxt_trabalhadores, campos):
+        '''Correções com um interpretador não permitido ou arquivos fora do diretório do grupo não são executadas.'''
+        coordenador = Coordenador(fxt_trabalhadores(1), segredo=SEGREDO)
+        correcao = _correcao_lenta(0, 0)
+        for campo, valor in campos.items():
+            setattr(correcao, campo, valor)
+        futuro = coordenador.submeter(GrupoExecucao([correcao]))
+
+        with pytest.raises(ErroDistribuido, match='não permitido|inválido'):
+            futuro.result(timeout=30)
+        coordenador.encerrar()
@@ -0,0 +1,95 @@
+'''Testa as entradas em arquivo e as produzidas por geradores.'''
+
+import pytest
+
+from src.corretor import entradas
+from src.corretor.cache import CacheResultados
+from src.corretor.modelo import Correcao
+from src.corretor.erros import ErroConfiguracao
+from src.corretor.forkserver import DISPONIVEL
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_diretorio(tmp_path):
+    (tmp_path / 'soma.py').write_text('import sys\nprint(sum(int(l) for l in sys.stdin))\n')
+    # Maior que vários blocos e que o buffer do pipe
+    (tmp_path / 'numeros.txt').write_text(''.join(f'{i}\n' for i in range(300_000)))
+    return tmp_path
+
+
+# CASOS DE TESTE
+
+class TestEntradas:
+    def test_arquivo(self, fxt_diretorio):
+        '''O arquivo é lido em blocos; a chave muda com o conteúdo, e a descrição só tem o tamanho e o início.'''
+        caminho = fxt_diretorio / 'numeros.txt'
+        entrada = entradas.criar('ignorada', 'numeros.txt', str(fxt_diretorio))
+        blocos = list(entrada.blocos())
+        chave = entrada.chave()
+        guardados = len(entradas._hashes)
+
+        assert len(blocos) > 1 and b''.join(blocos) == caminho.read_bytes()
+        assert entrada.descricao().startswith(f'Arquivo {caminho} (')
+        assert len(entrada.descricao()) < entradas.TAMANHO_PREVIA + 200
+        caminho.write_text('1\n2\n')
+        assert entrada.chave() != chave
+        # Só a última versão de cada arquivo fica guardada
+        assert len(entradas._hashes) == guardados
+
+    def test_texto(self):
+        '''Textos pequenos são exibidos inteiros, e a chave é o próprio texto, como antes.'''
+        entrada = entradas.criar('1\n2\n')
+
+        assert (entrada.descricao(), entrada.chave()) == ('1\n2\n', '1\n2\n')
+
+    @pytest.mark.parametrize('entrada', [{'gerador': {'nome': 'inteiros'}}, {'gerador': {'nome': 'x'}, 'n': 3},
+                                         {'gerador': {'nome': 'inteiros'}, 'n': -1}, 7])
+    def test_invalida(self, entrada):
+        with pytest.raises(ErroConfiguracao):
+            entradas.criar(entrada)
+
+
+class TestCorrecao:
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_arquivo(self, fxt_diretorio, modo):
+        '''O arquivo de entrada é escrito no script inteiro, nos dois modos.'''
+        if modo == 'fork' and not DISPONIVEL:
+            pytest.skip('os.fork indisponível')
+        verificacoes = [{'func_expect': 'testar_regex', 'args_expect': f'^{sum(range(300_000))}$'}]
+        correcao = Correcao('python', str(fxt_diretorio), 'soma.py', 'Erro.', verificacoes,
+                            entrada_arquivo='numeros.txt', modo=modo)
+
+        assert correcao.corrigir()[0]
+
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_gerador(self, fxt_diretorio, modo):
+        '''A entrada de um gerador é produzida enquanto o script a lê.'''
+        if modo == 'fork' and not DISPONIVEL:
+            pytest.skip('os.fork indisponível')
+        entrada = {'gerador': {'nome': 'repetir', 'texto': '3\n'}, 'n': 100_000}
+        correcao = Correcao('python', str(fxt_diretorio), 'soma.py', 'Erro.',
+                            [{'func_expect': 'testar_regex', 'args_expect': '^300000$'}], entrada, modo=modo)
+
+        assert correcao.corrigir()[0]
+        assert correcao.descricao_entrada.startswith('Gerador {"nome": "repetir", "texto": "3\\n"} com n = 100000.')
+
+    def test_cache(self, fxt_diretorio):
+        '''Mudar o conteúdo do arquivo de entrada invalida o resultado guardado no cache.'''
+        cache = CacheResultados(str(fxt_diretorio / 'cache'))
+        correcao = Correcao('python', str(fxt_diretorio), 'soma.py', 'Erro.',
+                            [{'func_expect': 'testar_regex', 'args_expect': '^3$'}], entrada_arquivo='numeros.txt')
+
+        assert not correcao.corrigir(cache)[0]
+        (fxt_diretorio / 'numeros.txt').write_text('1\n2\n')
+        assert correcao.corrigir(cache)[0]
+
+    def test_arquivo_ausente(self, fxt_diretorio):
+        '''Sem o arquivo de entrada, o script não é executado.'''
+        correcao = Correcao('python', str(fxt_diretorio), 'soma.py', 'Erro.',
+                            [{'func_expect': 'testar_regex', 'args_expect': '^0$'}], entrada_arquivo='nada.txt')
+        passou, codigo, _, erro = correcao.corrigir()
+
+        assert (passou, codigo) == (False, 1)
+        assert erro.startswith('Arquivo de entrada') and 'não encontrado' in erro
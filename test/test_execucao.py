@@ -0,0 +1,86 @@
+'''Testa o motor de execução concorrente.'''
+
+import pytest, time
+
+from src.corretor.cache import CacheResultados
+from src.corretor.modelo import Correcao
+from src.corretor.execucao import Executor
+from src.corretor.forkserver import DISPONIVEL
+from . import fxt_atividade, TEST_DIR
+
+
+# FUNÇÕES AUXILIARES
+
+def _correcao_lenta(segundos: float, modo: str = 'subprocesso') -> Correcao:
+    return Correcao('python', f'{TEST_DIR}/data', 'lento.py', 'Erro.',
+                    verificacoes=[], entrada=f'{segundos}\n', modo=modo)
+
+def _esperar(executor: Executor, n: int, limite: float = 10) -> list:
+    resultados = []
+    fim = time.monotonic() + limite
+    while len(resultados) < n and time.monotonic() < fim:
+        resultados += [executor.resultados.get(timeout=limite)]
+    return resultados
+
+
+# CASOS DE TESTE
+
+class TestExecutor:
+    def test_executa_todas(self, fxt_atividade):
+        '''Todas as correções submetidas produzem um resultado na fila.'''
+        executor = Executor(workers=4)
+        correcoes = fxt_atividade.questoes[0].correcoes
+        for c in correcoes:
+            executor.submeter(c)
+        resultados = dict(_esperar(executor, len(correcoes)))
+        executor.encerrar()
+
+        assert set(resultados) == set(correcoes)
+        assert resultados[correcoes[0]][0] == True
+        assert resultados[correcoes[2]][0] == False
+        assert not executor.ocupado
+
+    def test_paralelo(self):
+        '''Correções lentas executam ao mesmo tempo.'''
+        executor = Executor(workers=4)
+        inicio = time.monotonic()
+        for _ in range(4):
+            executor.submeter(_correcao_lenta(0.5))
+        resultados = _esperar(executor, 4)
+        duracao = time.monotonic() - inicio
+        executor.encerrar()
+
+        assert all(r[0] for _, r in resultados)
+        assert duracao < 1.5
+
+    def test_cancelar(self):
+        '''Correções canceladas não produzem resultados.'''
+        executor = Executor(workers=1)
+        for _ in range(3):
+            executor.submeter(_correcao_lenta(0.3))
+        executor.cancelar()
+
+        assert not executor.ocupado
+        time.sleep(0.8)
+        assert executor.resultados.empty()
+        executor.encerrar()
+
+    @pytest.mark.parametrize('modo', ['subprocesso', pytest.param('fork', marks=pytest.mark.skipif(
+        not DISPONIVEL, reason='sem fork'))])
+    def test_cancelar_em_execucao(self, modo, tmp_path):
+        '''Cancelar mata os processos em execução: o worker fica livre na hora, e nada é guardado no cache.'''
+        cache = CacheResultados(str(tmp_path / 'cache'))
+        executor = Executor(workers=1, cache=cache)
+        executor.submeter(_correcao_lenta(5, modo), 'lenta')
+        time.sleep(0.5)  # O script já está executando
+        inicio = time.monotonic()
+        executor.cancelar()
+        executor.submeter(_correcao_lenta(0, modo), 'rapida')
+        resultados = _esperar(executor, 1)
+        duracao = time.monotonic() - inicio
+        executor.encerrar()
+
+        assert [chave for chave, _ in resultados] == ['rapida']
+        assert resultados[0][1][0]
+        assert duracao < 2
+        assert len(cache._arquivos()) == 1  # Só o resultado da correção rápida
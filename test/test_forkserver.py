@@ -0,0 +1,71 @@
+'''Testa o modo de execução "fork".'''
+
+import pytest
+
+import src.corretor.modelo as modelo
+from src.corretor.modelo import Correcao
+from src.corretor.forkserver import DISPONIVEL, ServidorFork
+from . import fxt_atividade, TEST_DIR
+
+pytestmark = pytest.mark.skipif(not DISPONIVEL, reason='os.fork indisponível')
+
+
+# CASOS DE TESTE
+
+class TestModoFork:
+    def test_mesmo_resultado(self, fxt_atividade):
+        '''Os modos "fork" e "subprocesso" produzem os mesmos resultados.'''
+        for questao in fxt_atividade.questoes[:3]:
+            for correcao in questao.correcoes:
+                correcao.modo = 'subprocesso'
+                esperado = correcao.corrigir()
+                correcao.modo = 'fork'
+                assert correcao.corrigir() == esperado
+
+    def test_isolamento(self, tmp_path):
+        '''Cada execução roda num processo novo, sem estado deixado pela anterior.'''
+        (tmp_path / 'conta.py').write_text(
+            'import builtins\n'
+            'builtins.contador = getattr(builtins, "contador", 0) + 1\n'
+            'print(builtins.contador)\n')
+        correcao = Correcao('python', str(tmp_path), 'conta.py', 'Erro.', modo='fork')
+
+        assert correcao.corrigir()[2] == '1\n'
+        assert correcao.corrigir()[2] == '1\n'
+
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_modulo_da_resposta(self, tmp_path, modo):
+        '''Um módulo da resposta com o nome de um módulo importado pelo servidor é o importado pelo script.'''
+        (tmp_path / 'random.py').write_text('VALOR = 42\n')
+        (tmp_path / 'usa.py').write_text('import random\nprint(random.VALOR)\n')
+        correcao = Correcao('python', str(tmp_path), 'usa.py', 'Erro.', modo=modo)
+
+        assert correcao.corrigir()[:3] == (True, 0, '42\n')
+
+    def test_sem_entrada(self, tmp_path):
+        '''Sem entrada nem arquivo de entrada, o script recebe uma entrada vazia.'''
+        (tmp_path / 'le.py').write_text('import sys\nprint(repr(sys.stdin.read()))\n')
+        servidor = ServidorFork('python')
+        try:
+            resposta = servidor.executar(str(tmp_path / 'le.py'), [], None, timeout=10, limite_saida=1024)
+        finally:
+            servidor.encerrar()
+
+        assert (resposta['codigo'], resposta['saida']) == (0, "''\n")
+
+    def test_timeout(self, monkeypatch):
+        '''Scripts que passam do timeout são mortos.'''
+        monkeypatch.setattr(modelo, 'TIMEOUT', 0.3)
+        correcao = Correcao('python', f'{TEST_DIR}/data', 'lento.py', 'Erro.',
+                            entrada='10\n', modo='fork')
+
+        passou, codigo, _, erro = correcao.corrigir()
+
+        assert not passou
+        assert codigo == 1
+        assert erro == 'Timeout de 0.3s expirado.'
+
+    def test_modo_invalido(self):
+        '''Modos desconhecidos são rejeitados.'''
+        with pytest.raises(ValueError):
+            Correcao('python', f'{TEST_DIR}/data', 'q1.py', 'Erro.', modo='thread')
@@ -0,0 +1,53 @@
+'''Testa o histórico das correções em SQLite.'''
+
+import pytest
+
+from src.corretor import historico
+from src.corretor.historico import Historico
+
+
+# FUNÇÕES AUXILIARES
+
+def _registro(aluno: str, correcao: int, passou: bool, tempo: float) -> dict:
+    return {'tipo': 'correcao', 'aluno': aluno, 'questao': 0, 'descricao': 'Soma', 'correcao': correcao,
+            'comando': 'python q1.py', 'passou': passou, 'codigo': 0 if passou else 1, 'saida': f'{aluno}\n',
+            'erro': '', 'tempo': tempo, 'tempo_cpu': tempo, 'memoria': 1000}
+
+
+# CASOS DE TESTE
+
+class TestHistorico:
+    def test_consultas(self, tmp_path):
+        '''As taxas de aprovação e as execuções mais lentas consideram o último resultado de cada aluno,
+        e as tentativas mostram todos.'''
+        with Historico(str(tmp_path / 'h.db')) as h:
+            rodada = h.iniciar_rodada('config.json')
+            h.registrar(rodada, [_registro('ana', 0, False, 0.5), _registro('ana', 1, True, 0.1),
+                                 _registro('bia', 0, False, 0.2), _registro('bia', 1, True, 0.3),
+                                 {'tipo': 'aluno', 'aluno': 'ana'}])
+            rodada = h.iniciar_rodada('config.json')
+            h.registrar(rodada, [_registro('ana', 0, True, 0.4)])
+
+            taxas = h.taxas_aprovacao()
+            assert [(t['correcao'], t['aprovados'], t['alunos'], t['taxa']) for t in taxas] == \
+                [(0, 1, 2, 0.5), (1, 2, 2, 1.0)]
+            assert [(t['aluno'], t['correcao']) for t in h.mais_lentas(2)] == [('ana', 0), ('bia', 1)]
+            assert [(t['correcao'], t['passou'], t['tempo']) for t in h.tentativas('ana')] == \
+                [(0, 0, 0.5), (0, 1, 0.4), (1, 1, 0.1)]
+
+    def test_lotes(self, tmp_path, monkeypatch):
+        '''Os registros são gravados em lotes e os pendentes, ao fechar.'''
+        monkeypatch.setattr(historico, 'TAMANHO_LOTE', 3)
+        caminho = str(tmp_path / 'h.db')
+        h = Historico(caminho)
+        rodada = h.iniciar_rodada('config.json')
+        h.registrar(rodada, [_registro(a, 0, True, 0.1) for a in 'ab'])
+        outro = Historico(caminho)
+
+        assert outro.taxas_aprovacao() == []
+        h.registrar(rodada, [_registro('c', 0, True, 0.1)])
+        assert outro.taxas_aprovacao()[0]['alunos'] == 3
+        h.registrar(rodada, [_registro('d', 0, False, 0.1)])
+        h.fechar()
+        assert outro.taxas_aprovacao()[0]['alunos'] == 4
+        outro.fechar()
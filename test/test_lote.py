@@ -0,0 +1,176 @@
+'''Testa a correção em lote.'''
+
+import csv, json, os, pytest
+
+import src.corretor.lote as lote
+from src.corretor.distribuido import Trabalhador
+from src.corretor.historico import Historico
+from src.corretor.lote import corrigir_lote, ler_concluidos, main
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_turma(tmp_path, monkeypatch):
+    '''Cria uma atividade com uma questão e três alunos: dois corretos e um errado.'''
+    monkeypatch.setenv('CORRETOR_CACHE', str(tmp_path / 'cache'))
+    config = {
+        'titulo': 'Lote',
+        'comando': 'python',
+        'msg_erro': 'Errou.',
+        'func_expect': 'testar_regex',
+        'questoes': [{
+            'descricao': 'Eco',
+            'pontos': 2,
+            'script': 'q1.py',
+            'correcoes': [
+                {'entrada': 'oi\n', 'verificacoes': [{'args_expect': 'oi'}]},
+                {'entrada': 'tchau\n', 'verificacoes': [{'args_expect': 'tchau'}]},
+            ],
+        }],
+    }
+    caminho_config = tmp_path / 'config.json'
+    caminho_config.write_text(json.dumps(config), encoding='utf-8')
+    submissoes = tmp_path / 'submissoes'
+    for aluno, script in [('ana', 'print(input())'), ('bia', 'print(input())'),
+                          ('caio', 'print("oi")')]:
+        (submissoes / aluno).mkdir(parents=True)
+        (submissoes / aluno / 'q1.py').write_text(script, encoding='utf-8')
+    return caminho_config, submissoes
+
+
+def _ler(caminho) -> list[dict]:
+    return [json.loads(l) for l in open(caminho, encoding='utf-8')]
+
+
+_corrigir_aluno_worker = lote._corrigir_aluno_worker
+
+
+def _corrigir_com_falhas(caminho_config: str, aluno: str, pasta: str):
+    '''Corrige como `lote._corrigir_aluno_worker`, mas falha com "bia" e mata o processo com "caio".'''
+    if aluno == 'bia':
+        raise RuntimeError('falha interna')
+    if aluno == 'caio':
+        os._exit(1)
+    return _corrigir_aluno_worker(caminho_config, aluno, pasta)
+
+
+# CASOS DE TESTE
+
+class TestLote:
+    def test_corrigir_lote(self, fxt_turma, tmp_path):
+        '''Grava um registro por correção e um resumo por aluno.'''
+        config, submissoes = fxt_turma
+        saida = tmp_path / 'res.jsonl'
+        saida_csv = tmp_path / 'res.csv'
+
+        n = corrigir_lote(config, submissoes, saida, saida_csv, workers=2)
+        registros = _ler(saida)
+        resumos = {r['aluno']: r for r in registros if r['tipo'] == 'aluno'}
+        linhas_csv = list(csv.DictReader(open(saida_csv, encoding='utf-8')))
+
+        assert n == 3
+        assert len(registros) == 3 * 3
+        assert resumos['ana']['nota'] == 2
+        assert resumos['caio']['nota'] == 0
+        assert resumos['caio']['corretas'] == 0
+        assert resumos['caio']['execucoes_evitadas'] == 0
+        assert len(linhas_csv) == 6
+
+    def test_trabalhadores(self, fxt_turma, tmp_path, monkeypatch):
+        '''Com trabalhadores, os registros são os mesmos da correção local.'''
+        config, submissoes = fxt_turma
+        monkeypatch.setenv('CORRETOR_SEGREDO', 'segredo de teste')
+        trabalhadores = [Trabalhador(porta=0, workers=2).iniciar() for _ in range(2)]
+        try:
+            corrigir_lote(config, submissoes, tmp_path / 'dist.jsonl',
+                          trabalhadores=[t.endereco for t in trabalhadores])
+        finally:
+            for t in trabalhadores:
+                t.encerrar()
+        corrigir_lote(config, submissoes, tmp_path / 'local.jsonl', workers=2)
+        campos = ['tipo', 'aluno', 'questao', 'correcao', 'passou', 'codigo', 'saida', 'erro', 'nota']
+        resumir = lambda rs: sorted(([r.get(k) for k in campos] for r in rs), key=repr)
+
+        assert resumir(_ler(tmp_path / 'dist.jsonl')) == resumir(_ler(tmp_path / 'local.jsonl'))
+
+    def test_historico(self, fxt_turma, tmp_path):
+        '''Cada execução acrescenta uma rodada ao histórico.'''
+        config, submissoes = fxt_turma
+        corrigir_lote(config, submissoes, tmp_path / 'res.jsonl', workers=2, caminho_historico=tmp_path / 'h.db')
+        corrigir_lote(config, submissoes, tmp_path / 'res2.jsonl', workers=2, caminho_historico=tmp_path / 'h.db')
+
+        with Historico(str(tmp_path / 'h.db')) as historico:
+            assert [(t['correcao'], t['aprovados'], t['alunos']) for t in historico.taxas_aprovacao()] == \
+                [(1, 2, 3), (0, 3, 3)]
+            assert len(historico.tentativas('caio')) == 4
+
+    def test_retomar(self, fxt_turma, tmp_path):
+        '''Após uma interrupção, só os alunos incompletos são corrigidos novamente.'''
+        config, submissoes = fxt_turma
+        saida = tmp_path / 'res.jsonl'
+        corrigir_lote(config, submissoes, saida, workers=1)
+        # Simula uma queda durante a escrita dos registros de "caio"
+        registros = [r for r in _ler(saida) if not (r['aluno'] == 'caio' and r['tipo'] == 'aluno')]
+        with open(saida, 'w', encoding='utf-8') as arq:
+            for r in registros:
+                print(json.dumps(r), file=arq)
+            arq.write('{"tipo": "corr')
+
+        assert ler_concluidos(saida) == {'ana', 'bia'}
+        n = corrigir_lote(config, submissoes, saida, workers=1)
+        registros = _ler(saida)
+
+        assert n == 1
+        assert len(registros) == 3 * 3
+        assert [r['aluno'] for r in registros if r['tipo'] == 'aluno'] == ['ana', 'bia', 'caio']
+
+    def test_falhas(self, fxt_turma, tmp_path, monkeypatch, capsys):
+        '''Alunos cuja correção falha, mesmo matando o processo, ficam pendentes sem interromper os outros.'''
+        config, submissoes = fxt_turma
+        for aluno in ['davi', 'eva', 'iara']:
+            (submissoes / aluno).mkdir()
+            (submissoes / aluno / 'q1.py').write_text('print(input())', encoding='utf-8')
+        saida = tmp_path / 'res.jsonl'
+        monkeypatch.setattr(lote, '_corrigir_aluno_worker', _corrigir_com_falhas)
+
+        n = corrigir_lote(config, submissoes, saida, workers=1)
+        erro = capsys.readouterr().err
+        concluidos = ler_concluidos(saida)
+
+        assert 'bia: a correção falhou (RuntimeError: falha interna)' in erro
+        assert 'caio: a correção falhou (BrokenProcessPool' in erro
+        assert {'bia', 'caio'}.isdisjoint(concluidos)
+        assert {'ana', 'iara'} <= concluidos  # Depois que o processo morreu, os alunos seguintes vão para outro pool
+        assert n == len(concluidos)
+        monkeypatch.setattr(lote, '_corrigir_aluno_worker', _corrigir_aluno_worker)
+        assert corrigir_lote(config, submissoes, saida, workers=1) == 6 - n
+        assert ler_concluidos(saida) == {'ana', 'bia', 'caio', 'davi', 'eva', 'iara'}
+
+    def test_config_invalida(self, fxt_turma, tmp_path, capsys):
+        '''Um arquivo de configuração inválido é relatado como erro de uso, sem rastreamento de pilha.'''
+        config, submissoes = fxt_turma
+        config.write_text('{"titulo": "Lote"}', encoding='utf-8')
+
+        with pytest.raises(SystemExit) as excinfo:
+            main([str(config), str(submissoes), '-o', str(tmp_path / 'res.jsonl')])
+        erro = capsys.readouterr().err
+
+        assert excinfo.value.code == 2
+        assert 'erro no arquivo de configuração' in erro
+        assert 'Traceback' not in erro
+
+    def test_sem_trabalhadores(self, fxt_turma, tmp_path, capsys, monkeypatch):
+        '''A falta do segredo ou de trabalhadores é relatada como erro de uso, sem rastreamento de pilha.'''
+        config, submissoes = fxt_turma
+        monkeypatch.delenv('CORRETOR_SEGREDO', raising=False)
+        argv = [str(config), str(submissoes), '-o', str(tmp_path / 'res.jsonl'), '--trabalhadores', '127.0.0.1:1']
+
+        for extra, mensagem in [([], 'segredo'), (['--segredo', 'segredo de teste'], 'Nenhum trabalhador')]:
+            with pytest.raises(SystemExit) as excinfo:
+                main(argv + extra)
+            erro = capsys.readouterr().err
+
+            assert excinfo.value.code == 2
+            assert mensagem in erro
+            assert 'Traceback' not in erro
@@ -0,0 +1,47 @@
+'''Testa a importação do modelo do corretor sem a interface gráfica.'''
+
+import os, subprocess, sys
+
+# Constantes
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Tempo máximo para importar o modelo num interpretador novo (medido: cerca de 0,06 s)
+ORCAMENTO_IMPORTACAO = 0.25
+REPETICOES = 5
+# Módulos que o modelo não deve importar: a interface, o Tk e os que só alguns modos usam
+PROIBIDOS = ['tkinter', 'src.corretor.corretor', 'src.corretor.vigia', 'src.corretor.forkserver',
+             'src.corretor.chamador', 'src.corretor.geradores', 'src.corretor.distribuido',
+             'src.corretor.historico', 'ctypes', 'sqlite3', 'socket']
+
+MEDIR = '''
+import sys, time
+inicio = time.perf_counter()
+import src.corretor.modelo
+print(time.perf_counter() - inicio)
+print(' '.join(m for m in sys.argv[1:] if m in sys.modules))
+'''
+
+
+# Funções
+
+def _importar() -> tuple[float, list[str]]:
+    '''Importa o modelo num interpretador novo e retorna o tempo da importação e os módulos proibidos carregados.'''
+    processo = subprocess.run([sys.executable, '-c', MEDIR, *PROIBIDOS], cwd=RAIZ,
+                              capture_output=True, text=True, check=True)
+    tempo, carregados = (processo.stdout.split('\n') + [''])[:2]
+    return float(tempo), carregados.split()
+
+
+# CASOS DE TESTE
+
+class TestImportacao:
+    def test_sem_interface(self):
+        '''O modelo é importado sem o Tk e sem os módulos que só a interface ou alguns modos usam.'''
+        _, carregados = _importar()
+
+        assert carregados == []
+
+    def test_orcamento(self):
+        '''A importação do modelo, a partir de um interpretador novo, não fica mais lenta que o orçamento.'''
+        tempo = min(_importar()[0] for _ in range(REPETICOES))
+
+        assert tempo < ORCAMENTO_IMPORTACAO, f'O modelo levou {tempo:.3f} s para ser importado'
@@ -0,0 +1,112 @@
+'''Testa a compilação do arquivo de configuração num plano de correção.'''
+
+import json, pytest, shutil
+
+from src.corretor import plano
+from src.corretor.modelo import Atividade
+from src.corretor.erros import ErroConfiguracao
+from . import TEST_DIR
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_config():
+    return {
+        'titulo': 'Atividade', 'comando': 'python', 'msg_erro': 'Erro.', 'func_expect': 'testar_regex',
+        'pontos': 1, 'verificacoes': [{'args_expect': 'comum'}],
+        'questoes': [
+            {'descricao': 'Q1', 'script': 'q1.py', 'correcoes': [
+                {'mais_verificacoes': [{'args_expect': 'a'}]},
+                {'mais_verificacoes': [{'args_expect': 'b'}]},
+                {'entrada': 'x\n'},
+            ]},
+            {'descricao': 'Q2', 'script': 'q2.py', 'pontos': 2, 'correcoes': [{}]},
+        ],
+    }
+
+
+# CASOS DE TESTE
+
+class TestPlano:
+    def test_heranca(self, fxt_config):
+        '''As verificações herdadas não crescem entre correções irmãs e iguais são compartilhadas.'''
+        p = plano.compilar(fxt_config)
+        c1, c2, c3 = p.questoes[0].correcoes
+
+        assert [v['args_expect'] for v in c1.verificacoes] == ['comum', 'a']
+        assert [v['args_expect'] for v in c2.verificacoes] == ['comum', 'b']
+        assert [v['args_expect'] for v in c3.verificacoes] == ['comum']
+        assert c1.verificacoes[0] is c2.verificacoes[0] is p.questoes[1].correcoes[0].verificacoes[0]
+        assert (c3.entrada, c3.script, c3.diretorio) == ('x\n', 'q1.py', None)
+        assert p.questoes[1].pontos == 2
+        # Compilar de novo dá o mesmo resultado: a configuração não é alterada
+        assert plano.para_json(plano.compilar(fxt_config)) == plano.para_json(p)
+
+    def test_imutavel(self, fxt_config):
+        '''Os registros do plano não podem ser alterados.'''
+        p = plano.compilar(fxt_config)
+        correcao = p.questoes[0].correcoes[0]
+
+        with pytest.raises(AttributeError):
+            correcao.script = 'outro.py'
+        with pytest.raises(TypeError):
+            correcao.verificacoes[0]['args_expect'] = 'outro'
+
+    def test_chave_ausente(self, fxt_config):
+        '''A falta de uma chave obrigatória indica onde ela falta.'''
+        del fxt_config['questoes'][1]['script']
+
+        with pytest.raises(ErroConfiguracao, match=r'questoes\[1\]\.correcoes\[0\]: falta a chave "script"'):
+            plano.compilar(fxt_config)
+
+    def test_json(self, fxt_config):
+        '''O plano gravado em JSON é lido de volta igual, com as verificações ainda compartilhadas.'''
+        p = plano.compilar(fxt_config)
+        lido = plano.de_json(json.loads(json.dumps(plano.para_json(p))))
+
+        assert plano.para_json(lido) == plano.para_json(p)
+        assert lido.questoes[0].correcoes[0].verificacoes[0] is lido.questoes[0].correcoes[1].verificacoes[0]
+
+    def test_cache_em_disco(self, tmp_path, monkeypatch):
+        '''O plano guardado em disco é reaproveitado por outro processo (simulado limpando a memória).'''
+        caminho = tmp_path / 'config.json'
+        shutil.copy(f'{TEST_DIR}/data/config.json', caminho)
+        plano.limpar_cache()
+        Atividade.ler_arquivo_config(str(caminho), diretorio_cache=str(tmp_path / 'cache'))
+        plano.limpar_cache()
+        monkeypatch.setattr(plano, 'compilar', lambda _: pytest.fail('recompilou'))
+        atividade = Atividade.ler_arquivo_config(str(caminho), diretorio=f'{TEST_DIR}/data',
+                                                 diretorio_cache=str(tmp_path / 'cache'))
+
+        assert atividade.titulo == 'Atividade 1'
+        assert atividade.questoes[0].correcoes[0].diretorio == f'{TEST_DIR}/data'
+
+    def test_funcao(self, fxt_config):
+        '''Correções de função não exigem verificações, e cada caso precisa do valor esperado.'''
+        fxt_config['questoes'][0]['verificacoes'] = fxt_config.pop('verificacoes')
+        fxt_config['questoes'][1]['correcoes'] = [
+            {'tipo': 'funcao', 'funcao': 'soma', 'casos': [{'args': [1, 2], 'esperado': 3}, {'esperado': 0}]}]
+        correcao = plano.compilar(fxt_config).questoes[1].correcoes[0]
+
+        assert (correcao.tipo, correcao.verificacoes) == ('funcao', ())
+        assert plano._descongelar(correcao.casos) == [{'args': [1, 2], 'esperado': 3}, {'args': [], 'esperado': 0}]
+        del fxt_config['questoes'][1]['correcoes'][0]['casos'][1]['esperado']
+        with pytest.raises(ErroConfiguracao, match=r'casos\[1\]: falta a chave "esperado"'):
+            plano.compilar(fxt_config)
+
+    def test_complexidade(self, fxt_config):
+        '''Correções de complexidade exigem pelo menos três tamanhos e uma complexidade conhecida.'''
+        fxt_config['questoes'][0]['verificacoes'] = fxt_config.pop('verificacoes')
+        correcao = {'tipo': 'complexidade', 'gerador': {'nome': 'inteiros'}, 'tamanhos': [10, 20, 40],
+                    'complexidade': 'n'}
+        fxt_config['questoes'][1]['correcoes'] = [correcao]
+
+        assert plano.compilar(fxt_config).questoes[1].correcoes[0].tamanhos == (10, 20, 40)
+        correcao['tamanhos'] = [10, 20]
+        with pytest.raises(ErroConfiguracao, match='"tamanhos"'):
+            plano.compilar(fxt_config)
+        correcao['tamanhos'] = [10, 20, 40]
+        correcao['complexidade'] = 'n!'
+        with pytest.raises(ErroConfiguracao, match='complexidade "n!" inválida'):
+            plano.compilar(fxt_config)
@@ -0,0 +1,139 @@
+'''Testa a captura limitada da saída dos scripts.'''
+
+import time, pytest
+
+from src.corretor.modelo import Atividade, Correcao
+from src.corretor.erros import ErroConfiguracao
+from src.corretor.forkserver import DISPONIVEL
+from src.corretor.processo import Limites, executar_processo
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_diretorio(tmp_path):
+    (tmp_path / 'inunda.py').write_text('while True:\n    print("x" * 99)\n')
+    (tmp_path / 'inunda_erro.py').write_text(
+        'import sys\nwhile True:\n    print("x" * 99, file=sys.stderr)\n')
+    (tmp_path / 'proibido.py').write_text(
+        'import time\nprint("resposta proibida", flush=True)\ntime.sleep(10)\nprint("fim")\n')
+    (tmp_path / 'eco.py').write_text('import sys\nsys.stdout.write(sys.stdin.read())\n')
+    return tmp_path
+
+
+# CASOS DE TESTE
+
+class TestCaptura:
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_inundacao(self, fxt_diretorio, modo):
+        '''Um script que imprime sem parar é morto assim que passa do limite.'''
+        if modo == 'fork' and not DISPONIVEL:
+            pytest.skip('os.fork indisponível')
+        correcao = Correcao('python', str(fxt_diretorio), 'inunda.py', 'Erro.',
+                            limite_saida=100_000, modo=modo)
+        inicio = time.monotonic()
+        passou, codigo, saida, erro = correcao.corrigir()
+
+        assert time.monotonic() - inicio < 3
+        assert not passou
+        assert codigo == 1
+        assert erro.startswith('A saída excedeu o limite de 100000 bytes.')
+        assert 'bytes omitidos' in saida
+        assert len(saida) < 20_000
+
+    def test_inundacao_erro(self, fxt_diretorio):
+        '''O limite também vale para a saída de erro.'''
+        correcao = Correcao('python', str(fxt_diretorio), 'inunda_erro.py', 'Erro.',
+                            limite_saida=10_000)
+        passou, _, _, erro = correcao.corrigir()
+
+        assert not passou
+        assert erro.startswith('O erro excedeu o limite de 10000 bytes.')
+
+    def test_entrada_grande(self, fxt_diretorio):
+        '''Entradas maiores que o buffer do pipe são escritas aos poucos, sem travar.'''
+        entrada = 'abcdefghi\n' * 50_000
+        execucao = executar_processo(['python', str(fxt_diretorio / 'eco.py')], entrada, Limites(5))
+
+        assert execucao.codigo == 0
+        assert execucao.saida == entrada
+
+    def test_falha_antecipada(self, fxt_diretorio):
+        '''Com a falha já certa, o script é interrompido sem esperar o fim.'''
+        verificacoes = [{'func_expect': 'testar_nao_regex', 'args_expect': 'proibida'}]
+        correcao = Correcao('python', str(fxt_diretorio), 'proibido.py', 'Saída proibida.',
+                            verificacoes=verificacoes)
+        inicio = time.monotonic()
+        passou, _, saida, erro = correcao.corrigir()
+
+        assert time.monotonic() - inicio < 3
+        assert not passou
+        assert erro == 'Saída proibida.'
+        assert saida.startswith('resposta proibida')
+        assert 'fim' not in saida
+
+
+class TestLimites:
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_limite_cpu(self, tmp_path, modo):
+        '''Um laço infinito é morto pelo limite de CPU, antes do timeout.'''
+        if modo == 'fork' and not DISPONIVEL:
+            pytest.skip('os.fork indisponível')
+        (tmp_path / 'laco.py').write_text('while True:\n    pass\n')
+        correcao = Correcao('python', str(tmp_path), 'laco.py', 'Erro.', timeout=10,
+                            limite_cpu=1, modo=modo)
+        passou, codigo, _, erro = correcao.corrigir()
+
+        assert not passou
+        assert codigo == 1
+        assert erro.startswith('Limite de CPU de 1s excedido.')
+        assert correcao.ultima_execucao.tempo < 5
+
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_limite_memoria(self, tmp_path, modo):
+        '''Alocar mais memória que o limite falha com `MemoryError`.'''
+        if modo == 'fork' and not DISPONIVEL:
+            pytest.skip('os.fork indisponível')
+        (tmp_path / 'aloca.py').write_text('x = bytearray(512 * 1024 * 1024)\nprint("alocou")\n')
+        correcao = Correcao('python', str(tmp_path), 'aloca.py', 'Erro.', limite_memoria=256,
+                            modo=modo)
+        passou, codigo, saida, erro = correcao.corrigir()
+
+        assert not passou
+        assert codigo != 0
+        assert 'alocou' not in saida
+        assert 'MemoryError' in erro
+
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_medidas(self, tmp_path, modo):
+        '''O tempo, o tempo de CPU e o pico de memória são medidos.'''
+        if modo == 'fork' and not DISPONIVEL:
+            pytest.skip('os.fork indisponível')
+        (tmp_path / 'aloca.py').write_text('x = bytearray(64 * 1024 * 1024)\nsum(range(10**6))\n')
+        correcao = Correcao('python', str(tmp_path), 'aloca.py', 'Erro.', modo=modo)
+        passou, *_ = correcao.corrigir()
+        execucao = correcao.ultima_execucao
+
+        assert passou
+        assert execucao.tempo >= execucao.tempo_cpu > 0
+        assert execucao.memoria > 64 * 1024 * 1024
+
+    def test_limites_herdados(self):
+        '''Os limites definidos na atividade valem para todas as correções, salvo se redefinidos.'''
+        config = {
+            'titulo': 'Atividade', 'comando': 'python', 'diretorio': '.', 'msg_erro': 'Erro.',
+            'timeout': 2, 'limite_memoria': 100, 'verificacoes': [],
+            'questoes': [{'descricao': 'Q1', 'pontos': 1, 'limite_cpu': 0.5, 'correcoes': [
+                {'script': 'a.py'}, {'script': 'b.py', 'timeout': 3}]}],
+        }
+        a, b = Atividade.ler_config(config).questoes[0].correcoes
+
+        assert (a.timeout, a.limite_cpu, a.limite_memoria) == (2, 0.5, 100)
+        assert (b.timeout, b.limite_cpu, b.limite_memoria) == (3, 0.5, 100)
+        assert b.limites.limite_memoria == 100 * 1024 * 1024
+
+    @pytest.mark.parametrize('limite', [0, -1, 'muito', True])
+    def test_limite_invalido(self, limite):
+        '''Limites que não são números positivos são erros de configuração.'''
+        with pytest.raises(ErroConfiguracao):
+            Correcao('python', '.', 'a.py', 'Erro.', limite_cpu=limite)
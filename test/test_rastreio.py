@@ -0,0 +1,55 @@
+'''Testa a instrumentação das fases da correção.'''
+
+import json, pytest
+
+from src.corretor import rastreio
+from src.corretor.modelo import Correcao
+
+
+# FIXTURES
+
+@pytest.fixture
+def fxt_rastreio():
+    rastreio.desativar()
+    rastreio.ativar()
+    yield rastreio
+    rastreio.desativar()
+
+
+# CASOS DE TESTE
+
+class TestRastreio:
+    def test_desativado(self):
+        '''Desativado, nada é registrado.'''
+        rastreio.desativar()
+        with rastreio.intervalo('fase'):
+            pass
+
+        assert rastreio.resumo() == []
+
+    def test_fases_da_correcao(self, fxt_rastreio, tmp_path):
+        '''A execução e cada verificação da correção são registradas.'''
+        (tmp_path / 'oi.py').write_text('print("oi")\n')
+        verificacoes = [{'func_expect': 'testar_regex', 'args_expect': 'oi'}]
+        Correcao('python', str(tmp_path), 'oi.py', 'Erro.', verificacoes=verificacoes).corrigir()
+        fases = {l['fase']: l for l in rastreio.resumo()}
+
+        for fase in ['corrigir', 'iniciar_processo', 'executar_script', 'verificar', 'testar_regex']:
+            assert fases[fase]['n'] == 1
+        assert fases['corrigir']['total'] >= fases['executar_script']['total']
+        assert 'testar_regex' in rastreio.tabela()
+
+    def test_exportar_chrome(self, fxt_rastreio, tmp_path):
+        '''O rastro é exportado no formato Chrome Trace, com os intervalos de outros processos incorporados.'''
+        with rastreio.intervalo('fase', 'teste', detalhe=1):
+            pass
+        rastreio.incorporar({'eventos': [('outra', 'teste', 10.0, 5.0, 1, 2, {})],
+                             'threads': [((1, 2), 'worker')]})
+        caminho = tmp_path / 'rastro.json'
+        rastreio.exportar_chrome(str(caminho))
+        eventos = json.loads(caminho.read_text())['traceEvents']
+        intervalos = {e['name']: e for e in eventos if e['ph'] == 'X'}
+
+        assert intervalos['fase']['args'] == {'detalhe': 1}
+        assert intervalos['outra']['dur'] == 5.0
+        assert {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 2, 'args': {'name': 'worker'}} in eventos
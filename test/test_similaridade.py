@@ -0,0 +1,90 @@
+'''Testa a detecção de respostas parecidas.'''
+
+import json
+
+from src.corretor import analise, similaridade
+from src.corretor.similaridade import IndiceLSH, assinatura, comparar_turma
+
+# Constantes
+ORIGINAL = '''
+def media(valores):
+    total = 0
+    for v in valores:
+        total += v
+    return total / len(valores)
+
+n = int(input())
+numeros = [int(input()) for _ in range(n)]
+print(f"Média: {media(numeros):.2f}")
+'''
+# O mesmo programa com outros nomes, literais e formatação
+DISFARCADO = '''
+def calcula(lista):
+    soma = 0
+    for x in lista:  # percorre
+        soma += x
+    return soma / len(lista)
+
+quantidade = int(input( ))
+dados = [int(input()) for i in range(quantidade)]
+print(f"Resultado = {calcula(dados):.3f}")
+'''
+DIFERENTE = '''
+import sys
+
+palavras = sys.stdin.read().split()
+contagem = {}
+for p in palavras:
+    contagem[p] = contagem.get(p, 0) + 1
+for p, c in sorted(contagem.items(), key=lambda item: -item[1]):
+    print(p, c)
+'''
+
+
+# CASOS DE TESTE
+
+class TestSimilaridade:
+    def test_assinatura(self, tmp_path):
+        '''Renomear e trocar literais não muda a assinatura; um programa diferente tem semelhança baixa.'''
+        for nome, fonte in [('a.py', ORIGINAL), ('b.py', DISFARCADO), ('c.py', DIFERENTE), ('d.py', 'def (')]:
+            (tmp_path / nome).write_text(fonte)
+        a, b, c = (assinatura(str(tmp_path / n)) for n in ['a.py', 'b.py', 'c.py'])
+
+        assert similaridade.semelhanca(a, b) == 1
+        assert similaridade.semelhanca(a, c) < 0.3
+        assert assinatura(str(tmp_path / 'd.py')) is None
+        assert assinatura(str(tmp_path / 'ausente.py')) is None
+
+    def test_cache(self, tmp_path, monkeypatch):
+        '''A assinatura de um script já visto vem do cache, sem analisá-lo.'''
+        (tmp_path / 'a.py').write_text(ORIGINAL)
+        guardada = assinatura(str(tmp_path / 'a.py'), str(tmp_path / 'cache'))
+        monkeypatch.setattr(analise, 'analisar', lambda _: None)
+
+        assert assinatura(str(tmp_path / 'a.py'), str(tmp_path / 'cache')) == guardada
+
+    def test_indice(self):
+        '''O índice só compara os pares que coincidem em alguma faixa.'''
+        indice = IndiceLSH(bandas=4)
+        indice.adicionar('a', [1, 2, 3, 4, 5, 6, 7, 8])
+        indice.adicionar('b', [1, 2, 0, 0, 0, 0, 0, 0])
+        indice.adicionar('c', [9, 9, 9, 9, 9, 9, 7, 8])
+        indice.adicionar('d', [8, 8, 8, 8, 8, 8, 8, 0])
+
+        assert indice.candidatos() == {('a', 'b'), ('a', 'c')}
+        assert indice.pares(0.25) == [('a', 'b', 0.25), ('a', 'c', 0.25)]
+
+    def test_comparar_turma(self, tmp_path):
+        '''Os pares parecidos são relatados por questão.'''
+        config = {'titulo': 'Plágio', 'comando': 'python', 'msg_erro': 'Erro.', 'verificacoes': [], 'pontos': 1,
+                  'questoes': [{'descricao': 'Média', 'script': 'q1.py', 'correcoes': [{}]},
+                               {'descricao': 'Contagem', 'script': 'q2.py', 'correcoes': [{}]}]}
+        (tmp_path / 'config.json').write_text(json.dumps(config))
+        for aluno, q1, q2 in [('ana', ORIGINAL, DIFERENTE), ('bia', DISFARCADO, ORIGINAL), ('caio', DIFERENTE, None)]:
+            (tmp_path / 'submissoes' / aluno).mkdir(parents=True)
+            (tmp_path / 'submissoes' / aluno / 'q1.py').write_text(q1)
+            if q2:
+                (tmp_path / 'submissoes' / aluno / 'q2.py').write_text(q2)
+
+        resultado = comparar_turma(str(tmp_path / 'config.json'), str(tmp_path / 'submissoes'))
+        assert resultado == [('Média', [('ana', 'bia', 1.0)]), ('Contagem', [])]
@@ -0,0 +1,87 @@
+'''Testa o registro e a compilação das verificações.'''
+
+import re, pytest
+
+from src.corretor.modelo import Correcao
+from src.corretor.erros import ErroConfiguracao
+from src.corretor import verificacoes
+from src.corretor.verificacoes import compilar
+from . import TEST_DIR
+
+
+# CASOS DE TESTE
+
+class TestCompilar:
+    def test_regex_compilada(self):
+        '''O argumento de testar_regex é compilado uma vez, na leitura da configuração.'''
+        verificacao = compilar({'func_expect': 'testar_regex', 'args_expect': 'ol[aá]'})
+
+        assert isinstance(verificacao.args, re.Pattern)
+        assert verificacao('  olá\n')
+        assert not verificacao('oi')
+
+    def test_regex_str(self):
+        '''testar_regex continua aceitando a expressão como str.'''
+        assert verificacoes.testar_regex('hello\n', 'hel+o')
+
+    @pytest.mark.parametrize('verificacao', [
+        {'func_expect': 'testar_nada', 'args_expect': 'x'},
+        {'func_expect': '__import__("os").getcwd', 'args_expect': 'x'},
+        {'func_expect': 'testar_regex', 'args_expect': '('},
+        {'func_expect': 'testar_regex'},
+        {'args_expect': 'x'},
+    ])
+    def test_invalida(self, verificacao):
+        '''Verificações inválidas falham na leitura da configuração, não durante a correção.'''
+        with pytest.raises(ErroConfiguracao):
+            Correcao('python', f'{TEST_DIR}/data', 'q1.py', 'Erro.', verificacoes=[verificacao])
+
+
+class TestArquivo:
+    def test_arquivo(self, tmp_path):
+        '''A saída é comparada com o arquivo de referência, e a falha indica onde está a diferença.
+        Ao divergir, o script é interrompido sem esperar o fim.'''
+        (tmp_path / 'esperado.txt').write_text(''.join(f'{i}\n' for i in range(1000)))
+        (tmp_path / 'certo.py').write_text('for i in range(1000):\n    print(i)\n')
+        (tmp_path / 'errado.py').write_text(
+            'import sys, time\nfor i in range(1000):\n    print(i if i != 500 else -1)\n'
+            'sys.stdout.flush()\ntime.sleep(10)\n')
+        verificacoes = [{'func_expect': 'testar_arquivo', 'args_expect': 'esperado.txt'}]
+        certo, errado = (Correcao('python', str(tmp_path), s, 'Erro.', verificacoes=verificacoes)
+                         for s in ['certo.py', 'errado.py'])
+
+        assert certo.corrigir()[0]
+        passou, _, _, erro = errado.corrigir()
+        assert not passou
+        assert erro == "Erro.\nLinha 501, coluna 1: esperado '500', obtido '-1'."
+        assert errado.ultima_execucao.interrompida
+
+    @pytest.mark.parametrize('modo', ['subprocesso', 'fork'])
+    def test_maior_que_limite(self, tmp_path, modo):
+        '''Uma saída maior que o limite de saída é comparada inteira, sem interromper o script, e só o início
+        e o fim são guardados. Uma diferença depois do limite também é encontrada.'''
+        (tmp_path / 'esperado.txt').write_text(''.join(f'{i}\n' for i in range(50_000)))
+        (tmp_path / 'certo.py').write_text('for i in range(50_000):\n    print(i)\n')
+        (tmp_path / 'errado.py').write_text('for i in range(50_000):\n    print(i if i != 30_000 else -1)\n')
+        (tmp_path / 'curto.py').write_text('for i in range(49_999):\n    print(i)\n')
+        verificacoes = [{'func_expect': 'testar_arquivo', 'args_expect': 'esperado.txt'}]
+        certo, errado, curto = (Correcao('python', str(tmp_path), s, 'Erro.', verificacoes=verificacoes,
+                                         limite_saida=64 * 1024, modo=modo)
+                                for s in ['certo.py', 'errado.py', 'curto.py'])
+
+        passou, codigo, saida, _ = certo.corrigir()
+        assert (passou, codigo) == (True, 0)
+        assert len(saida) < 64 * 1024 and saida.endswith('49999\n')
+        assert certo.ultima_execucao.resumida
+        assert errado.corrigir()[3] == "Erro.\nLinha 30001, coluna 1: esperado '30000', obtido '-1'."
+        assert curto.corrigir()[3] == "Erro.\nLinha 50000: a saída terminou antes do esperado (faltou '49999')."
+
+    def test_argumentos(self, tmp_path):
+        '''A tolerância é opcional, e um arquivo ausente faz a verificação falhar.'''
+        verificacao = compilar({'func_expect': 'testar_arquivo',
+                                'args_expect': {'arquivo': 'ausente.txt', 'tolerancia': 0.1}}, str(tmp_path))
+
+        assert not verificacao('1\n')
+        assert 'inacessível' in verificacao.detalhar('1\n')
+        with pytest.raises(ErroConfiguracao):
+            compilar({'func_expect': 'testar_arquivo', 'args_expect': {'arquivo': 'a.txt', 'tolerancia': -1}})
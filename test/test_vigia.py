@@ -0,0 +1,68 @@
+'''Testa o vigia de arquivos do modo ao vivo.'''
+
+import os, pytest, queue
+
+from src.corretor.vigia import Vigia, _libc_inotify
+
+# Constantes
+ESPERA = 3  # segundos, no máximo, até o aviso de uma mudança
+
+
+# FIXTURES
+
+@pytest.fixture(params=['polling', 'inotify'])
+def fxt_vigia(request, tmp_path):
+    '''Retorna uma função que cria e inicia um vigia dos caminhos dados, parado ao final do teste.'''
+    if request.param == 'inotify' and _libc_inotify() is None:
+        pytest.skip('inotify indisponível')
+    vigias = []
+
+    def criar(*caminhos):
+        vigia = Vigia([str(c) for c in caminhos], atraso=0.2, intervalo=0.05,
+                      polling=request.param == 'polling')
+        vigia.iniciar()
+        vigias.append(vigia)
+        return vigia
+
+    yield criar
+    for vigia in vigias:
+        vigia.parar()
+
+
+# CASOS DE TESTE
+
+class TestVigia:
+    def test_mudanca(self, fxt_vigia, tmp_path):
+        '''Só o arquivo alterado é avisado.'''
+        a, b = tmp_path / 'a.py', tmp_path / 'b.py'
+        a.write_text('print(1)\n')
+        b.write_text('print(2)\n')
+        vigia = fxt_vigia(a, b)
+        a.write_text('print(10)\n')
+
+        assert vigia.mudancas.get(timeout=ESPERA) == {str(a)}
+
+    def test_salvamentos_seguidos(self, fxt_vigia, tmp_path):
+        '''Salvamentos seguidos geram um único aviso, e salvar sem mudar o conteúdo não gera aviso.'''
+        a = tmp_path / 'a.py'
+        a.write_text('print(1)\n')
+        vigia = fxt_vigia(a)
+        for i in range(5):
+            a.write_text(f'print({i})\n')
+
+        assert vigia.mudancas.get(timeout=ESPERA) == {str(a)}
+        a.write_text('print(4)\n')
+        with pytest.raises(queue.Empty):
+            vigia.mudancas.get(timeout=1)
+
+    def test_renomeado_por_cima(self, fxt_vigia, tmp_path):
+        '''Arquivos salvos como os editores fazem (escrita num temporário e renomeação) e arquivos criados
+        depois do início também são avisados.'''
+        a, b = tmp_path / 'a.py', tmp_path / 'b.py'
+        a.write_text('print(1)\n')
+        vigia = fxt_vigia(a, b)
+        (tmp_path / 'a.py.tmp').write_text('print(2)\n')
+        os.replace(tmp_path / 'a.py.tmp', a)
+        b.write_text('print(3)\n')
+
+        assert vigia.mudancas.get(timeout=ESPERA) == {str(a), str(b)}